@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class MealsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'meals'
+    
+    def ready(self):
+        # Invalidate cached restaurant menus and keep servings_available in sync with stock and recipes
+        from . import signals  # noqa: F401
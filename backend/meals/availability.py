@@ -0,0 +1,263 @@
+import math
+from collections import defaultdict
+from django.db import transaction
+from django.db.models import F, Prefetch
+from django.utils import timezone
+from .models import Meal, MealIngredient, CustomMeal, CustomMealIngredient
+from restaurants.models import Ingredient
+from restaurants.menu_cache import bump_menu_versions
+from .servings import STOCK_TOLERANCE, refresh_servings_for_ingredients
+
+
+def _to_id(value):
+    """Accept either a primary key or a model instance from request data"""
+    return getattr(value, 'pk', value)
+
+
+def _covers(stock, required_quantity):
+    """Whether `stock` covers `required_quantity`, tolerating float noise"""
+    return stock * (1 + STOCK_TOLERANCE) >= required_quantity
+
+
+def _quantity(item):
+    """The item's quantity as a positive int; InvalidItem if it isn't one"""
+    quantity = item.get('quantity', 1)
+    if isinstance(quantity, str) and quantity.isdigit():
+        quantity = int(quantity)
+    if not isinstance(quantity, int) or isinstance(quantity, bool) or quantity < 1:
+        raise InvalidItem(f"Invalid quantity {item.get('quantity')!r}: it must be a positive whole number.")
+    return quantity
+
+
+class InvalidItem(ValueError):
+    """Raised for a cart item the plan can't be built from"""
+
+
+class InsufficientStock(Exception):
+    """Raised when an ingredient can't cover the quantity being reserved"""
+
+    def __init__(self, ingredient, required_quantity):
+        self.ingredient = ingredient
+        self.required_quantity = required_quantity
+        super().__init__(f"Not enough {ingredient.name} (ID: {ingredient.id}): required {required_quantity}")
+
+
+class AvailabilityPlan:
+    """
+    In-memory ingredient plan for a whole cart.
+
+    Every meal, custom meal, recipe row and ingredient referenced by the items
+    is loaded with a constant number of queries, and the required quantity of
+    each ingredient is summed across the cart so that items sharing an
+    ingredient are checked against their combined need.
+    """
+
+    def __init__(self, items_data, custom_meals=None):
+        if not isinstance(items_data, list):
+            raise InvalidItem('items must be a list.')
+        # Quantities are checked up front so nothing below can fail on them
+        self.items_data = [{**item, 'quantity': _quantity(item)} for item in items_data if isinstance(item, dict)]
+        # Custom meals the items may refer to; others are treated as missing
+        self.custom_meal_queryset = CustomMeal.objects.all() if custom_meals is None else custom_meals
+        self.meals = {}
+        self.custom_meals = {}
+        self.ingredients = {}
+        # ingredient id -> total quantity required by the cart
+        self.required = defaultdict(float)
+        # ingredient id -> names of the meals that need it
+        self.required_by = defaultdict(list)
+        self._load()
+        self._aggregate()
+
+    def _load(self):
+        meal_ids = {_to_id(item['meal']) for item in self.items_data if item.get('meal')}
+        custom_meal_ids = {_to_id(item['custom_meal']) for item in self.items_data if item.get('custom_meal')}
+
+        if meal_ids:
+            meals = Meal.objects.filter(id__in=meal_ids).prefetch_related(
+                Prefetch('meal_ingredients', queryset=MealIngredient.objects.select_related('ingredient'))
+            )
+            self.meals = {meal.id: meal for meal in meals}
+
+        if custom_meal_ids:
+            custom_meals = self.custom_meal_queryset.filter(id__in=custom_meal_ids).prefetch_related(
+                Prefetch('ingredients', queryset=CustomMealIngredient.objects.select_related('ingredient'))
+            )
+            self.custom_meals = {custom_meal.id: custom_meal for custom_meal in custom_meals}
+
+    def _recipe(self, item):
+        """Return (name, [(ingredient, quantity per serving)]) for a cart item, or None if it can't be resolved"""
+        if item.get('meal'):
+            meal = self.meals.get(_to_id(item['meal']))
+            if meal is None:
+                return None
+            # Optional ingredients are not deducted from inventory
+            rows = [(mi.ingredient, mi.quantity) for mi in meal.meal_ingredients.all() if not mi.is_optional]
+            return meal.name, rows
+
+        if item.get('custom_meal'):
+            custom_meal = self.custom_meals.get(_to_id(item['custom_meal']))
+            if custom_meal is None:
+                return None
+            rows = [(cmi.ingredient, cmi.quantity) for cmi in custom_meal.ingredients.all()]
+            return custom_meal.name, rows
+
+        return None
+
+    def _aggregate(self):
+        for item in self.items_data:
+            recipe = self._recipe(item)
+            if recipe is None:
+                continue
+
+            name, rows = recipe
+            order_quantity = item['quantity']
+            for ingredient, quantity in rows:
+                # Share one instance per ingredient so deductions stay consistent
+                ingredient = self.ingredients.setdefault(ingredient.id, ingredient)
+                self.required[ingredient.id] += float(quantity) * order_quantity
+                if name not in self.required_by[ingredient.id]:
+                    self.required_by[ingredient.id].append(name)
+
+    def resolved_items(self):
+        """
+        Yield a copy of each cart item with `meal`/`custom_meal` ids replaced by
+        the loaded instances. Items pointing at a meal that no longer exists are skipped.
+        """
+        for item in self.items_data:
+            item_to_create = item.copy()
+
+            if item_to_create.get('meal'):
+                meal = self.meals.get(_to_id(item_to_create['meal']))
+                if meal is None:
+                    continue
+                item_to_create['meal'] = meal
+
+            if item_to_create.get('custom_meal'):
+                custom_meal = self.custom_meals.get(_to_id(item_to_create['custom_meal']))
+                if custom_meal is None:
+                    continue
+                item_to_create['custom_meal'] = custom_meal
+
+            yield item_to_create
+
+    def unavailable_ingredients(self):
+        """List the ingredients that can't cover the combined need of the cart"""
+        unavailable = []
+        for ingredient_id, required_quantity in self.required.items():
+            ingredient = self.ingredients[ingredient_id]
+            if not ingredient.is_available or not _covers(ingredient.quantity, required_quantity):
+                unavailable.append({
+                    'id': ingredient.id,
+                    'name': ingredient.name,
+                    'meal': ', '.join(self.required_by[ingredient_id]),
+                    'available': ingredient.is_available,
+                    'required': required_quantity,
+                    'in_stock': ingredient.quantity
+                })
+        return unavailable
+
+    def item_availability(self, combined=True):
+        """
+        Availability and maximum orderable quantity of every item.
+
+        With `combined`, an item's maximum is what's left of each ingredient
+        once the other items take their requested quantities, so items sharing
+        an ingredient are checked together like a cart. Without it each item is
+        judged on its own, as on a menu. `max_quantity` is None for an item
+        that uses no stocked ingredient.
+        """
+        results = []
+        for item in self.items_data:
+            quantity = item['quantity']
+            entry = {
+                'meal': _to_id(item.get('meal')) or None,
+                'custom_meal': _to_id(item.get('custom_meal')) or None,
+                'quantity': quantity,
+            }
+            recipe = self._recipe(item)
+            if recipe is None:
+                entry.update(is_available=False, max_quantity=0, unavailable_ingredients=[])
+                results.append(entry)
+                continue
+
+            per_serving = defaultdict(float)
+            for ingredient, ingredient_quantity in recipe[1]:
+                per_serving[ingredient.id] += float(ingredient_quantity)
+
+            max_quantity = None
+            unavailable = []
+            for ingredient_id, needed in per_serving.items():
+                if needed <= 0:
+                    continue
+                ingredient = self.ingredients[ingredient_id]
+                taken_by_others = self.required[ingredient_id] - needed * quantity if combined else 0
+                # What's left, plus the same float tolerance _covers allows, so
+                # 0.3 / 0.1 still counts as 3 servings
+                left = ingredient.quantity * (1 + STOCK_TOLERANCE) - taken_by_others if ingredient.is_available else 0
+                servings = max(0, math.floor(left / needed))
+                max_quantity = servings if max_quantity is None else min(max_quantity, servings)
+
+                if servings < quantity:
+                    unavailable.append({
+                        'id': ingredient.id,
+                        'name': ingredient.name,
+                        'available': ingredient.is_available,
+                        'required': taken_by_others + needed * quantity,
+                        'in_stock': ingredient.quantity
+                    })
+
+            entry.update(
+                is_available=not unavailable,
+                max_quantity=max_quantity,
+                unavailable_ingredients=unavailable,
+            )
+            results.append(entry)
+        return results
+
+    def refresh(self):
+        """Reload the current stock of every planned ingredient in one query"""
+        current = Ingredient.objects.filter(id__in=self.required.keys()).values('id', 'quantity', 'is_available')
+        for row in current:
+            ingredient = self.ingredients[row['id']]
+            ingredient.quantity = row['quantity']
+            ingredient.is_available = row['is_available']
+
+    def reserve(self):
+        """
+        Deduct the planned quantities from inventory atomically.
+
+        Each ingredient is decremented with a conditional update
+        (`quantity = quantity - x WHERE quantity >= x`) so concurrent checkouts
+        can't overwrite each other. Rows are updated in ascending id order, so
+        two orders touching the same ingredients always lock them in the same
+        order and can't deadlock. If any ingredient falls short the whole
+        reservation is rolled back and InsufficientStock is raised.
+        """
+        # update() bypasses auto_now; keep updated_at moving so conditional GETs see the new stock
+        now = timezone.now()
+        # The plan already knows whose menus change, so write through the base
+        # manager: the menu queryset would read before the first UPDATE
+        ingredients = Ingredient._base_manager
+        with transaction.atomic():
+            for ingredient_id in sorted(self.required):
+                required_quantity = self.required[ingredient_id]
+                updated = ingredients.filter(
+                    id=ingredient_id,
+                    is_available=True,
+                    # The same test as _covers; a hair of negative stock left by
+                    # float noise is cleared to zero below
+                    quantity__gte=required_quantity / (1 + STOCK_TOLERANCE),
+                ).update(quantity=F('quantity') - required_quantity, updated_at=now)
+
+                if not updated:
+                    raise InsufficientStock(self.ingredients[ingredient_id], required_quantity)
+
+            # If quantity becomes zero or very close to zero, mark as unavailable
+            ingredients.filter(
+                id__in=self.required.keys(),
+                quantity__lt=0.001,
+            ).update(quantity=0, is_available=False, updated_at=now)
+
+            bump_menu_versions({self.ingredients[ingredient_id].restaurant_id for ingredient_id in self.required})
+            refresh_servings_for_ingredients(self.required.keys())
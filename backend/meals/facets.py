@@ -0,0 +1,145 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db.models import Case, CharField, Count, F, IntegerField, Q, Value, When
+from django.db.models.functions import Cast, Floor
+
+# Price bands as [min, max) in the menu currency; the last one is open ended
+PRICE_BANDS = [(0, 10), (10, 20), (20, 35), (35, 50), (50, None)]
+# Offered as "n stars & up"
+MIN_RATINGS = (4, 3, 2, 1)
+# Values listed per facet at most, most common first
+FACET_VALUE_LIMIT = 20
+
+# Ids are BigAutoFields, so anything outside a signed 64-bit integer can't match (and overflows the driver)
+MAX_ID = 2 ** 63 - 1
+
+# Orderable right now: switched on and not sold out (NULL servings means not limited by stock)
+AVAILABLE = Q(is_available=True) & (Q(servings_available__gt=0) | Q(servings_available__isnull=True))
+
+
+class FacetError(ValueError):
+    pass
+
+
+def _ids(value, name):
+    try:
+        ids = [int(part) for part in value.split(',') if part]
+    except ValueError:
+        raise FacetError(f'{name} must be a comma separated list of ids.')
+    if not ids or not all(0 < id_ <= MAX_ID for id_ in ids):
+        raise FacetError(f'{name} must be a comma separated list of ids.')
+    return ids
+
+
+def _number(value, name):
+    # Decimal, so prices compare exactly; NaN and infinities can't be filtered on
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        raise FacetError(f'{name} must be a number.')
+    if not number.is_finite():
+        raise FacetError(f'{name} must be a number.')
+    return number
+
+
+def _boolean(value, name):
+    if value.lower() not in ('true', 'false'):
+        raise FacetError(f'{name} must be true or false.')
+    return value.lower() == 'true'
+
+
+def parse_filters(params):
+    """
+    facet name -> Q of the facet filters in the query params, for the facets
+    that are filtered on. Raises FacetError for malformed values.
+    """
+    filters = {}
+    if params.get('category'):
+        filters['category'] = Q(category_id__in=_ids(params['category'], 'category'))
+    if params.get('restaurant'):
+        filters['restaurant'] = Q(restaurant_id__in=_ids(params['restaurant'], 'restaurant'))
+    price = Q()
+    if params.get('min_price'):
+        price &= Q(base_price__gte=_number(params['min_price'], 'min_price'))
+    if params.get('max_price'):
+        price &= Q(base_price__lt=_number(params['max_price'], 'max_price'))
+    if price:
+        filters['price'] = price
+    if params.get('available'):
+        filters['available'] = AVAILABLE if _boolean(params['available'], 'available') else ~AVAILABLE
+    if params.get('featured'):
+        filters['featured'] = Q(is_featured=_boolean(params['featured'], 'featured'))
+    if params.get('min_rating'):
+        filters['rating'] = Q(avg_rating__gte=_number(params['min_rating'], 'min_rating'))
+    return filters
+
+
+def _price_band():
+    whens = [When(base_price__lt=high, then=Value(index)) for index, (_, high) in enumerate(PRICE_BANDS) if high]
+    return Case(*whens, default=Value(len(PRICE_BANDS) - 1), output_field=IntegerField())
+
+
+def _facets():
+    """facet name -> (value expression, label expression)"""
+    no_label = Value('', output_field=CharField())
+    return {
+        'category': (F('category_id'), F('category__name')),
+        'restaurant': (F('restaurant_id'), F('restaurant__name')),
+        'price': (_price_band(), no_label),
+        'available': (Case(When(AVAILABLE, then=Value(1)), default=Value(0), output_field=IntegerField()), no_label),
+        'featured': (Cast('is_featured', IntegerField()), no_label),
+        # Whole stars, rounded down: a 3.7 average counts for "3 stars & up" but not 4.
+        # A bare integer cast would round on PostgreSQL, so floor first
+        'rating': (Cast(Floor('avg_rating'), IntegerField()), no_label),
+    }
+
+
+def facet_counts(queryset, filters):
+    """
+    Counts of every facet value, in one grouped query.
+
+    Each facet is counted under all the filters except its own, so picking
+    a category still shows how many meals the other categories have. The
+    facets are counted by one GROUP BY each, combined with UNION ALL.
+    """
+    queryset = queryset.order_by()
+    grouped = []
+    for name, (value, label) in _facets().items():
+        others = [condition for facet, condition in filters.items() if facet != name]
+        grouped.append(
+            queryset.filter(*others)
+            .annotate(facet=Value(name, output_field=CharField()), value=value, label=label)
+            .values('facet', 'value', 'label')
+            .annotate(count=Count('pk'))
+        )
+    rows = grouped[0].union(*grouped[1:], all=True)
+
+    counts = {name: {} for name in _facets()}
+    for row in rows:
+        counts[row['facet']][row['value']] = (row['label'], row['count'])
+    return {
+        'category': _listed(counts['category']),
+        'restaurant': _listed(counts['restaurant']),
+        'price': [
+            {'min': low, 'max': high, 'count': counts['price'].get(index, (None, 0))[1]}
+            for index, (low, high) in enumerate(PRICE_BANDS)
+        ],
+        'available': _booleans(counts['available']),
+        'featured': _booleans(counts['featured']),
+        'rating': [
+            {
+                'min_rating': stars,
+                'count': sum(count for rating, (_, count) in counts['rating'].items() if rating >= stars),
+            }
+            for stars in MIN_RATINGS
+        ],
+    }
+
+
+def _listed(values):
+    ordered = sorted(values.items(), key=lambda item: (-item[1][1], item[0] is None, item[0] or 0))
+    return [{'id': value, 'name': label, 'count': count} for value, (label, count) in ordered[:FACET_VALUE_LIMIT]]
+
+
+def _booleans(values):
+    return [{'value': flag, 'count': values.get(int(flag), (None, 0))[1]} for flag in (True, False)]
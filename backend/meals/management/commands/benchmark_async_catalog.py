@@ -0,0 +1,136 @@
+import asyncio
+import statistics
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time as clock_time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+
+from users.models import User
+from restaurants.models import Restaurant, Ingredient
+from meals.models import MealCategory, Meal, MealIngredient
+from reviews.models import RestaurantReview
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the catalog read endpoints on the WSGI path (sync DRF views, a pool of worker threads) '
+        'with the ASGI path (async views, one event loop), in process and without a network'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests sent per endpoint and path')
+        parser.add_argument('--concurrency', type=int, default=20, help='Requests in flight at once')
+        parser.add_argument('--workers', type=int, default=4, help='WSGI worker threads')
+        parser.add_argument('--meals', type=int, default=50, help='Meals seeded on the benchmark restaurant')
+        parser.add_argument(
+            '--client-delay', type=float, default=0.05,
+            help='Seconds a slow client takes to read each response (0 to measure the handlers alone)',
+        )
+
+    def handle(self, *args, **options):
+        fixtures = self.seed(options['meals'])
+        try:
+            endpoints = [
+                ('restaurant list', '/api/restaurants/restaurants/', '/api/restaurants/async/restaurants/'),
+                ('restaurant detail', f"/api/restaurants/restaurants/{fixtures['restaurant'].id}/",
+                 f"/api/restaurants/async/restaurants/{fixtures['restaurant'].id}/"),
+                ('categories', '/api/meals/categories/', '/api/meals/async/categories/'),
+                # By category: a ?restaurant= list would be served from the menu cache on the sync path
+                ('meal list', f"/api/meals/meals/?category={fixtures['category'].id}",
+                 f"/api/meals/async/meals/?category={fixtures['category'].id}"),
+                ('reviews by restaurant', f"/api/reviews/restaurant-reviews/?restaurant={fixtures['restaurant'].id}",
+                 f"/api/reviews/async/restaurant-reviews/?restaurant={fixtures['restaurant'].id}"),
+            ]
+
+            self.stdout.write(
+                f"{options['requests']} requests per run, {options['concurrency']} in flight, "
+                f"{options['workers']} WSGI workers, {options['client_delay']}s client delay"
+            )
+            self.stdout.write(f"{'endpoint':<24}{'path':<6}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+            for name, sync_url, async_url in endpoints:
+                for path, run in (('wsgi', self.run_wsgi), ('asgi', self.run_asgi)):
+                    url = sync_url if path == 'wsgi' else async_url
+                    elapsed, latencies = run(url, options)
+                    self.stdout.write(
+                        f"{name:<24}{path:<6}{len(latencies) / elapsed:>10.1f}"
+                        f"{statistics.median(latencies) * 1000:>10.1f}{self.p95(latencies) * 1000:>10.1f}"
+                    )
+        finally:
+            # Deleting the owner cascades to the restaurant, its ingredients, meals and reviews
+            fixtures['owner'].delete()
+            fixtures['category'].delete()
+
+    def p95(self, latencies):
+        return sorted(latencies)[int(len(latencies) * 0.95) - 1]
+
+    def run_wsgi(self, url, options):
+        # `concurrency` clients share `workers` sync workers; a request waits for a free one
+        workers = threading.Semaphore(options['workers'])
+
+        def fetch(_):
+            start = time.perf_counter()
+            with workers:
+                response = Client().get(url)
+                # A sync worker stays busy until the client has read the whole response
+                time.sleep(options['client_delay'])
+            latency = time.perf_counter() - start
+            connections.close_all()
+            if response.status_code != 200:
+                raise CommandError(f'GET {url} returned {response.status_code}')
+            return latency
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as clients:
+            latencies = list(clients.map(fetch, range(options['requests'])))
+        return time.perf_counter() - start, latencies
+
+    def run_asgi(self, url, options):
+        async def run():
+            client = AsyncClient()
+            slots = asyncio.Semaphore(options['concurrency'])
+
+            async def fetch():
+                async with slots:
+                    start = time.perf_counter()
+                    response = await client.get(url)
+                    # An async worker only parks the request while the client reads
+                    await asyncio.sleep(options['client_delay'])
+                    latency = time.perf_counter() - start
+                if response.status_code != 200:
+                    raise CommandError(f'GET {url} returned {response.status_code}')
+                return latency
+
+            start = time.perf_counter()
+            latencies = await asyncio.gather(*(fetch() for _ in range(options['requests'])))
+            return time.perf_counter() - start, latencies
+
+        return asyncio.run(run())
+
+    def seed(self, meal_count):
+        suffix = uuid.uuid4().hex[:8]
+        owner = User.objects.create_user(username=f'bench-{suffix}', user_type='restaurant')
+        restaurant = Restaurant.objects.create(
+            owner=owner, name=f'Bench {suffix}', description='Async catalog benchmark', address='-',
+            phone_number='0', opening_time=clock_time(0, 0), closing_time=clock_time(23, 59),
+            is_active=True, is_approved=True,
+        )
+        category = MealCategory.objects.create(name=f'Bench {suffix}')
+        ingredients = Ingredient.objects.bulk_create([
+            Ingredient(restaurant=restaurant, name=f'Ingredient {i}', quantity=100, unit='pieces', price_per_unit=1)
+            for i in range(5)
+        ])
+        meals = Meal.objects.bulk_create([
+            Meal(restaurant=restaurant, category=category, name=f'Meal {i}', description='-', base_price=10)
+            for i in range(meal_count)
+        ])
+        MealIngredient.objects.bulk_create([
+            MealIngredient(meal=meal, ingredient=ingredients[(meal_index + i) % len(ingredients)], quantity=1)
+            for meal_index, meal in enumerate(meals) for i in range(2)
+        ])
+        RestaurantReview.objects.create(user=owner, restaurant=restaurant, rating=5, comment='-')
+        return {'owner': owner, 'restaurant': restaurant, 'category': category}
@@ -0,0 +1,22 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from meals.recommendations import NEIGHBORS, build_neighbors
+
+
+class Command(BaseCommand):
+    help = 'Recompute the similar meals behind "meals you might like" from the order and review history'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--neighbors', type=int, default=NEIGHBORS, help='Similar meals stored per meal')
+        parser.add_argument('--block-size', type=int, default=1000, help='Meals compared against all others at once')
+
+    def handle(self, *args, **options):
+        try:
+            import numpy, scipy  # noqa: F401
+        except ImportError:
+            raise CommandError('NumPy and SciPy are required (pip install -r requirements.txt)')
+        start = time.perf_counter()
+        meals, rows = build_neighbors(options['neighbors'], options['block_size'])
+        self.stdout.write(f'meals: {meals}, neighbor rows: {rows}, in {time.perf_counter() - start:.1f}s')
+        self.stdout.write(self.style.SUCCESS('Recommendations rebuilt'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from meals.servings import rebuild_servings
+
+
+class Command(BaseCommand):
+    help = 'Recompute servings_available of every meal and public custom meal from current stock'
+
+    def handle(self, *args, **options):
+        meals, custom_meals = rebuild_servings()
+        self.stdout.write(f'meals: {meals} rebuilt')
+        self.stdout.write(f'custom meals: {custom_meals} rebuilt')
+        self.stdout.write(self.style.SUCCESS('Servings rebuilt'))
@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 00:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0002_initial'),
+        ('restaurants', '0003_restaurant_restaurant_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='custommeal',
+            index=models.Index(fields=['-created_at', '-id'], name='custommeal_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meal',
+            index=models.Index(fields=['-created_at', '-id'], name='meal_created_idx'),
+        ),
+    ]
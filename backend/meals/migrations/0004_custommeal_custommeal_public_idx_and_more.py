@@ -0,0 +1,24 @@
+# Generated by Django 5.2 on 2026-10-18 00:08
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0003_custommeal_custommeal_created_idx_and_more'),
+        ('restaurants', '0004_ingredient_ingredient_available_idx_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='custommeal',
+            index=models.Index(fields=['is_public'], name='custommeal_public_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='meal',
+            index=models.Index(fields=['restaurant', 'category'], name='meal_restaurant_category_idx'),
+        ),
+    ]
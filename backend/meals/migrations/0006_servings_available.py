@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 00:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0005_custommeal_avg_rating_custommeal_rating_sum_and_more'),
+        ('restaurants', '0006_ingredient_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='custommeal',
+            name='servings_available',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='meal',
+            name='servings_available',
+            field=models.PositiveIntegerField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='meal',
+            index=models.Index(fields=['restaurant', 'servings_available'], name='meal_servings_idx'),
+        ),
+    ]
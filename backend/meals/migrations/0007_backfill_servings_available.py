@@ -0,0 +1,42 @@
+from django.db import migrations
+from django.db.models import Case, F, FloatField, IntegerField, Min, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast, Floor
+
+
+def _servings(recipe_rows, parent_field):
+    per_row = Case(
+        When(ingredient__is_available=False, then=Value(0.0)),
+        default=Floor(F('ingredient__quantity') / F('quantity') + Value(1e-9)),
+        output_field=FloatField(),
+    )
+    rows = (
+        recipe_rows.filter(**{parent_field: OuterRef('pk')}, quantity__gt=0)
+        .order_by().values(parent_field)
+        .annotate(servings=Cast(Min(per_row), IntegerField()))
+        .values('servings')
+    )
+    return Subquery(rows, output_field=IntegerField())
+
+
+def backfill_servings_available(apps, schema_editor):
+    Meal = apps.get_model('meals', 'Meal')
+    MealIngredient = apps.get_model('meals', 'MealIngredient')
+    CustomMeal = apps.get_model('meals', 'CustomMeal')
+    CustomMealIngredient = apps.get_model('meals', 'CustomMealIngredient')
+
+    Meal.objects.update(servings_available=_servings(MealIngredient.objects.filter(is_optional=False), 'meal'))
+    CustomMeal.objects.filter(is_public=True).update(
+        servings_available=_servings(CustomMealIngredient.objects.all(), 'custom_meal')
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0006_servings_available'),
+        ('restaurants', '0006_ingredient_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_servings_available, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2 on 2026-10-18 00:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0007_backfill_servings_available'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MealNeighbor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('similarity', models.FloatField()),
+                ('meal', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='neighbors', to='meals.meal')),
+                ('neighbor', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='meals.meal')),
+            ],
+            options={
+                'unique_together': {('meal', 'neighbor')},
+            },
+        ),
+    ]
@@ -1,11 +1,55 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 from restaurants.models import Restaurant, Ingredient
+from restaurants.menu_cache import MenuQuerySet
+from uchef_project.querysets import UpdateSignalQuerySet
+
+class MealCategoryQuerySet(MenuQuerySet):
+    # A category is shared, so it belongs to the menu of every restaurant using it
+    menu_restaurant_lookup = 'meals__restaurant_id'
+    # Suggested by name, and part of its meals' search documents
+    SIGNALED_FIELDS = frozenset({'name'})
+
+class MealQuerySet(MenuQuerySet):
+    # What the search index and suggestions are built from
+    SIGNALED_FIELDS = frozenset({'name', 'description', 'category', 'category_id'})
+
+class CustomMealQuerySet(UpdateSignalQuerySet):
+    SIGNALED_FIELDS = frozenset({'name', 'description'})  # its search document
+
+class MealIngredientQuerySet(MenuQuerySet):
+    menu_restaurant_lookup = 'meal__restaurant_id'
+    
+    def _refresh_servings(self, meal_ids):
+        from .servings import refresh_meal_servings
+        refresh_meal_servings(Meal.objects.filter(pk__in=meal_ids))
+    
+    def update(self, **kwargs):
+        rows = list(self.values_list('pk', 'meal_id'))
+        updated = super().update(**kwargs)
+        # Before and after, in case rows moved to another meal
+        meal_ids = {meal_id for _, meal_id in rows}
+        meal_ids.update(MealIngredient.objects.filter(pk__in=[pk for pk, _ in rows]).values_list('meal_id', flat=True))
+        self._refresh_servings(meal_ids)
+        return updated
+    
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self._refresh_servings({obj.meal_id for obj in objs})
+        return objs
+    
+    def bulk_update(self, objs, *args, **kwargs):
+        updated = super().bulk_update(objs, *args, **kwargs)
+        self._refresh_servings({obj.meal_id for obj in objs})
+        return updated
 
 class MealCategory(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     
+    objects = MealCategoryQuerySet.as_manager()
+    
     def __str__(self):
         return self.name
     
@@ -21,9 +65,25 @@ class Meal(models.Model):
     image = models.ImageField(upload_to='meal_images/', blank=True, null=True)
     is_available = models.BooleanField(default=True)
     is_featured = models.BooleanField(default=False)
+    # Running rating aggregates, kept in sync by reviews.ratings
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    avg_rating = models.FloatField(default=0, editable=False)
+    # Servings the current stock allows (NULL: not limited by stock), kept in sync by meals.servings
+    servings_available = models.PositiveIntegerField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = MealQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='meal_created_idx'),
+            models.Index(fields=['restaurant', 'category'], name='meal_restaurant_category_idx'),
+            models.Index(fields=['-avg_rating', '-review_count'], name='meal_rating_idx'),
+            models.Index(fields=['restaurant', 'servings_available'], name='meal_servings_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.name} - {self.restaurant.name}"
 
@@ -34,8 +94,23 @@ class MealIngredient(models.Model):
     is_optional = models.BooleanField(default=False)
     additional_price = models.DecimalField(max_digits=10, decimal_places=2, default=0)
     
+    objects = MealIngredientQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.ingredient.name} for {self.meal.name}"
+    
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self.touch_meal()
+    
+    def delete(self, *args, **kwargs):
+        result = super().delete(*args, **kwargs)
+        self.touch_meal()
+        return result
+    
+    def touch_meal(self):
+        # The recipe is part of the meal's representation, so a changed row makes the meal newer
+        Meal.objects.filter(pk=self.meal_id).update(updated_at=timezone.now())
 
 class CustomMeal(models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='custom_meals')
@@ -43,8 +118,23 @@ class CustomMeal(models.Model):
     description = models.TextField(blank=True)
     base_meal = models.ForeignKey(Meal, on_delete=models.SET_NULL, null=True, blank=True, related_name='custom_versions')
     is_public = models.BooleanField(default=False)  # If True, other users can see and order this custom meal
+    # Running rating aggregates, kept in sync by reviews.ratings
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    avg_rating = models.FloatField(default=0, editable=False)
+    # Only public custom meals carry it; NULL otherwise (see meals.servings)
+    servings_available = models.PositiveIntegerField(null=True, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     
+    objects = CustomMealQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='custommeal_created_idx'),
+            models.Index(fields=['is_public'], name='custommeal_public_idx'),
+            models.Index(fields=['is_public', '-avg_rating', '-review_count'], name='custommeal_rating_idx'),
+        ]
+    
     def __str__(self):
         return f"{self.name} by {self.user.username}"
 
@@ -55,3 +145,15 @@ class CustomMealIngredient(models.Model):
     
     def __str__(self):
         return f"{self.ingredient.name} for {self.custom_meal.name}"
+
+class MealNeighbor(models.Model):
+    """A meal liked by the same customers as `meal`, rebuilt by the build_meal_recommendations command"""
+    meal = models.ForeignKey(Meal, on_delete=models.CASCADE, related_name='neighbors')
+    neighbor = models.ForeignKey(Meal, on_delete=models.CASCADE, related_name='+')
+    similarity = models.FloatField()
+    
+    class Meta:
+        unique_together = ('meal', 'neighbor')
+    
+    def __str__(self):
+        return f"{self.neighbor.name} for {self.meal.name} ({self.similarity:.3f})"
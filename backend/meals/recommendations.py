@@ -0,0 +1,181 @@
+import math
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Max, Sum
+from .facets import AVAILABLE
+from .models import Meal, MealNeighbor
+
+# Neighbors stored per meal
+NEIGHBORS = 20
+# The most recent meals of a customer that seed their recommendations
+HISTORY_LIMIT = 50
+# Similarities from pairs few customers share are scaled by shared / (shared + SHRINKAGE)
+SHRINKAGE = 5
+# Meals in the customer's favorite cuisine score this much higher
+CUISINE_BOOST = 0.25
+# Meals written per INSERT
+WRITE_BATCH = 2000
+
+
+def interaction_weight(quantity, rating):
+    """
+    How much a customer likes a meal, from how many they ordered and their
+    review (5 stars adds 1, 1 star takes 1 off). Never negative.
+    """
+    weight = math.log1p(quantity)
+    if rating is not None:
+        weight += (rating - 3) / 2
+    return max(weight, 0.0)
+
+
+def _ordered(order_items):
+    # Cancelled orders say nothing about taste; custom meals aren't recommended
+    return order_items.filter(meal__isnull=False).exclude(order__status='cancelled')
+
+
+def _interactions():
+    """{(user id, meal id): weight} over the whole order and review history"""
+    from orders.models import OrderItem
+    from reviews.models import MealReview
+
+    quantities = defaultdict(int)
+    rows = _ordered(OrderItem.objects.all()).values('order__user_id', 'meal_id').annotate(quantity=Sum('quantity'))
+    for row in rows.iterator(chunk_size=5000):
+        quantities[row['order__user_id'], row['meal_id']] = row['quantity']
+    ratings = {
+        (user_id, meal_id): rating
+        for user_id, meal_id, rating in MealReview.objects.values_list('user_id', 'meal_id', 'rating').iterator(chunk_size=5000)
+    }
+    weights = {}
+    for key in quantities.keys() | ratings.keys():
+        weight = interaction_weight(quantities.get(key, 0), ratings.get(key))
+        if weight:
+            weights[key] = weight
+    return weights
+
+
+def build_neighbors(neighbors=NEIGHBORS, block_size=1000):
+    """
+    Rebuild MealNeighbor from the order history: for every meal, the
+    `neighbors` meals with the highest cosine similarity between their
+    customer-weight columns. Needs NumPy and SciPy; returns (meals, rows).
+    """
+    import numpy as np
+    from scipy import sparse
+
+    weights = _interactions()
+    if not weights:
+        MealNeighbor.objects.all().delete()
+        return 0, 0
+    meal_ids = np.array(sorted({meal_id for _, meal_id in weights}), dtype=np.int64)
+    user_ids = np.array(sorted({user_id for user_id, _ in weights}), dtype=np.int64)
+    meal_index = {meal_id: i for i, meal_id in enumerate(meal_ids.tolist())}
+    user_index = {user_id: i for i, user_id in enumerate(user_ids.tolist())}
+
+    rows = np.fromiter((user_index[user_id] for user_id, _ in weights), dtype=np.int64, count=len(weights))
+    columns = np.fromiter((meal_index[meal_id] for _, meal_id in weights), dtype=np.int64, count=len(weights))
+    values = np.fromiter(weights.values(), dtype=np.float64, count=len(weights))
+    # Customers x meals
+    ratings = sparse.csr_matrix((values, (rows, columns)), shape=(len(user_ids), len(meal_ids)))
+    norms = np.sqrt(np.asarray(ratings.multiply(ratings).sum(axis=0))).ravel()
+    normalized = ratings @ sparse.diags(1 / np.where(norms > 0, norms, 1))
+    shared = ratings.copy()
+    shared.data[:] = 1
+
+    normalized_t, shared_t = normalized.T.tocsr(), shared.T.tocsr()
+    pairs = []
+    # A block of meals against all meals at a time, so the meals x meals matrix never exists whole
+    for start in range(0, len(meal_ids), block_size):
+        stop = min(start + block_size, len(meal_ids))
+        similarity = (normalized_t[start:stop] @ normalized).tocsr()
+        support = (shared_t[start:stop] @ shared).tocsr()
+        support.data = support.data / (support.data + SHRINKAGE)
+        similarity = similarity.multiply(support).tocsr()
+        for offset in range(stop - start):
+            begin, end = similarity.indptr[offset], similarity.indptr[offset + 1]
+            candidates, scores = similarity.indices[begin:end], similarity.data[begin:end]
+            keep = candidates != start + offset
+            candidates, scores = candidates[keep], scores[keep]
+            if len(scores) > neighbors:
+                best = np.argpartition(-scores, neighbors)[:neighbors]
+                candidates, scores = candidates[best], scores[best]
+            meal_id = int(meal_ids[start + offset])
+            pairs.extend(
+                MealNeighbor(meal_id=meal_id, neighbor_id=int(meal_ids[candidate]), similarity=float(score))
+                for candidate, score in zip(candidates, scores) if score > 0
+            )
+
+    with transaction.atomic():
+        MealNeighbor.objects.all().delete()
+        MealNeighbor.objects.bulk_create(pairs, batch_size=WRITE_BATCH)
+    return len(meal_ids), len(pairs)
+
+
+def _history(user):
+    """{meal id: weight} of the customer's most recent meals"""
+    from orders.models import OrderItem
+    from reviews.models import MealReview
+
+    ordered = (
+        _ordered(OrderItem.objects.filter(order__user=user))
+        .values('meal_id').annotate(quantity=Sum('quantity'), last_ordered=Max('order__created_at'))
+        .order_by('-last_ordered')[:HISTORY_LIMIT]
+    )
+    quantities = {row['meal_id']: row['quantity'] for row in ordered}
+    ratings = dict(
+        MealReview.objects.filter(user=user).order_by('-updated_at').values_list('meal_id', 'rating')[:HISTORY_LIMIT]
+    )
+    return {
+        meal_id: interaction_weight(quantities.get(meal_id, 0), ratings.get(meal_id))
+        for meal_id in quantities.keys() | ratings.keys()
+    }
+
+
+def recommend_meals(user, limit):
+    """
+    [(meal, score)] of orderable meals (switched on and not sold out) the
+    customer hasn't had yet, best first.
+
+    Scores add up the stored similarities of each meal to the customer's
+    recent meals, weighted by how much they liked those, so the work is
+    bounded by HISTORY_LIMIT x NEIGHBORS rows whatever the catalog size.
+    Meals in the favorite cuisine get a boost; customers without enough
+    history get top-rated meals (their cuisine first) as the rest of the list
+    (score None).
+    """
+    history = _history(user)
+    scores = defaultdict(float)
+    seeds = [meal_id for meal_id, weight in history.items() if weight]
+    rows = MealNeighbor.objects.filter(meal_id__in=seeds).values_list('meal_id', 'neighbor_id', 'similarity')
+    for meal_id, neighbor_id, similarity in rows:
+        if neighbor_id not in history:
+            scores[neighbor_id] += history[meal_id] * similarity
+
+    profile = getattr(user, 'profile', None)
+    cuisine = profile.favorite_cuisine.strip().lower() if profile else ''
+
+    def in_cuisine(meal):
+        return bool(cuisine) and meal.category is not None and cuisine in meal.category.name.lower()
+
+    candidates = Meal.objects.filter(AVAILABLE, id__in=list(scores)).select_related('category')
+    ranked = []
+    for meal in candidates:
+        score = scores[meal.id] * (1 + CUISINE_BOOST if in_cuisine(meal) else 1)
+        ranked.append((meal, score))
+    ranked.sort(key=lambda item: (-item[1], item[0].id))
+    ranked = ranked[:limit]
+
+    if len(ranked) < limit:
+        seen = set(history) | {meal.id for meal, _ in ranked}
+        popular = Meal.objects.filter(AVAILABLE).select_related('category').order_by(
+            '-avg_rating', '-review_count', 'id'
+        )
+        # Top-rated in the favorite cuisine first, then top-rated overall
+        fill = []
+        if cuisine:
+            fill = list(popular.filter(category__name__icontains=cuisine).exclude(id__in=seen)[:limit - len(ranked)])
+        seen.update(meal.id for meal in fill)
+        fill += popular.exclude(id__in=seen)[:limit - len(ranked) - len(fill)]
+        ranked.extend((meal, None) for meal in fill)
+    return ranked
@@ -1,7 +1,17 @@
 from rest_framework import serializers
+from django.db.models import Prefetch
 from .models import MealCategory, Meal, MealIngredient, CustomMeal, CustomMealIngredient
 from restaurants.serializers import IngredientSerializer
 
+
+def _meal_ingredients_prefetch(lookup):
+    # Recipe rows together with the ingredient and restaurant IngredientSerializer reads
+    return Prefetch(lookup, queryset=MealIngredient.objects.select_related('ingredient__restaurant'))
+
+
+def _custom_meal_ingredients_prefetch(lookup):
+    return Prefetch(lookup, queryset=CustomMealIngredient.objects.select_related('ingredient__restaurant'))
+
 class MealCategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = MealCategory
@@ -25,8 +35,16 @@ class MealSerializer(serializers.ModelSerializer):
         model = Meal
         fields = ['id', 'name', 'description', 'category', 'category_name', 
                   'restaurant', 'restaurant_name', 'base_price', 'image', 
-                  'is_available', 'is_featured', 'meal_ingredients']
-        read_only_fields = ['id']
+                  'is_available', 'is_featured', 'avg_rating', 'review_count', 'servings_available',
+                  'meal_ingredients']
+        read_only_fields = ['id', 'avg_rating', 'review_count', 'servings_available']
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load everything this serializer reads with a fixed number of queries"""
+        return queryset.select_related('category', 'restaurant').prefetch_related(
+            _meal_ingredients_prefetch('meal_ingredients')
+        )
 
 class CustomMealIngredientSerializer(serializers.ModelSerializer):
     ingredient_details = IngredientSerializer(source='ingredient', read_only=True)
@@ -47,8 +65,18 @@ class CustomMealSerializer(serializers.ModelSerializer):
         model = CustomMeal
         fields = ['id', 'name', 'description', 'user', 'user_username', 
                   'base_meal', 'base_meal_details', 'is_public', 
-                  'created_at', 'ingredients', 'avg_rating', 'review_count']
-        read_only_fields = ['id', 'created_at', 'avg_rating', 'review_count']
+                  'created_at', 'ingredients', 'avg_rating', 'review_count', 'servings_available']
+        read_only_fields = ['id', 'created_at', 'avg_rating', 'review_count', 'servings_available']
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load everything this serializer reads with a fixed number of queries"""
+        return queryset.select_related(
+            'user', 'base_meal__category', 'base_meal__restaurant'
+        ).prefetch_related(
+            _custom_meal_ingredients_prefetch('ingredients'),
+            _meal_ingredients_prefetch('base_meal__meal_ingredients'),
+        )
     
     def create(self, validated_data):
         ingredients_data = self.context.get('ingredients', [])
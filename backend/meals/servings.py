@@ -0,0 +1,77 @@
+from django.db.models import Case, F, FloatField, IntegerField, Min, OuterRef, Subquery, Value, When
+from django.db.models.functions import Cast, Floor
+from django.utils import timezone
+from .models import Meal, MealIngredient, CustomMeal, CustomMealIngredient
+
+# Recipe rows are the reverse index: ingredient -> the meals whose servings it bounds
+
+# Quantities are floats, so three servings of 0.1 need 0.30000000000000004.
+# Stock covers a need that exceeds it by at most this fraction of the stock.
+STOCK_TOLERANCE = 1e-9
+
+
+def _servings(recipe_rows, parent_field):
+    """
+    Subquery for min(floor(ingredient stock / quantity per serving)) over a
+    meal's required recipe rows. An unavailable ingredient allows 0 servings;
+    a meal without stocked ingredients gets NULL (not limited by stock).
+    """
+    per_row = Case(
+        When(ingredient__is_available=False, then=Value(0.0)),
+        # Tolerate float noise so 0.3 / 0.1 still counts as 3 servings
+        default=Floor(F('ingredient__quantity') * Value(1 + STOCK_TOLERANCE) / F('quantity')),
+        output_field=FloatField(),
+    )
+    rows = (
+        recipe_rows.filter(**{parent_field: OuterRef('pk')}, quantity__gt=0)
+        .order_by().values(parent_field)
+        .annotate(servings=Cast(Min(per_row), IntegerField()))
+        .values('servings')
+    )
+    return Subquery(rows, output_field=IntegerField())
+
+
+def _meal_servings():
+    # Optional ingredients are never deducted, so they don't limit servings
+    return _servings(MealIngredient.objects.filter(is_optional=False), 'meal')
+
+
+def _custom_meal_servings():
+    return _servings(CustomMealIngredient.objects.all(), 'custom_meal')
+
+
+def refresh_meal_servings(meals):
+    """Recompute servings_available of a Meal queryset in one UPDATE"""
+    # The base manager skips the menu queryset hooks: the stock or recipe change
+    # that triggered this already invalidated the restaurant's menu. update()
+    # bypasses auto_now; keep updated_at moving so conditional GETs see the new servings
+    return Meal._base_manager.filter(pk__in=meals.values('pk')).update(
+        servings_available=_meal_servings(), updated_at=timezone.now(),
+    )
+
+
+def refresh_custom_meal_servings(custom_meals):
+    """Recompute servings_available of a CustomMeal queryset; only public custom meals carry it"""
+    custom_meals = CustomMeal._base_manager.filter(pk__in=custom_meals.values('pk'))
+    updated = custom_meals.filter(is_public=True).update(servings_available=_custom_meal_servings())
+    custom_meals.filter(is_public=False, servings_available__isnull=False).update(servings_available=None)
+    return updated
+
+
+def refresh_servings_for_ingredients(ingredient_ids):
+    """Recompute only the meals and public custom meals that use one of `ingredient_ids`"""
+    ingredient_ids = list(ingredient_ids)
+    if not ingredient_ids:
+        return
+    refresh_meal_servings(Meal.objects.filter(
+        pk__in=MealIngredient.objects.filter(ingredient_id__in=ingredient_ids, is_optional=False).values('meal_id')
+    ))
+    refresh_custom_meal_servings(CustomMeal.objects.filter(
+        is_public=True,
+        pk__in=CustomMealIngredient.objects.filter(ingredient_id__in=ingredient_ids).values('custom_meal_id'),
+    ))
+
+
+def rebuild_servings():
+    """Recompute every meal and custom meal (backfills and repairs)"""
+    return refresh_meal_servings(Meal.objects.all()), refresh_custom_meal_servings(CustomMeal.objects.all())
@@ -0,0 +1,120 @@
+from django.db.models.signals import post_init, post_save, pre_delete, post_delete
+from django.utils import timezone
+from restaurants.models import Restaurant, Ingredient
+from restaurants.menu_cache import bump_menu_versions
+from restaurants.signals import stock_changed
+from .models import MealCategory, Meal, MealIngredient, CustomMeal, CustomMealIngredient
+from .servings import refresh_meal_servings, refresh_custom_meal_servings, refresh_servings_for_ingredients
+from uchef_project.querysets import rows_updated
+
+# Menu models -> the field linking a row to its restaurant (directly or through a meal)
+MENU_PARENTS = {
+    Meal: 'restaurant_id',
+    Ingredient: 'restaurant_id',
+    MealIngredient: 'meal_id',
+}
+
+
+def remember_parent(sender, instance, **kwargs):
+    # The parent the row was loaded with, so moving it also refreshes the menu it left
+    instance._menu_parent = instance.__dict__.get(MENU_PARENTS[sender])
+
+
+def _restaurant_ids(sender, instance):
+    if sender is Restaurant:
+        return {instance.pk}
+    if sender is MealCategory:
+        return Meal.objects.filter(category_id=instance.pk).menu_restaurant_ids()
+
+    parents = {getattr(instance, MENU_PARENTS[sender]), getattr(instance, '_menu_parent', None)}
+    if sender is MealIngredient:
+        return Meal.objects.filter(pk__in=parents - {None}).menu_restaurant_ids()
+    return parents
+
+
+def menu_changed(sender, instance, **kwargs):
+    bump_menu_versions(_restaurant_ids(sender, instance))
+    if sender in MENU_PARENTS:
+        remember_parent(sender, instance)
+
+
+def remember_stock(sender, instance, **kwargs):
+    instance._stock = (instance.__dict__.get('quantity'), instance.__dict__.get('is_available'))
+
+
+def ingredient_saved(sender, instance, created, **kwargs):
+    stock = (instance.quantity, instance.is_available)
+    # A new ingredient isn't in any recipe yet
+    if not created and stock != getattr(instance, '_stock', None):
+        refresh_servings_for_ingredients([instance.pk])
+    instance._stock = stock
+
+
+def ingredients_restocked(sender, ingredient_ids, **kwargs):
+    refresh_servings_for_ingredients(ingredient_ids)
+
+
+def meal_saved(sender, instance, **kwargs):
+    # save() writes back whatever servings_available the instance was loaded with
+    refresh_meal_servings(Meal.objects.filter(pk=instance.pk))
+
+
+def touch_category_meals(category_ids):
+    # Meals nest their category's name, so renaming or deleting a category makes
+    # them newer for conditional GETs. The base manager skips the menu bump the
+    # category write has already made.
+    Meal._base_manager.filter(category_id__in=category_ids).update(updated_at=timezone.now())
+
+
+def category_saved(sender, instance, created, update_fields=None, **kwargs):
+    # A new category has no meals yet
+    if not created and (update_fields is None or 'name' in update_fields):
+        touch_category_meals([instance.pk])
+
+
+def categories_renamed(sender, pks, **kwargs):
+    # MealCategoryQuerySet only signals name changes
+    touch_category_meals(pks)
+
+
+def category_deleted(sender, instance, **kwargs):
+    # Before the delete: afterwards the meals are already unlinked
+    touch_category_meals([instance.pk])
+
+
+def recipe_changed(sender, instance, **kwargs):
+    meal_ids = {instance.meal_id, getattr(instance, '_menu_parent', None)} - {None}
+    refresh_meal_servings(Meal.objects.filter(pk__in=meal_ids))
+
+
+def custom_meal_saved(sender, instance, **kwargs):
+    refresh_custom_meal_servings(CustomMeal.objects.filter(pk=instance.pk))
+
+
+def custom_recipe_changed(sender, instance, **kwargs):
+    refresh_custom_meal_servings(CustomMeal.objects.filter(pk=instance.custom_meal_id))
+
+
+for menu_model in MENU_PARENTS:
+    post_init.connect(remember_parent, sender=menu_model)
+
+# servings_available. Connected ahead of menu_changed, which moves `_menu_parent` on.
+post_init.connect(remember_stock, sender=Ingredient)
+post_save.connect(ingredient_saved, sender=Ingredient)
+stock_changed.connect(ingredients_restocked, sender=Ingredient)
+post_save.connect(meal_saved, sender=Meal)
+post_save.connect(recipe_changed, sender=MealIngredient)
+post_delete.connect(recipe_changed, sender=MealIngredient)
+post_save.connect(custom_meal_saved, sender=CustomMeal)
+post_save.connect(custom_recipe_changed, sender=CustomMealIngredient)
+post_delete.connect(custom_recipe_changed, sender=CustomMealIngredient)
+post_save.connect(category_saved, sender=MealCategory)
+rows_updated.connect(categories_renamed, sender=MealCategory)
+pre_delete.connect(category_deleted, sender=MealCategory)
+
+# Restaurant names are part of the menu too. Deletes are caught before the rows
+# go (a deleted category has already been unlinked from its meals afterwards);
+# the bump itself waits for the commit either way.
+for menu_model in [Restaurant, MealCategory, *MENU_PARENTS]:
+    post_save.connect(menu_changed, sender=menu_model)
+    pre_delete.connect(menu_changed, sender=menu_model)
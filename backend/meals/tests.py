@@ -1,3 +1,460 @@
-from django.test import TestCase
+import json
+import threading
+import time as clock
+from datetime import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIClient
+
+from users.models import User
+from orders.models import Order, OrderItem
+from restaurants.models import Restaurant, Ingredient
+from reviews.models import MealReview
+from .facets import facet_counts
+from .availability import AvailabilityPlan, InsufficientStock
+from .models import Meal, MealCategory, MealIngredient, MealNeighbor
+from .recommendations import recommend_meals
+from .weather import WeatherError, WeatherService
+
+MEALS_URL = '/api/meals/meals/'
+TOP_MEALS_URL = '/api/meals/meals/top-rated/'
+
+
+def create_menu(stock):
+    """A restaurant with one meal that uses one unit of an ingredient holding `stock` units"""
+    owner = User.objects.create_user(username='owner', password='x', user_type='restaurant')
+    restaurant = Restaurant.objects.create(
+        owner=owner, name='Test', description='-', address='-', phone_number='0',
+        opening_time=time(0, 0), closing_time=time(23, 59), is_active=True, is_approved=True,
+    )
+    ingredient = Ingredient.objects.create(
+        restaurant=restaurant, name='Dough', quantity=stock, unit='pieces', price_per_unit=1,
+    )
+    meal = Meal.objects.create(restaurant=restaurant, name='Pizza', description='-', base_price=10)
+    MealIngredient.objects.create(meal=meal, ingredient=ingredient, quantity=1)
+    return restaurant, ingredient, meal
+
+
+class MealListConditionalTests(TestCase):
+    """The menu's ETag moves when denormalized columns or nested rows change"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant, cls.ingredient, cls.meal = create_menu(stock=5)
+        cls.customer = User.objects.create_user(username='customer', password='x', user_type='customer')
+        cls.category = MealCategory.objects.create(name='Italian')
+        cls.meal.category = cls.category
+        cls.meal.save()
+
+    def setUp(self):
+        cache.clear()
+
+    def revalidate(self, etag):
+        return APIClient().get(MEALS_URL, {'restaurant': self.restaurant.id}, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_menu_is_not_modified(self):
+        etag = self.revalidate('"stale"')['ETag']
+        self.assertEqual(self.revalidate(etag).status_code, 304)
+
+    def test_rating_change_invalidates_the_etag(self):
+        etag = self.revalidate('"stale"')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            MealReview.objects.create(user=self.customer, meal=self.meal, rating=5, comment='-')
+
+        response = self.revalidate(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['avg_rating'], 5)
+
+    def test_servings_change_invalidates_the_etag(self):
+        etag = self.revalidate('"stale"')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Ingredient.objects.filter(pk=self.ingredient.pk).update(quantity=2)
+
+        response = self.revalidate(etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['results'][0]['servings_available'], 2)
+
+    def restaurant_menu(self, etag):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        return client.get(f'/api/restaurants/restaurants/{self.restaurant.id}/meals/', HTTP_IF_NONE_MATCH=etag)
+
+    def assert_category_change_invalidates(self, change, category_name):
+        etags = self.revalidate('"stale"')['ETag'], self.restaurant_menu('"stale"')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            change()
+
+        for response in (self.revalidate(etags[0]), self.restaurant_menu(etags[1])):
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['results'][0].get('category_name'), category_name)
+
+    def test_category_rename_invalidates_the_etag(self):
+        def rename():
+            self.category.name = 'Neapolitan'
+            self.category.save()
+        self.assert_category_change_invalidates(rename, 'Neapolitan')
+
+    def test_bulk_category_rename_invalidates_the_etag(self):
+        self.assert_category_change_invalidates(
+            lambda: MealCategory.objects.filter(pk=self.category.pk).update(name='Roman'), 'Roman'
+        )
+
+    def test_category_delete_invalidates_the_etag(self):
+        self.assert_category_change_invalidates(self.category.delete, None)
+
+
+
+class StockToleranceTests(TestCase):
+    """Three servings of 0.1 fit in 0.3 of stock, though 0.1 * 3 > 0.3 in floats"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant, cls.ingredient, cls.meal = create_menu(stock=0.3)
+        MealIngredient.objects.filter(meal=cls.meal).update(quantity=0.1)
+
+    def plan(self, *quantities):
+        return AvailabilityPlan([{'meal': self.meal.id, 'quantity': quantity} for quantity in quantities])
+
+    def test_stock_covers_a_need_equal_to_it(self):
+        for quantities in ((3,), (2, 1), (1, 1, 1)):
+            plan = self.plan(*quantities)
+            self.assertEqual(plan.unavailable_ingredients(), [], quantities)
+            self.assertTrue(all(item['is_available'] for item in plan.item_availability()), quantities)
+
+        self.assertEqual(self.plan(3).item_availability(combined=False)[0]['max_quantity'], 3)
+        self.assertEqual(self.plan(2, 1).item_availability()[1]['max_quantity'], 1)
+
+    def test_menu_servings_agree(self):
+        self.meal.refresh_from_db()
+        self.assertEqual(self.meal.servings_available, 3)
+
+    def test_reserving_the_whole_stock_empties_it(self):
+        self.plan(2, 1).reserve()
+        self.ingredient.refresh_from_db()
+        self.assertEqual((self.ingredient.quantity, self.ingredient.is_available), (0, False))
+
+    def test_a_real_shortage_is_still_caught(self):
+        plan = self.plan(3, 1)
+        self.assertEqual([row['id'] for row in plan.unavailable_ingredients()], [self.ingredient.id])
+        self.assertEqual([item['max_quantity'] for item in plan.item_availability()], [2, 0])
+        with self.assertRaises(InsufficientStock):
+            plan.reserve()
+
+
+class AsyncMealListTests(TestCase):
+    """The ASGI read path pages exactly like the sync list"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant, _, _ = create_menu(stock=5)
+        for i, price in enumerate([12, 8, 12, 15, 8, 12]):
+            Meal.objects.create(restaurant=cls.restaurant, name=f'Meal {i}', description='-', base_price=price)
+
+    def page(self, response):
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        return [meal['id'] for meal in body['results']], body['previous'] is not None, body['next']
+
+    def sync_pages(self, url):
+        pages = []
+        while url:
+            *page, url = self.page(self.client.get(url))
+            pages.append(page)
+        return pages
+
+    async def test_pages_match_the_sync_list(self):
+        for query in ('page_size=2', 'page_size=3&ordering=base_price', 'page_size=2&ordering=-base_price'):
+            expected = await sync_to_async(self.sync_pages)(f'{MEALS_URL}?{query}')
+            self.assertEqual(len(expected), 3 if query.startswith('page_size=3') else 4, query)
+
+            pages, url = [], f'/api/meals/async/meals/?{query}'
+            while url:
+                *page, url = self.page(await self.async_client.get(url))
+                self.assertTrue(url is None or '/api/meals/async/meals/' in url, url)
+                pages.append(page)
+            self.assertEqual(pages, expected, query)
+
+class MealSearchIndexTests(TestCase):
+    """Bulk updates keep the full-text index in step"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant, _, cls.meal = create_menu(stock=5)
+        cls.category = MealCategory.objects.create(name='Italian')
+        cls.meal.category = cls.category
+        cls.meal.save()
+
+    def search(self, query):
+        response = APIClient().get(MEALS_URL, {'search': query})
+        self.assertEqual(response.status_code, 200)
+        return [meal['id'] for meal in response.data['results']]
+
+    def test_bulk_rename_is_searchable(self):
+        Meal.objects.filter(pk=self.meal.pk).update(name='Calzone')
+        self.assertEqual(self.search('calzone'), [self.meal.id])
+        self.assertEqual(self.search('pizza'), [])
+
+    def test_bulk_category_rename_reaches_its_meals(self):
+        MealCategory.objects.filter(pk=self.category.pk).update(name='Neapolitan')
+        self.assertEqual(self.search('neapolitan'), [self.meal.id])
+
+    def test_bulk_update_of_other_columns_reads_no_ids(self):
+        # One UPDATE, plus the menu's restaurant ids; no id read for the index
+        with self.assertNumQueries(2):
+            Meal.objects.filter(pk=self.meal.pk).update(is_featured=True)
+
+
+class RatingFacetTests(TestCase):
+
+    def test_ratings_round_down_to_whole_stars(self):
+        restaurant, _, meal = create_menu(stock=5)
+        other = Meal.objects.create(restaurant=restaurant, name='Pasta', description='-', base_price=10)
+        Meal.objects.filter(pk=meal.pk).update(avg_rating=3.7)
+        Meal.objects.filter(pk=other.pk).update(avg_rating=4.5)
+
+        counts = {row['min_rating']: row['count'] for row in facet_counts(Meal.objects.all(), {})['rating']}
+        self.assertEqual(counts, {4: 1, 3: 2, 2: 2, 1: 2})
+
+
+class BrowseFilterTests(TestCase):
+    """Malformed facet filters are a 400, never a 500"""
+    BROWSE_URL = '/api/meals/meals/browse/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant, _, cls.meal = create_menu(stock=5)
+
+    def browse(self, **params):
+        return APIClient().get(self.BROWSE_URL, params)
+
+    def test_prices_filter_exactly(self):
+        self.assertEqual(len(self.browse(min_price='10').data['results']), 1)
+        self.assertEqual(len(self.browse(max_price='10').data['results']), 0)
+        # Far out of the column's range, but still a number
+        self.assertEqual(len(self.browse(min_price='1e400').data['results']), 0)
+
+    def test_non_finite_numbers_are_rejected(self):
+        for name in ('min_price', 'max_price', 'min_rating'):
+            for value in ('nan', 'inf', '-inf', 'Infinity', 'abc'):
+                response = self.browse(**{name: value})
+                self.assertEqual(response.status_code, 400, (name, value))
+                self.assertEqual(response.data['detail'], f'{name} must be a number.')
+
+    def test_ids_out_of_range_are_rejected(self):
+        for name in ('restaurant', 'category'):
+            for value in ('99999999999999999999', str(2 ** 63), '0', '-1', '1,x'):
+                self.assertEqual(self.browse(**{name: value}).status_code, 400, (name, value))
+        self.assertEqual(self.browse(restaurant=str(2 ** 63 - 1)).status_code, 200)
+
+
+
+class AvailabilityIdTests(TestCase):
+    """Ids the BigAutoField columns can't hold are a 400, never an OverflowError"""
+    AVAILABILITY_URL = '/api/meals/meals/availability/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant, _, cls.meal = create_menu(stock=5)
+
+    def availability(self, data):
+        return APIClient().post(self.AVAILABILITY_URL, data, format='json')
+
+    def test_menu_of_a_restaurant(self):
+        for restaurant in (self.restaurant.id, str(self.restaurant.id)):
+            response = self.availability({'restaurant': restaurant})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual([(item['meal'], item['max_quantity']) for item in response.data['items']], [(self.meal.id, 5)])
+        self.assertEqual(self.availability({'restaurant': 2 ** 63 - 1}).data, {'items': []})
+
+    def test_restaurant_id_out_of_range(self):
+        for restaurant in (2 ** 63, '99999999999999999999', '9' * 5000, 0, -1, '²', 'abc', True):
+            response = self.availability({'restaurant': restaurant})
+            self.assertEqual(response.status_code, 400, restaurant)
+            self.assertEqual(response.data['detail'], 'restaurant must be a numeric id.')
+
+    def test_item_ids_out_of_range(self):
+        for key in ('meal', 'custom_meal'):
+            self.assertEqual(self.availability({'items': [{key: 2 ** 63}]}).status_code, 400, key)
+            response = self.availability({'items': [{key: 2 ** 63 - 1}]})
+            self.assertEqual(response.status_code, 200, key)
+            self.assertFalse(response.data['items'][0]['is_available'])
+
+    def test_top_rated_restaurant_out_of_range(self):
+        for restaurant in (str(2 ** 63), '9' * 5000, '0', '²'):
+            response = APIClient().get(TOP_MEALS_URL, {'restaurant': restaurant})
+            self.assertEqual(response.status_code, 400, restaurant)
+        self.assertEqual(APIClient().get(TOP_MEALS_URL, {'restaurant': str(2 ** 63 - 1)}).data, [])
+
+class RecommendationTests(TestCase):
+    """Sold out meals are never recommended, as scored neighbors or as popular fill"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant, _, cls.ordered = create_menu(stock=5)
+        cls.customer = User.objects.create_user(username='customer', password='x', user_type='customer')
+        order = Order.objects.create(user=cls.customer, restaurant=cls.restaurant, total_price=10, delivery_address='-')
+        OrderItem.objects.create(order=order, meal=cls.ordered, quantity=1, price=10)
+
+        def meal(name, servings):
+            created = Meal.objects.create(restaurant=cls.restaurant, name=name, description='-', base_price=10)
+            # No recipe, so servings are set by hand (None means not limited by stock)
+            Meal._base_manager.filter(pk=created.pk).update(servings_available=servings, avg_rating=5)
+            return created
+
+        cls.neighbor, cls.sold_out_neighbor = meal('Neighbor', 3), meal('Sold out neighbor', 0)
+        cls.unlimited, cls.sold_out = meal('Unlimited', None), meal('Sold out', 0)
+        for neighbor in (cls.neighbor, cls.sold_out_neighbor):
+            MealNeighbor.objects.create(meal=cls.ordered, neighbor=neighbor, similarity=0.9)
+
+    def test_sold_out_meals_are_left_out(self):
+        recommended = [meal for meal, _ in recommend_meals(self.customer, limit=10)]
+        self.assertEqual(recommended, [self.neighbor, self.unlimited])
+
+
+CAIRO = {'main': {'temp': 31.5, 'humidity': 40}, 'weather': [{'description': 'clear sky', 'icon': '01d'}]}
+
+
+class StubWeatherHandler(BaseHTTPRequestHandler):
+    """Answers with the server's current (status, body), after its delay"""
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            status, body = server.reply
+        clock.sleep(server.delay)
+        payload = body.encode() if isinstance(body, str) else json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+class WeatherServiceTests(SimpleTestCase):
+    """WeatherService against a local stub of the upstream API"""
+    COOLDOWN = 0.2
+
+    def setUp(self):
+        cache.clear()
+        self.upstream = ThreadingHTTPServer(('127.0.0.1', 0), StubWeatherHandler)
+        self.upstream.lock = threading.Lock()
+        self.upstream.requests, self.upstream.reply, self.upstream.delay = 0, (200, CAIRO), 0
+        threading.Thread(target=self.upstream.serve_forever, args=(0.05,), daemon=True).start()
+        self.addCleanup(self.upstream.server_close)
+        self.addCleanup(self.upstream.shutdown)
+
+        with override_settings(
+            WEATHER_API_URL=f'http://127.0.0.1:{self.upstream.server_port}/weather',
+            WEATHER_BREAKER_THRESHOLD=2, WEATHER_BREAKER_COOLDOWN=self.COOLDOWN,
+        ):
+            self.service = WeatherService()
+        self.addCleanup(self.service.session.close)
+
+    def reply(self, status, body):
+        self.upstream.reply = (status, body)
+
+    def expire(self, city):
+        """Age the cached entry past the TTL, leaving it as stale data"""
+        key = self.service._key(city)
+        entry = cache.get(key)
+        entry['fetched_at'] -= self.service.ttl
+        cache.set(key, entry)
+
+    def assert_unavailable(self, city='Cairo'):
+        with self.assertRaises(WeatherError) as raised:
+            self.service.get(city)
+        self.assertEqual(raised.exception.status_code, 503)
+
+    def test_answers_are_cached_for_the_ttl(self):
+        weather = self.service.get('Cairo')
+        self.assertEqual(weather, {'temperature': 31.5, 'description': 'clear sky', 'humidity': 40, 'icon': '01d', 'stale': False})
+        self.assertEqual(self.service.get(' cairo '), weather)
+        self.assertEqual(self.upstream.requests, 1)
+
+        self.expire('Cairo')
+        self.service.get('Cairo')
+        self.assertEqual(self.upstream.requests, 2)
+
+    def test_concurrent_misses_share_one_upstream_call(self):
+        self.upstream.delay = 0.2
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.service.get('Cairo'))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result == results[0] and not result['stale'] for result in results))
+        self.assertEqual(self.upstream.requests, 1)
+
+    def test_stale_data_stands_in_while_the_upstream_fails(self):
+        self.service.get('Cairo')
+        self.expire('Cairo')
+        self.reply(500, {'message': 'down'})
+
+        weather = self.service.get('Cairo')
+        self.assertEqual((weather['temperature'], weather['stale']), (31.5, True))
+
+    def test_unknown_city_is_not_an_outage(self):
+        self.reply(404, {'message': 'city not found'})
+        with self.assertRaises(WeatherError) as raised:
+            self.service.get('Atlantis')
+        self.assertEqual((raised.exception.status_code, str(raised.exception)), (404, 'Error fetching weather data: city not found'))
+        # Answers about unknown cities never open the circuit
+        for _ in range(3):
+            with self.assertRaises(WeatherError):
+                self.service.get('Atlantis')
+        self.assertEqual(self.upstream.requests, 4)
+
+    def test_circuit_opens_and_lets_one_trial_through_after_the_cooldown(self):
+        self.reply(500, {'message': 'down'})
+        self.assert_unavailable()
+        self.assert_unavailable()
+        # Open: refused without calling the upstream
+        self.assert_unavailable()
+        self.assertEqual(self.upstream.requests, 2)
+
+        # Half open: the trial call fails and the circuit opens again
+        clock.sleep(self.COOLDOWN)
+        self.assert_unavailable()
+        self.assert_unavailable()
+        self.assertEqual(self.upstream.requests, 3)
+
+        # Half open: the trial call succeeds and the circuit closes
+        clock.sleep(self.COOLDOWN)
+        self.reply(200, CAIRO)
+        self.assertFalse(self.service.get('Cairo')['stale'])
+        self.service.get('Giza')
+        self.assertEqual(self.upstream.requests, 5)
+
+    def test_malformed_answers_are_outages(self):
+        for body in ({}, [], 'null', {'main': {}}, {'main': {'temp': 1, 'humidity': 2}, 'weather': []}):
+            cache.clear()
+            self.service.breaker.record_success()
+            self.reply(200, body)
+            with self.assertLogs('meals.weather', 'WARNING'):
+                self.assert_unavailable()
+
+        # They count against the breaker, and stale data stands in for them
+        self.reply(200, CAIRO)
+        self.service.get('Cairo')
+        self.expire('Cairo')
+        self.reply(200, {})
+        with self.assertLogs('meals.weather', 'WARNING'):
+            self.assertTrue(self.service.get('Cairo')['stale'])
+            self.assert_unavailable('Giza')
+        requests_made = self.upstream.requests
+        self.assert_unavailable('Alexandria')
+        self.assertEqual(self.upstream.requests, requests_made)
+
+    def test_non_dict_error_bodies_are_handled(self):
+        self.reply(502, '["bad gateway"]')
+        self.assert_unavailable()
@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import MealCategoryViewSet, MealViewSet, CustomMealViewSet, get_weather
+from .views import MealCategoryViewSet, MealViewSet, CustomMealViewSet, get_weather, AsyncMealCategoryView, AsyncMealView
 
 router = DefaultRouter()
 router.register(r'categories', MealCategoryViewSet)
@@ -10,4 +10,9 @@ router.register(r'custom-meals', CustomMealViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path('weather/', get_weather, name='get_weather'),
+    # ASGI-native read path
+    path('async/categories/', AsyncMealCategoryView.as_view(), name='async-category-list'),
+    path('async/categories/<int:pk>/', AsyncMealCategoryView.as_view(), name='async-category-detail'),
+    path('async/meals/', AsyncMealView.as_view(), name='async-meal-list'),
+    path('async/meals/<int:pk>/', AsyncMealView.as_view(), name='async-meal-detail'),
 ]
@@ -4,17 +4,54 @@ from rest_framework.decorators import action, api_view
 from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
 from django.http import JsonResponse
+from django.db.models import Q
 from .models import MealCategory, Meal, MealIngredient, CustomMeal, CustomMealIngredient
 from .serializers import MealCategorySerializer, MealSerializer, MealIngredientSerializer, CustomMealSerializer, CustomMealIngredientSerializer
+from .availability import AvailabilityPlan
+from .facets import MAX_ID, FacetError, facet_counts, parse_filters
+from .recommendations import recommend_meals
 from restaurants.models import Restaurant, Ingredient
 from restaurants.views import IsOwnerOrReadOnly, IsRestaurantOwnerOrReadOnly
-import requests
-from decouple import config
+from uchef_project.pagination import MenuCursorPagination, IdCursorPagination
+from uchef_project.conditional import collection_state, collection_validators, conditional_response
+from restaurants.menu_cache import cached_menu_response
+from reviews.leaderboards import (
+    get_leaderboard, LEADERBOARD_SIZE, TOP_RATED_LIMIT, TOP_MEALS, TOP_CUSTOM_MEALS, PUBLIC_SCOPE,
+)
+from .weather import get_weather_service, WeatherError
+from uchef_project.async_views import AsyncReadView
+from search.filters import FullTextSearchFilter
+
+# Entries accepted by one batch availability request
+MAX_AVAILABILITY_ITEMS = 200
+# Meals one recommendations request returns by default and at most
+RECOMMENDED_LIMIT = 10
+MAX_RECOMMENDED_LIMIT = 50
+
+
+def _positive_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
+def _id(value):
+    """An id from JSON: a positive int the BigAutoField columns can hold"""
+    return _positive_int(value) and value <= MAX_ID
+
+
+def _id_param(value):
+    """A numeric id from a request parameter, or None if it isn't one the id columns can hold"""
+    value = str(value)
+    # The length check keeps int() away from huge strings (and the 64-bit range needs at most 19 digits)
+    if not value.isdecimal() or len(value) > 19:
+        return None
+    value = int(value)
+    return value if 0 < value <= MAX_ID else None
 
 class MealCategoryViewSet(viewsets.ModelViewSet):
     queryset = MealCategory.objects.all()
     serializer_class = MealCategorySerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = IdCursorPagination
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve']:
@@ -25,9 +62,32 @@ class MealViewSet(viewsets.ModelViewSet):
     queryset = Meal.objects.all()
     serializer_class = MealSerializer
     permission_classes = [IsAuthenticated, IsRestaurantOwnerOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    pagination_class = MenuCursorPagination
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
+    search_kind = 'meal'
     search_fields = ['name', 'description', 'category__name']
-    ordering_fields = ['name', 'base_price', 'created_at']
+    ordering_fields = ['name', 'base_price', 'created_at', 'avg_rating', 'servings_available']
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        restaurant_ids = queryset.order_by().values('restaurant_id')
+        # The menu nests restaurant names and ingredient stock, so those rows version it too
+        validators = collection_validators(
+            collection_state(queryset),
+            collection_state(Restaurant.objects.filter(id__in=restaurant_ids)),
+            collection_state(Ingredient.objects.filter(restaurant_id__in=restaurant_ids)),
+        )
+        
+        def build_response():
+            return super(MealViewSet, self).list(request, *args, **kwargs)
+        
+        restaurant_id = request.query_params.get('restaurant', '')
+        if restaurant_id.isdigit():
+            # A single restaurant's menu: serve the cached snapshot
+            return conditional_response(
+                request, validators, lambda: cached_menu_response(request, int(restaurant_id), build_response)
+            )
+        return conditional_response(request, validators, build_response)
     
     @action(detail=True, methods=['get'], permission_classes=[AllowAny])
     def check_availability(self, request, pk=None):
@@ -63,8 +123,122 @@ class MealViewSet(viewsets.ModelViewSet):
         })
     
     
+    @action(detail=False, methods=['post'], permission_classes=[AllowAny])
+    def availability(self, request):
+        """
+        Check many meals and custom meals at once.
+
+        Send either {"restaurant": id} for every meal on a menu, judged one by
+        one, or {"items": [{"meal" or "custom_meal": id, "quantity": n}, ...]}
+        judged together like a cart (pass "combined": false to judge them one by one).
+        """
+        restaurant_id = request.data.get('restaurant')
+        if restaurant_id is not None:
+            restaurant_id = _id_param(restaurant_id)
+            if restaurant_id is None:
+                return Response({'detail': 'restaurant must be a numeric id.'},
+                               status=status.HTTP_400_BAD_REQUEST)
+            meal_ids = Meal.objects.filter(restaurant_id=restaurant_id).values_list('id', flat=True)
+            items = [{'meal': meal_id, 'quantity': 1} for meal_id in meal_ids]
+            combined = False
+        else:
+            items = request.data.get('items')
+            if not isinstance(items, list) or not items:
+                return Response({'detail': 'Provide a restaurant id or a non-empty list of items.'},
+                               status=status.HTTP_400_BAD_REQUEST)
+            if len(items) > MAX_AVAILABILITY_ITEMS:
+                return Response({'detail': f'At most {MAX_AVAILABILITY_ITEMS} items can be checked at once.'},
+                               status=status.HTTP_400_BAD_REQUEST)
+            for item in items:
+                if (not isinstance(item, dict)
+                        or bool(item.get('meal')) == bool(item.get('custom_meal'))
+                        or not _id(item.get('meal') or item.get('custom_meal'))
+                        or not _positive_int(item.get('quantity', 1))):
+                    return Response({'detail': 'Each item needs one meal or custom_meal id and a positive quantity.'},
+                                   status=status.HTTP_400_BAD_REQUEST)
+            combined = request.data.get('combined', True) is not False
+        
+        # Custom meals are checked only if the caller could see them (same rules as CustomMealViewSet)
+        custom_meals = CustomMeal.objects.all()
+        if not (request.user.is_authenticated and request.user.user_type in ['admin', 'restaurant']):
+            visible = Q(is_public=True)
+            if request.user.is_authenticated:
+                visible |= Q(user=request.user)
+            custom_meals = custom_meals.filter(visible)
+        plan = AvailabilityPlan(items, custom_meals=custom_meals)
+        return Response({'items': plan.item_availability(combined=combined)})
+    
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny])
+    def browse(self, request):
+        """
+        A page of meals plus the facet counts to narrow them down.
+        
+        Filters: `category` and `restaurant` (comma separated ids),
+        `min_price`/`max_price`, `available`, `featured` (true/false),
+        `min_rating`, and `search`. Each facet is counted as if its own
+        filter were not set.
+        """
+        try:
+            facet_filters = parse_filters(request.query_params)
+        except FacetError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Search and ordering apply to the facets as well as the page
+        queryset = self.filter_queryset(Meal.objects.all())
+        facets = facet_counts(queryset, facet_filters)
+        
+        page = self.paginate_queryset(MealSerializer.setup_eager_loading(queryset.filter(*facet_filters.values())))
+        serializer = self.get_serializer(page, many=True)
+        response = self.get_paginated_response(serializer.data)
+        response.data['facets'] = facets
+        return response
+    
+    @action(detail=False, methods=['get'], permission_classes=[IsAuthenticated])
+    def recommended(self, request):
+        """
+        Meals the customer might like, from what they and similar customers ordered.
+        
+        `score` is None for the top-rated meals that fill the list when there
+        isn't enough order history yet.
+        """
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', RECOMMENDED_LIMIT)), MAX_RECOMMENDED_LIMIT))
+        except ValueError:
+            limit = RECOMMENDED_LIMIT
+        
+        ranked = recommend_meals(request.user, limit)
+        meals = MealSerializer.setup_eager_loading(Meal.objects.all()).in_bulk([meal.id for meal, _ in ranked])
+        results = []
+        for meal, score in ranked:
+            if meal.id not in meals:
+                # Deleted in between
+                continue
+            data = MealSerializer(meals[meal.id], context={'request': request}).data
+            data['score'] = round(score, 4) if score is not None else None
+            results.append(data)
+        return Response({'results': results})
+    
+    @action(detail=False, methods=['get'], permission_classes=[AllowAny], url_path='top-rated', url_name='top-rated')
+    def top_rated(self, request):
+        """Get the top-rated meals of a restaurant"""
+        restaurant_id = _id_param(request.query_params.get('restaurant', ''))
+        if restaurant_id is None:
+            return Response({'detail': 'A numeric restaurant query parameter is required.'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        def build():
+            queryset = Meal.objects.filter(restaurant_id=restaurant_id, review_count__gt=0)
+            queryset = MealSerializer.setup_eager_loading(queryset.order_by('-avg_rating', '-review_count'))
+            return MealSerializer(queryset[:LEADERBOARD_SIZE], many=True).data
+        
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', TOP_RATED_LIMIT)), LEADERBOARD_SIZE))
+        except ValueError:
+            limit = TOP_RATED_LIMIT
+        return Response(get_leaderboard(TOP_MEALS, restaurant_id, build, limit))
+    
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'top_rated', 'availability', 'browse']:
             return [AllowAny()]
         return super().get_permissions()
     
@@ -79,8 +253,12 @@ class MealViewSet(viewsets.ModelViewSet):
         
         if category_id:
             queryset = queryset.filter(category_id=category_id)
+        
+        # Hide sold-out meals (NULL means the meal isn't limited by stock)
+        if self.request.query_params.get('in_stock', '').lower() == 'true':
+            queryset = queryset.filter(Q(servings_available__gt=0) | Q(servings_available__isnull=True))
             
-        return queryset
+        return MealSerializer.setup_eager_loading(queryset)
     
     def perform_create(self, serializer):
         restaurant_id = self.request.data.get('restaurant')
@@ -120,13 +298,27 @@ class MealViewSet(viewsets.ModelViewSet):
                     additional_price=additional_price
                 )
 
+class AsyncMealCategoryView(AsyncReadView):
+    """Categories on the ASGI read path"""
+    viewset_class = MealCategoryViewSet
+
+class AsyncMealView(AsyncReadView):
+    """
+    Meal list and detail on the ASGI read path (same filters as MealViewSet).
+
+    Answers from the database without the ETag and menu cache layers, which
+    are synchronous.
+    """
+    viewset_class = MealViewSet
+
 class CustomMealViewSet(viewsets.ModelViewSet):
     queryset = CustomMeal.objects.all()
     serializer_class = CustomMealSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
+    search_kind = 'custom_meal'
     search_fields = ['name', 'description']
-    ordering_fields = ['name', 'created_at']
+    ordering_fields = ['name', 'created_at', 'avg_rating', 'servings_available']
     
     def get_permissions(self):
         if self.action in ['list', 'retrieve', 'ingredients', 'top_rated', 'check_availability']:
@@ -158,7 +350,7 @@ class CustomMealViewSet(viewsets.ModelViewSet):
             is_public = is_public.lower() == 'true'
             queryset = queryset.filter(is_public=is_public)
             
-        return queryset
+        return CustomMealSerializer.setup_eager_loading(queryset)
     
     def perform_create(self, serializer):
         # Save the custom meal with the current user
@@ -218,67 +410,38 @@ class CustomMealViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'], permission_classes=[AllowAny], url_path='top-rated', url_name='top-rated')
     def top_rated(self, request):
         """Get top-rated custom meals"""
-        try:
-            # Only include public meals
-            queryset = CustomMeal.objects.filter(is_public=True)
-            
-            # Annotate with average rating and review count
-            from django.db.models import Avg, Count
-            queryset = queryset.annotate(
-                avg_rating=Avg('reviews__rating'),
-                review_count=Count('reviews')
-            )
-            
-            # Filter meals with at least one review
-            queryset = queryset.filter(review_count__gt=0)
+        def build():
+            # Only include public meals with at least one review, read from the
+            # denormalized rating columns (index on is_public, -avg_rating, -review_count)
+            queryset = CustomMeal.objects.filter(is_public=True, review_count__gt=0)
             
             # Order by average rating (descending) and then by review count (descending)
-            queryset = queryset.order_by('-avg_rating', '-review_count')
-            
-            # Limit to top 10 meals
-            limit = int(request.query_params.get('limit', 10))
-            queryset = queryset[:limit]
-            
-            serializer = self.get_serializer(queryset, many=True)
-            return Response(serializer.data)
-        except Exception as e:
-            # Log the error for debugging
-            import logging
-            logger = logging.getLogger(__name__)
-            logger.error(f"Error in top_rated: {str(e)}")
-            
-            # Return an empty list instead of an error
-            return Response([])
+            queryset = CustomMealSerializer.setup_eager_loading(queryset.order_by('-avg_rating', '-review_count'))
+            return self.get_serializer(queryset[:LEADERBOARD_SIZE], many=True).data
+        
+        # Served from the cached leaderboard, limited to the top 10 meals by default
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', TOP_RATED_LIMIT)), LEADERBOARD_SIZE))
+        except ValueError:
+            limit = TOP_RATED_LIMIT
+        return Response(get_leaderboard(TOP_CUSTOM_MEALS, PUBLIC_SCOPE, build, limit))
 
 
 # Weather Feature 
 
 @api_view(['GET'])
 def get_weather(request):
+    city = request.GET.get('city', 'Cairo')  # Default to Cairo if no city provided
     try:
-        city = request.GET.get('city', 'Cairo')  # Default to Cairo if no city provided
-        api_key = config('OPENWEATHERMAP_API_KEY', default='your_default_api_key')
-        url = f"https://api.openweathermap.org/data/2.5/weather?q={city}&appid={api_key}&units=metric"
-        
-        response = requests.get(url)
-        data = response.json()
-        
-        if response.status_code == 200:
-            return JsonResponse({
-                "success": True,
-                "city": city,
-                "temperature": data["main"]["temp"],
-                "description": data["weather"][0]["description"],
-                "humidity": data["main"]["humidity"],
-                "icon": data["weather"][0]["icon"]
-            })
-        else:
-            return JsonResponse({
-                "success": False,
-                "error": f"Error fetching weather data: {data.get('message', 'Unknown error')}"
-            }, status=response.status_code)
-    except Exception as e:
+        weather = get_weather_service().get(city)
+    except WeatherError as e:
         return JsonResponse({
             "success": False,
-            "error": f"Error: {str(e)}"
-        }, status=500)
\ No newline at end of file
+            "error": str(e)
+        }, status=e.status_code)
+    
+    return JsonResponse({
+        "success": True,
+        "city": city,
+        **weather
+    })
@@ -0,0 +1,194 @@
+import logging
+import threading
+import time
+from functools import lru_cache
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class WeatherError(Exception):
+    """
+    The weather service has no answer for a city.
+
+    `outage` is set when the upstream failed (rather than, say, not knowing
+    the city), which is when stale data may stand in.
+    """
+
+    def __init__(self, message, status_code=503, outage=True):
+        self.status_code = status_code
+        self.outage = outage
+        super().__init__(message)
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class CircuitBreaker:
+    """
+    Stops calling the upstream after `threshold` consecutive failures.
+
+    While open, calls are refused for `cooldown` seconds; after that a single
+    trial call is let through and its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._trial_running = False
+
+    def allow(self):
+        with self._lock:
+            if self._opened_at is None:
+                return True
+            if self._trial_running or time.monotonic() - self._opened_at < self.cooldown:
+                return False
+            self._trial_running = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._failures >= self.threshold:
+                self._opened_at = time.monotonic()
+
+
+class WeatherService:
+    """
+    Current weather per city, read through a TTL cache.
+
+    - Entries are fresh for WEATHER_CACHE_TTL seconds and kept as a stale
+      fallback for WEATHER_STALE_TTL seconds.
+    - Concurrent misses for the same city in a worker wait for one upstream
+      call; across workers a short cache lock lets the others serve stale data.
+    - Upstream calls share a pooled session and strict timeouts, behind a
+      circuit breaker that serves stale data while the upstream is failing.
+    """
+
+    def __init__(self):
+        self.url = _setting('WEATHER_API_URL', 'https://api.openweathermap.org/data/2.5/weather')
+        self.api_key = _setting('OPENWEATHERMAP_API_KEY', '')
+        self.timeout = _setting('WEATHER_TIMEOUT', (2, 3))  # (connect, read) seconds
+        self.ttl = _setting('WEATHER_CACHE_TTL', 10 * 60)
+        self.stale_ttl = _setting('WEATHER_STALE_TTL', 6 * 60 * 60)
+        self.breaker = CircuitBreaker(
+            threshold=_setting('WEATHER_BREAKER_THRESHOLD', 5),
+            cooldown=_setting('WEATHER_BREAKER_COOLDOWN', 30),
+        )
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=_setting('WEATHER_POOL_SIZE', 10))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        # Striped so that arbitrary city names can't grow the set of locks
+        self._city_locks = [threading.Lock() for _ in range(64)]
+
+    def _key(self, city):
+        return f'weather:{city.strip().lower()}'
+
+    def _city_lock(self, city):
+        return self._city_locks[hash(self._key(city)) % len(self._city_locks)]
+
+    def _cached(self, city):
+        """Return (entry, is_fresh) for a city, entry being None on a miss"""
+        entry = cache.get(self._key(city))
+        if entry is None:
+            return None, False
+        return entry, time.time() - entry['fetched_at'] < self.ttl
+
+    def get(self, city):
+        """Return the weather dict for `city`, with a `stale` flag; raises WeatherError"""
+        entry, fresh = self._cached(city)
+        if fresh:
+            return {**entry['weather'], 'stale': False}
+
+        with self._city_lock(city):
+            # Another thread may have refreshed the city while this one waited
+            entry, fresh = self._cached(city)
+            if fresh:
+                return {**entry['weather'], 'stale': False}
+
+            lock_key = f'{self._key(city)}:refreshing'
+            refreshing = cache.add(lock_key, 1, timeout=self._max_call_time())
+            if entry is not None and not refreshing:
+                # Another worker is already refreshing this city
+                return {**entry['weather'], 'stale': True}
+            try:
+                return {**self._refresh(city), 'stale': False}
+            except WeatherError as e:
+                if entry is not None and e.outage:
+                    return {**entry['weather'], 'stale': True}
+                raise
+            finally:
+                if refreshing:
+                    cache.delete(lock_key)
+
+    def _max_call_time(self):
+        timeouts = self.timeout if isinstance(self.timeout, (tuple, list)) else (self.timeout, self.timeout)
+        return int(sum(timeouts)) + 1
+
+    def _refresh(self, city):
+        if not self.breaker.allow():
+            raise WeatherError('The weather service is temporarily unavailable.')
+
+        try:
+            response = self.session.get(
+                self.url,
+                params={'q': city, 'appid': self.api_key, 'units': 'metric'},
+                timeout=self.timeout,
+            )
+            data = response.json()
+        except (requests.RequestException, ValueError) as e:
+            logger.warning(f"Weather upstream failed for {city}: {str(e)}")
+            self.breaker.record_failure()
+            raise WeatherError('The weather service is temporarily unavailable.')
+
+        # Error bodies are usually {"message": ...}, but may be any JSON at all
+        message = data.get('message', 'Unknown error') if isinstance(data, dict) else 'Unknown error'
+        if response.status_code >= 500:
+            self.breaker.record_failure()
+            raise WeatherError(f"Error fetching weather data: {message}")
+
+        if response.status_code != 200:
+            # The upstream answered, so the circuit is healthy even if the city is unknown
+            self.breaker.record_success()
+            raise WeatherError(f"Error fetching weather data: {message}", response.status_code, outage=False)
+
+        try:
+            weather = {
+                'temperature': data['main']['temp'],
+                'description': data['weather'][0]['description'],
+                'humidity': data['main']['humidity'],
+                'icon': data['weather'][0]['icon'],
+            }
+        except (KeyError, IndexError, TypeError) as e:
+            # A 200 without the expected fields is as much an outage as a 500
+            logger.warning(f"Weather upstream sent a malformed answer for {city}: {str(e)}")
+            self.breaker.record_failure()
+            raise WeatherError('The weather service is temporarily unavailable.')
+
+        self.breaker.record_success()
+        cache.set(self._key(city), {'weather': weather, 'fetched_at': time.time()}, self.stale_ttl)
+        return weather
+
+
+@lru_cache(maxsize=None)
+def get_weather_service():
+    """The process-wide service, so the connection pool, cache locks and breaker are shared"""
+    return WeatherService()
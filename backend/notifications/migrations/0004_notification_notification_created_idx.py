@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 00:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0003_initial'),
+        ('orders', '0004_order_order_created_idx_payment_payment_date_idx'),
+        ('restaurants', '0003_restaurant_restaurant_created_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['-created_at', '-id'], name='notification_created_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 01:39
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0005_notification_notif_recipient_read_idx_and_more'),
+        ('orders', '0007_idempotencykey_user'),
+        ('restaurants', '0007_restaurant_coordinates'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['restaurant', 'is_read', '-created_at'], name='notif_restaurant_read_idx'),
+        ),
+    ]
@@ -26,6 +26,14 @@ class Notification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='notification_created_idx'),
+            models.Index(fields=['recipient', 'is_read', '-created_at'], name='notif_recipient_read_idx'),
+            # A restaurant owner's list, unread list and badge count
+            models.Index(fields=['restaurant', 'is_read', '-created_at'], name='notif_restaurant_read_idx'),
+            # Unread-only index for the badge/unread queries; backends without partial indexes skip it
+            models.Index(fields=['recipient', '-created_at'], condition=models.Q(is_read=False), name='notif_unread_idx'),
+        ]
     
     def __str__(self):
         return f"{self.notification_type} for {self.recipient.username}"
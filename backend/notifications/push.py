@@ -0,0 +1,152 @@
+import asyncio
+import threading
+from collections import defaultdict
+from functools import lru_cache
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from .models import Notification
+
+# Events replayed at most on (re)connect, and between two database polls
+REPLAY_LIMIT = 100
+
+
+def user_channel(user_id):
+    return f'user:{user_id}'
+
+
+def restaurant_channel(restaurant_id):
+    return f'restaurant:{restaurant_id}'
+
+
+def channel_queryset(channel):
+    """Notifications that belong to a push channel (same scoping as NotificationViewSet)"""
+    kind, _, pk = channel.partition(':')
+    field = {'user': 'recipient_id', 'restaurant': 'restaurant_id'}[kind]
+    return Notification.objects.filter(**{field: int(pk)})
+
+
+def serialize_event(notification):
+    # Deliberately flat: clients fetch the nested order details only if they need them
+    return {
+        'id': notification.id,
+        'notification_type': notification.notification_type,
+        'title': notification.title,
+        'message': notification.message,
+        'is_read': notification.is_read,
+        'created_at': notification.created_at.isoformat() if notification.created_at else None,
+        'recipient': notification.recipient_id,
+        'sender': notification.sender_id,
+        'restaurant': notification.restaurant_id,
+        'order': notification.order_id,
+    }
+
+
+class InProcessBroker:
+    """
+    Fans events out to the streams open in this process.
+
+    Meant for tests and single-worker deployments: a stream served by another
+    worker won't see events published here.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = defaultdict(set)
+
+    def publish(self, channel, event):
+        # Called from sync code (after the notification insert commits)
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.loop.call_soon_threadsafe(subscription.queue.put_nowait, event)
+
+    def subscribe(self, channel):
+        subscription = InProcessSubscription(self, channel)
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers[subscription.channel].discard(subscription)
+            if not self._subscribers[subscription.channel]:
+                del self._subscribers[subscription.channel]
+
+
+class InProcessSubscription:
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+
+    async def get(self, after_id, timeout):
+        """Wait up to `timeout` seconds and return the events newer than `after_id`"""
+        try:
+            events = [await asyncio.wait_for(self.queue.get(), timeout)]
+        except asyncio.TimeoutError:
+            return []
+        while not self.queue.empty():
+            events.append(self.queue.get_nowait())
+        return [event for event in events if event['id'] > after_id]
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class DatabaseBroker:
+    """
+    Reads events back from the notifications table.
+
+    Works across any number of workers without extra infrastructure, at the
+    cost of one indexed query per open stream every POLL_INTERVAL seconds.
+    """
+    POLL_INTERVAL = 2
+
+    def publish(self, channel, event):
+        # The notification row is the event; nothing to forward
+        pass
+
+    def subscribe(self, channel):
+        return DatabaseSubscription(channel, self.POLL_INTERVAL)
+
+
+class DatabaseSubscription:
+    def __init__(self, channel, poll_interval):
+        self.channel = channel
+        self.poll_interval = poll_interval
+
+    async def get(self, after_id, timeout):
+        deadline = asyncio.get_running_loop().time() + timeout
+        while True:
+            newer = channel_queryset(self.channel).filter(id__gt=after_id).order_by('id')[:REPLAY_LIMIT]
+            events = [serialize_event(notification) async for notification in newer]
+            remaining = deadline - asyncio.get_running_loop().time()
+            if events or remaining <= 0:
+                return events
+            await asyncio.sleep(min(self.poll_interval, remaining))
+
+    def close(self):
+        pass
+
+
+@lru_cache(maxsize=None)
+def get_broker():
+    """The broker configured by NOTIFICATION_BROKER (in-process by default)"""
+    path = getattr(settings, 'NOTIFICATION_BROKER', 'notifications.push.InProcessBroker')
+    return import_string(path)()
+
+
+def publish_notifications(notifications):
+    """Push saved notifications to their recipient's and restaurant's channels"""
+    broker = get_broker()
+    for notification in notifications:
+        if notification.id is None:
+            # Backends that don't return ids from bulk_create; polling brokers still pick them up
+            continue
+        event = serialize_event(notification)
+        broker.publish(user_channel(notification.recipient_id), event)
+        if notification.restaurant_id:
+            broker.publish(restaurant_channel(notification.restaurant_id), event)
@@ -0,0 +1,55 @@
+import logging
+from django.db import transaction
+from .models import Notification
+from .push import publish_notifications
+
+logger = logging.getLogger(__name__)
+
+
+def _build(recipient_id, notification_type, title, message, sender_id=None, restaurant_id=None, order_id=None):
+    # Foreign keys are set straight from their ids, nothing is looked up
+    return Notification(
+        recipient_id=recipient_id,
+        sender_id=sender_id,
+        restaurant_id=restaurant_id,
+        order_id=order_id,
+        notification_type=notification_type,
+        title=title,
+        message=message,
+    )
+
+
+def _save(notifications):
+    try:
+        Notification.objects.bulk_create(notifications)
+    except Exception:
+        logger.exception(f"Error creating {len(notifications)} notification(s)")
+        return
+    
+    try:
+        publish_notifications(notifications)
+    except Exception:
+        logger.exception("Error pushing notifications to open streams")
+
+
+def create_notification(recipient_id, notification_type, title, message, sender_id=None, restaurant_id=None, order_id=None):
+    """
+    Create a notification once the current transaction commits.
+
+    Outside a transaction it is created immediately. The unsaved instance is
+    returned; its id is set after the insert runs.
+    """
+    notification = _build(recipient_id, notification_type, title, message, sender_id, restaurant_id, order_id)
+    transaction.on_commit(lambda: _save([notification]))
+    return notification
+
+
+def notify_many(recipient_ids, notification_type, title, message, sender_id=None, restaurant_id=None, order_id=None):
+    """Fan the same notification out to many recipients with one INSERT after commit"""
+    notifications = [
+        _build(recipient_id, notification_type, title, message, sender_id, restaurant_id, order_id)
+        for recipient_id in recipient_ids
+    ]
+    if notifications:
+        transaction.on_commit(lambda: _save(notifications))
+    return notifications
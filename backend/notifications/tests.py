@@ -1,3 +1,307 @@
-from django.test import TestCase
+from datetime import time, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.db import DatabaseError, transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from users.models import User
+from restaurants.models import Restaurant
+from meals.models import Meal
+from orders.models import Order
+from .models import Notification
+from .push import get_broker, restaurant_channel, user_channel
+from .services import create_notification, notify_many
+
+STREAM_URL = '/api/notifications/stream/'
+NOTIFICATIONS_URL = '/api/notifications/notifications/'
+
+
+class RecordingBroker:
+    """Remembers what was published, for the services tests"""
+
+    def __init__(self):
+        self.published = []
+
+    def publish(self, channel, event):
+        self.published.append((channel, event['id']))
+
+
+class NotificationStreamTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='customer', password='x', user_type='customer')
+        cls.token = Token.objects.create(user=cls.user)
+        cls.notification = Notification.objects.create(
+            recipient=cls.user, notification_type='order_ready', title='Ready', message='Your order is ready',
+        )
+
+    def test_stream_needs_the_asgi_server(self):
+        # Under WSGI the endless stream would hang the worker
+        response = self.client.get(STREAM_URL, {'token': self.token.key})
+        self.assertEqual(response.status_code, 503)
+
+    async def test_anonymous_stream_is_rejected(self):
+        response = await self.async_client.get(STREAM_URL)
+        self.assertEqual(response.status_code, 401)
+
+    async def test_reconnect_replays_missed_events(self):
+        response = await self.async_client.get(STREAM_URL, {'token': self.token.key, 'last_event_id': 0})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        chunks = aiter(response.streaming_content)
+        try:
+            self.assertEqual(await anext(chunks), b'retry: 3000\n\n')
+            event = await anext(chunks)
+        finally:
+            await chunks.aclose()
+        self.assertTrue(event.startswith(f'id: {self.notification.id}\nevent: notification\n'.encode()))
+        self.assertIn(b'"message": "Your order is ready"', event)
+
+
+class NotificationBulkActionTests(TestCase):
+    """Bulk actions touch only the caller's notifications and report how many they changed"""
+
+    @classmethod
+    def setUpTestData(cls):
+        def owner_of(name):
+            owner = User.objects.create_user(username=name, password='x', user_type='restaurant')
+            restaurant = Restaurant.objects.create(
+                owner=owner, name=name, description='-', address='-', phone_number='0',
+                opening_time=time(0, 0), closing_time=time(23, 59),
+            )
+            return owner, restaurant
+
+        cls.owner, cls.restaurant = owner_of('owner')
+        cls.other_owner, other_restaurant = owner_of('other owner')
+        cls.customer = User.objects.create_user(username='customer', password='x', user_type='customer')
+        cls.other_customer = User.objects.create_user(username='other', password='x', user_type='customer')
+
+        def notify(recipient, restaurant=None, is_read=False, days_ago=0):
+            notification = Notification.objects.create(
+                recipient=recipient, restaurant=restaurant, notification_type='order_status_update',
+                title='-', message='-', is_read=is_read,
+            )
+            Notification.objects.filter(pk=notification.pk).update(created_at=timezone.now() - timedelta(days=days_ago))
+            return notification
+
+        # The customer's own notifications; those about the restaurant are in its owner's view too
+        cls.ready = notify(cls.customer, cls.restaurant, days_ago=2)
+        cls.accepted = notify(cls.customer, cls.restaurant)
+        cls.old_read = notify(cls.customer, is_read=True, days_ago=40)
+        cls.old_read_about_restaurant = notify(cls.customer, cls.restaurant, is_read=True, days_ago=40)
+        # The owner's own
+        cls.new_order = notify(cls.owner, cls.restaurant)
+        cls.owner_old_read = notify(cls.owner, cls.restaurant, is_read=True, days_ago=40)
+        cls.owner_recent_read = notify(cls.owner, cls.restaurant, is_read=True, days_ago=1)
+        # Nobody above may touch these
+        cls.others = [
+            notify(cls.other_customer, other_restaurant),
+            notify(cls.other_owner, other_restaurant, is_read=True, days_ago=40),
+        ]
+
+    def post(self, user, action, data=None):
+        client = APIClient()
+        client.force_authenticate(user)
+        return client.post(f'{NOTIFICATIONS_URL}{action}/', data or {}, format='json')
+
+    def unread_count(self, user):
+        client = APIClient()
+        client.force_authenticate(user)
+        response = client.get(f'{NOTIFICATIONS_URL}unread_count/')
+        self.assertEqual(response.status_code, 200)
+        return response.data['count']
+
+    def assert_count(self, response, count):
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['count'], count)
+
+    def assert_others_untouched(self):
+        self.assertEqual(
+            list(Notification.objects.filter(pk__in=[n.pk for n in self.others]).order_by('pk').values_list('is_read', flat=True)),
+            [False, True],
+        )
+
+    def unread(self, *notifications):
+        return set(Notification.objects.filter(pk__in=[n.pk for n in notifications], is_read=False).values_list('pk', flat=True))
+
+    def test_unread_count(self):
+        self.assertEqual(self.unread_count(self.customer), 2)
+        # The owner's view holds the restaurant's notifications, the customers' included
+        self.assertEqual(self.unread_count(self.owner), 3)
+        self.assertEqual(self.unread_count(self.other_customer), 1)
+
+    def test_unread_list(self):
+        client = APIClient()
+        client.force_authenticate(self.owner)
+        response = client.get(f'{NOTIFICATIONS_URL}unread/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({n['id'] for n in response.data['results']}, {self.ready.pk, self.accepted.pk, self.new_order.pk})
+
+    def test_mark_all_as_read(self):
+        self.assert_count(self.post(self.customer, 'mark_all_as_read'), 2)
+        self.assertEqual(self.unread_count(self.customer), 0)
+        self.assertEqual(self.unread_count(self.owner), 1)
+        self.assert_others_untouched()
+
+        self.assert_count(self.post(self.owner, 'mark_all_as_read'), 1)
+        self.assert_count(self.post(self.owner, 'mark_all_as_read'), 0)
+        self.assert_others_untouched()
+
+    def test_mark_read_until_an_id(self):
+        # Later ids belong to other people and are out of scope anyway
+        self.assert_count(self.post(self.customer, 'mark_read_until', {'up_to_id': self.others[-1].pk}), 2)
+        self.assert_others_untouched()
+        self.assertEqual(self.unread(self.new_order), {self.new_order.pk})
+
+    def test_mark_read_until_a_timestamp(self):
+        before = (timezone.now() - timedelta(days=1)).isoformat()
+        self.assert_count(self.post(self.owner, 'mark_read_until', {'before': before}), 1)
+        self.assertEqual(self.unread(self.ready, self.accepted, self.new_order), {self.accepted.pk, self.new_order.pk})
+        self.assert_others_untouched()
+
+    def test_mark_read_until_needs_a_bound(self):
+        for data in ({}, {'before': 'yesterday'}, {'up_to_id': 'x'}):
+            self.assertEqual(self.post(self.customer, 'mark_read_until', data).status_code, 400, data)
+
+    def test_mark_many_as_read(self):
+        ids = [self.ready.pk, self.old_read.pk, self.new_order.pk, *(n.pk for n in self.others)]
+        # Already read and other people's notifications aren't counted
+        self.assert_count(self.post(self.customer, 'mark_many_as_read', {'ids': ids}), 1)
+        self.assertEqual(self.unread(self.ready, self.new_order), {self.new_order.pk})
+        self.assert_others_untouched()
+
+        self.assertEqual(self.post(self.customer, 'mark_many_as_read', {'ids': self.ready.pk}).status_code, 400)
+
+    def test_delete_read(self):
+        # Only the owner's own; their customers' notifications about the restaurant are left alone
+        self.assert_count(self.post(self.owner, 'delete_read'), 1)
+        self.assertFalse(Notification.objects.filter(pk=self.owner_old_read.pk).exists())
+        self.assertTrue(Notification.objects.filter(pk=self.old_read_about_restaurant.pk).exists())
+
+        self.assert_count(self.post(self.owner, 'delete_read', {'older_than_days': 0}), 1)
+        self.assert_count(self.post(self.owner, 'delete_read', {'older_than_days': 0}), 0)
+
+        self.assert_count(self.post(self.customer, 'delete_read'), 2)
+        self.assertFalse(Notification.objects.filter(pk__in=[self.old_read.pk, self.old_read_about_restaurant.pk]).exists())
+        self.assertEqual(Notification.objects.filter(pk__in=[n.pk for n in self.others]).count(), 2)
+
+    def test_delete_read_rejects_a_bad_age(self):
+        for days in (-1, -30, 'abc', 10 ** 10):
+            response = self.post(self.customer, 'delete_read', {'older_than_days': days})
+            self.assertEqual(response.status_code, 400, days)
+            self.assertEqual(response.data['detail'], 'older_than_days must be a non-negative integer')
+        self.assertEqual(Notification.objects.count(), 9)
+
+
+@override_settings(NOTIFICATION_BROKER='notifications.tests.RecordingBroker')
+class NotificationServiceTests(TestCase):
+    """Notifications are written, and pushed, only once the caller's transaction commits"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(username='owner', password='x', user_type='restaurant')
+        cls.restaurant = Restaurant.objects.create(
+            owner=cls.owner, name='Test', description='-', address='-', phone_number='0',
+            opening_time=time(0, 0), closing_time=time(23, 59), is_active=True, is_approved=True,
+        )
+        cls.customers = [
+            User.objects.create_user(username=f'customer{i}', password='x', user_type='customer') for i in range(3)
+        ]
+
+    def setUp(self):
+        get_broker.cache_clear()
+        self.addCleanup(get_broker.cache_clear)
+
+    def test_created_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                notification = create_notification(
+                    self.owner.id, 'new_order', 'New Order Received', '-',
+                    sender_id=self.customers[0].id, restaurant_id=self.restaurant.id,
+                )
+                self.assertIsNone(notification.id)
+                self.assertFalse(Notification.objects.exists())
+
+        saved = Notification.objects.get()
+        self.assertEqual(notification.id, saved.id)
+        self.assertEqual(
+            (saved.recipient_id, saved.sender_id, saved.restaurant_id, saved.order_id),
+            (self.owner.id, self.customers[0].id, self.restaurant.id, None),
+        )
+        self.assertEqual(get_broker().published, [
+            (user_channel(self.owner.id), saved.id), (restaurant_channel(self.restaurant.id), saved.id),
+        ])
+
+    def test_rolled_back_notification_is_never_created(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            try:
+                with transaction.atomic():
+                    create_notification(self.owner.id, 'new_order', 'New Order Received', '-')
+                    raise DatabaseError
+            except DatabaseError:
+                pass
+        self.assertEqual(callbacks, [])
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(get_broker().published, [])
+
+    def test_notify_many_is_one_insert_with_foreign_key_ids(self):
+        ids = [customer.id for customer in self.customers]
+        with self.captureOnCommitCallbacks() as callbacks:
+            notifications = notify_many(ids, 'order_status_update', 'Closing early', '-', restaurant_id=self.restaurant.id)
+        self.assertFalse(Notification.objects.exists())
+
+        # The FKs are set from their ids, so nothing is looked up: one INSERT
+        with self.assertNumQueries(1):
+            for callback in callbacks:
+                callback()
+
+        saved = Notification.objects.order_by('id')
+        self.assertEqual([n.id for n in notifications], [n.id for n in saved])
+        self.assertEqual([n.recipient_id for n in saved], ids)
+        self.assertEqual({n.restaurant_id for n in saved}, {self.restaurant.id})
+        self.assertEqual([channel for channel, _ in get_broker().published][:2], [
+            user_channel(ids[0]), restaurant_channel(self.restaurant.id),
+        ])
+
+    def test_notify_nobody_queues_nothing(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(notify_many([], 'order_status_update', '-', '-'), [])
+        self.assertEqual(callbacks, [])
+
+    def test_failed_insert_is_logged(self):
+        with mock.patch.object(Notification.objects, 'bulk_create', side_effect=DatabaseError('disk full')):
+            with self.assertLogs('notifications.services', 'ERROR') as logs:
+                with self.captureOnCommitCallbacks(execute=True):
+                    notify_many([c.id for c in self.customers], 'order_status_update', '-', '-')
+        self.assertIn('Error creating 3 notification(s)', logs.output[0])
+        self.assertEqual(get_broker().published, [])
+
+    def test_failed_push_keeps_the_notification(self):
+        with mock.patch('notifications.services.publish_notifications', side_effect=RuntimeError('broker down')):
+            with self.assertLogs('notifications.services', 'ERROR') as logs:
+                with self.captureOnCommitCallbacks(execute=True):
+                    create_notification(self.owner.id, 'new_order', '-', '-')
+        self.assertIn('Error pushing notifications to open streams', logs.output[0])
+        self.assertEqual(Notification.objects.count(), 1)
+
+    def test_failed_notification_doesnt_fail_the_order(self):
+        meal = Meal.objects.create(restaurant=self.restaurant, name='Pizza', description='-', base_price=10)
+        client = APIClient()
+        client.force_authenticate(self.customers[0])
+        payload = {
+            'user': self.customers[0].id, 'restaurant': self.restaurant.id, 'total_price': '10.00',
+            'delivery_address': '-', 'items': [{'meal': meal.id, 'quantity': 1, 'price': '10.00'}],
+        }
+
+        with mock.patch.object(Notification.objects, 'bulk_create', side_effect=DatabaseError('disk full')):
+            with self.assertLogs('notifications.services', 'ERROR'):
+                with self.captureOnCommitCallbacks(execute=True):
+                    response = client.post('/api/orders/orders/', payload, format='json')
+
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertTrue(Order.objects.filter(id=response.data['id']).exists())
+        self.assertFalse(Notification.objects.exists())
@@ -1,13 +1,22 @@
+import json
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
 from django.shortcuts import get_object_or_404
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from datetime import timedelta
 from .models import Notification
 from .serializers import NotificationSerializer, NotificationCreateSerializer
-from users.models import User
+# Kept importable from here for existing callers
+from .services import create_notification, notify_many  # noqa: F401
 from restaurants.models import Restaurant
-from orders.models import Order
+from .push import REPLAY_LIMIT, channel_queryset, get_broker, serialize_event, user_channel, restaurant_channel
+from uchef_project.pagination import NotificationCursorPagination
+from users.authentication import arequest_user
 
 class IsRecipientOrAdmin(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -29,6 +38,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     queryset = Notification.objects.all()
     serializer_class = NotificationSerializer
     permission_classes = [IsAuthenticated, IsRecipientOrAdmin]
+    pagination_class = NotificationCursorPagination
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['created_at']
     
@@ -37,18 +47,23 @@ class NotificationViewSet(viewsets.ModelViewSet):
         
         # Admin can see all notifications
         if user.user_type == 'admin':
-            return Notification.objects.all()
+            queryset = Notification.objects.all()
         
         # Restaurant owner can see notifications for their restaurant
-        if user.user_type == 'restaurant':
+        elif user.user_type == 'restaurant':
             try:
                 restaurant = user.restaurant
-                return Notification.objects.filter(restaurant=restaurant)
+                queryset = Notification.objects.filter(restaurant=restaurant)
             except Restaurant.DoesNotExist:
                 return Notification.objects.none()
         
         # Regular users can only see their own notifications
-        return Notification.objects.filter(recipient=user)
+        else:
+            queryset = Notification.objects.filter(recipient=user)
+        
+        if self.action in ('unread', 'unread_count'):
+            queryset = queryset.filter(is_read=False)
+        return queryset
     
     def get_serializer_class(self):
         if self.action == 'create':
@@ -58,54 +73,167 @@ class NotificationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def unread(self, request):
         """Get all unread notifications for the current user"""
-        unread_notifications = self.get_queryset().filter(is_read=False)
-        serializer = self.get_serializer(unread_notifications, many=True)
-        return Response(serializer.data)
+        page = self.paginate_queryset(self.get_queryset())
+        serializer = self.get_serializer(page, many=True)
+        return self.get_paginated_response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        """Count unread notifications for the current user without serializing them"""
+        count = self.get_queryset().count()
+        return Response({'count': count})
     
     @action(detail=True, methods=['post'])
     def mark_as_read(self, request, pk=None):
         """Mark a notification as read"""
         notification = self.get_object()
         notification.is_read = True
-        notification.save()
+        notification.save(update_fields=['is_read'])
         serializer = self.get_serializer(notification)
         return Response(serializer.data)
     
     @action(detail=False, methods=['post'])
     def mark_all_as_read(self, request):
         """Mark all notifications as read for the current user"""
+        updated = self.get_queryset().filter(is_read=False).update(is_read=True)
+        return Response({'status': 'All notifications marked as read', 'count': updated}, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['post'])
+    def mark_read_until(self, request):
+        """Mark notifications up to a timestamp (`before`) or an id (`up_to_id`) as read"""
         notifications = self.get_queryset().filter(is_read=False)
-        for notification in notifications:
-            notification.is_read = True
-            notification.save()
-        return Response({'status': 'All notifications marked as read'}, status=status.HTTP_200_OK)
-
-def create_notification(recipient_id, notification_type, title, message, sender_id=None, restaurant_id=None, order_id=None):
-    """Helper function to create a notification"""
-    try:
-        recipient = User.objects.get(id=recipient_id)
+        before = request.data.get('before')
+        up_to_id = request.data.get('up_to_id')
         
-        notification_data = {
-            'recipient': recipient,
-            'notification_type': notification_type,
-            'title': title,
-            'message': message,
-        }
+        if before:
+            before = parse_datetime(str(before))
+            if before is None:
+                return Response({'detail': 'before must be an ISO 8601 timestamp'}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(before):
+                before = timezone.make_aware(before)
+            notifications = notifications.filter(created_at__lte=before)
+        elif up_to_id:
+            try:
+                notifications = notifications.filter(id__lte=int(up_to_id))
+            except (TypeError, ValueError):
+                return Response({'detail': 'up_to_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        else:
+            return Response({'detail': 'Provide either before or up_to_id'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        updated = notifications.update(is_read=True)
+        return Response({'count': updated}, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['post'])
+    def mark_many_as_read(self, request):
+        """Mark a list of notification ids as read"""
+        ids = request.data.get('ids')
+        if not isinstance(ids, list):
+            return Response({'detail': 'ids must be a list of notification ids'}, status=status.HTTP_400_BAD_REQUEST)
         
-        if sender_id:
-            sender = User.objects.get(id=sender_id)
-            notification_data['sender'] = sender
+        updated = self.get_queryset().filter(id__in=ids, is_read=False).update(is_read=True)
+        return Response({'count': updated}, status=status.HTTP_200_OK)
+    
+    @action(detail=False, methods=['post'])
+    def delete_read(self, request):
+        """Delete read notifications older than `older_than_days` (default 30)"""
+        try:
+            days = int(request.data.get('older_than_days', 30))
+            if days < 0:
+                raise ValueError(days)
+            cutoff = timezone.now() - timedelta(days=days)
+        except (TypeError, ValueError, OverflowError):
+            return Response({'detail': 'older_than_days must be a non-negative integer'}, status=status.HTTP_400_BAD_REQUEST)
         
-        if restaurant_id:
-            restaurant = Restaurant.objects.get(id=restaurant_id)
-            notification_data['restaurant'] = restaurant
+        notifications = self.get_queryset().filter(is_read=True, created_at__lt=cutoff)
+        if request.user.user_type != 'admin':
+            # A restaurant owner also sees their customers' notifications about the restaurant, which aren't theirs to delete
+            notifications = notifications.filter(recipient=request.user)
+        deleted, _ = notifications.delete()
+        return Response({'count': deleted}, status=status.HTTP_200_OK)
+
+# Real-time push (Server-Sent Events, served through asgi.py)
+
+STREAM_KEEPALIVE_SECONDS = 15
+
+
+async def _stream_user(request):
+    """Authenticate with a DRF token (header or ?token=, since EventSource can't set headers) or the session"""
+    return await arequest_user(request, allow_query_token=True)
+
+
+def _sse(event):
+    return f"id: {event['id']}\nevent: notification\ndata: {json.dumps(event)}\n\n"
+
+
+async def _event_stream(channel, last_event_id):
+    # Subscribe before replaying so nothing published in between is lost
+    subscription = get_broker().subscribe(channel)
+    try:
+        yield 'retry: 3000\n\n'
         
-        if order_id:
-            order = Order.objects.get(id=order_id)
-            notification_data['order'] = order
+        if last_event_id is None:
+            # Fresh connection: only events from now on
+            last_event_id = await channel_queryset(channel).order_by('-id').values_list('id', flat=True).afirst() or 0
+        else:
+            # Reconnect: replay only the events missed since the resume token
+            missed = channel_queryset(channel).filter(id__gt=last_event_id).order_by('id')[:REPLAY_LIMIT]
+            async for notification in missed:
+                yield _sse(serialize_event(notification))
+                last_event_id = notification.id
         
-        notification = Notification.objects.create(**notification_data)
-        return notification
-    except Exception as e:
-        print(f"Error creating notification: {str(e)}")
-        return None
+        while True:
+            events = await subscription.get(last_event_id, STREAM_KEEPALIVE_SECONDS)
+            if not events:
+                yield ': keepalive\n\n'
+                continue
+            for event in events:
+                if event['id'] > last_event_id:
+                    yield _sse(event)
+                    last_event_id = event['id']
+    finally:
+        # Runs when the client disconnects and the stream is closed
+        subscription.close()
+
+
+async def notification_stream(request):
+    """
+    Push new notifications as Server-Sent Events.
+    
+    `?channel=user` (default) streams the caller's own notifications,
+    `?channel=restaurant` those of the restaurant they own. Reconnects resume
+    from the `Last-Event-ID` header (or `?last_event_id=`) and only receive
+    the events they missed.
+    
+    Only served through asgi.py: a WSGI worker (runserver) would buffer the
+    endless stream and hang, so there the view answers 503 and clients keep
+    polling /notifications/unread/ instead.
+    """
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse(
+            {'detail': 'Notification streaming needs the ASGI server (see README); poll the unread notifications instead.'},
+            status=503,
+        )
+    
+    user = await _stream_user(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+    
+    if request.GET.get('channel', 'user') == 'restaurant':
+        restaurant_id = await Restaurant.objects.filter(owner=user).values_list('id', flat=True).afirst()
+        if restaurant_id is None:
+            return JsonResponse({'detail': 'You do not have a restaurant set up yet.'}, status=404)
+        channel = restaurant_channel(restaurant_id)
+    else:
+        channel = user_channel(user.id)
+    
+    last_event_id = request.headers.get('Last-Event-ID') or request.GET.get('last_event_id')
+    try:
+        last_event_id = int(last_event_id) if last_event_id else None
+    except ValueError:
+        return JsonResponse({'detail': 'Invalid Last-Event-ID'}, status=400)
+    
+    response = StreamingHttpResponse(_event_stream(channel, last_event_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,156 @@
+import hashlib
+import json
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import IdempotencyKey
+
+MAX_KEY_LENGTH = 255
+REPLAY_HEADER = 'Idempotent-Replayed'
+# An unfinished claim older than this (seconds) was left by a request that died
+# mid-way (see aidempotent), so a retry may take it over
+CLAIM_LEASE = 120
+
+
+def _fingerprint(request, payload):
+    canonical = json.dumps([request.method, request.path, request.user.id, payload], sort_keys=True, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _response_body(response):
+    data = getattr(response, 'data', None)
+    return data if data is not None else json.loads(response.content)
+
+
+def _expiry_cutoff():
+    return timezone.now() - timedelta(seconds=settings.IDEMPOTENCY_KEY_TTL)
+
+
+def _replay(record, fingerprint, render):
+    if record.fingerprint != fingerprint:
+        return render({'detail': 'This Idempotency-Key was already used for a different request.'}, 422)
+    if record.status_code is None:
+        return render({'detail': 'A request with this Idempotency-Key is still being processed.'}, 409)
+    response = render(record.response_body, record.status_code)
+    response[REPLAY_HEADER] = 'true'
+    return response
+
+
+def _claim(user, scope, key, fingerprint):
+    """Return (record, created). Must run inside the transaction that handles the request."""
+    for _ in range(2):
+        try:
+            with transaction.atomic():
+                return IdempotencyKey.objects.create(user=user, scope=scope, key=key, fingerprint=fingerprint), True
+        except IntegrityError:
+            pass
+
+        # The INSERT above waited for a concurrent holder of the key to finish,
+        # so the record read here is committed
+        record = IdempotencyKey.objects.select_for_update().filter(user=user, scope=scope, key=key).first()
+        if record is None:
+            # Its holder rolled back; claim it again
+            continue
+        abandoned = record.status_code is None and record.created_at < timezone.now() - timedelta(seconds=CLAIM_LEASE)
+        if record.created_at < _expiry_cutoff() or abandoned:
+            record.delete()
+            continue
+        return record, False
+    raise IntegrityError(f'Could not claim idempotency key {key!r}')
+
+
+def idempotent(request, scope, payload, handler, render):
+    """
+    Run `handler()` at most once per user and Idempotency-Key.
+
+    The key is claimed with an INSERT in the same transaction as the handler's
+    writes, so a concurrent duplicate blocks on the unique constraint until the
+    first request finishes and then replays its response. Only successful
+    responses are stored: on an error the key is released with the rollback
+    and the client may retry. `payload` is the request data that must match
+    on replay; `render(body, status)` builds a response from stored data.
+    Keys are scoped to the authenticated user, so anonymous requests just
+    run the handler.
+    """
+    key = request.META.get('HTTP_IDEMPOTENCY_KEY')
+    if not key or not request.user.is_authenticated:
+        return handler()
+    if len(key) > MAX_KEY_LENGTH:
+        return render({'detail': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters.'}, 400)
+
+    fingerprint = _fingerprint(request, payload)
+
+    # Fast path for retries of a finished request: one indexed read, no transaction
+    finished = IdempotencyKey.objects.filter(
+        user=request.user, scope=scope, key=key, status_code__isnull=False, created_at__gte=_expiry_cutoff()
+    ).first()
+    if finished is not None:
+        return _replay(finished, fingerprint, render)
+
+    with transaction.atomic():
+        record, created = _claim(request.user, scope, key, fingerprint)
+        if not created:
+            return _replay(record, fingerprint, render)
+
+        response = handler()
+        if not 200 <= response.status_code < 300:
+            transaction.set_rollback(True)
+            return response
+
+        record.status_code = response.status_code
+        record.response_body = _response_body(response)
+        record.save(update_fields=['status_code', 'response_body'])
+    return response
+
+
+def _claim_committed(user, scope, key, fingerprint):
+    with transaction.atomic():
+        return _claim(user, scope, key, fingerprint)
+
+
+async def aidempotent(request, scope, payload, handler, render):
+    """
+    idempotent() for async handlers that wait on other services.
+
+    Holding the key's row lock across such a wait would stall every writer
+    behind it (on SQLite the lock is database wide), so the claim is
+    committed first, `handler()` is awaited outside any transaction and its
+    response stored by a second short write. A duplicate sent while the
+    first request is still running gets a 409 instead of waiting; the
+    handler must be safe to repeat once an unfinished claim's lease has run
+    out.
+    """
+    key = request.META.get('HTTP_IDEMPOTENCY_KEY')
+    if not key or not request.user.is_authenticated:
+        return await handler()
+    if len(key) > MAX_KEY_LENGTH:
+        return render({'detail': f'Idempotency-Key must be at most {MAX_KEY_LENGTH} characters.'}, 400)
+
+    fingerprint = _fingerprint(request, payload)
+    record, created = await sync_to_async(_claim_committed)(request.user, scope, key, fingerprint)
+    if not created:
+        return _replay(record, fingerprint, render)
+
+    try:
+        response = await handler()
+    except BaseException:
+        await record.adelete()
+        raise
+    if not 200 <= response.status_code < 300:
+        # Release the key so the client may retry
+        await record.adelete()
+        return response
+
+    record.status_code = response.status_code
+    record.response_body = _response_body(response)
+    await record.asave(update_fields=['status_code', 'response_body'])
+    return response
+
+
+def purge_expired_keys():
+    deleted, _ = IdempotencyKey.objects.filter(created_at__lt=_expiry_cutoff()).delete()
+    return deleted
@@ -0,0 +1,156 @@
+import re
+from datetime import time
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from users.models import User
+from restaurants.models import Restaurant, Ingredient
+from restaurants.views import RestaurantViewSet, IngredientViewSet
+from meals.models import MealCategory, Meal, CustomMeal
+from meals.views import MealViewSet, CustomMealViewSet
+from orders.models import Order
+from orders.views import OrderViewSet
+from notifications.models import Notification
+from notifications.views import NotificationViewSet
+
+# Plan lines that read a whole table instead of going through an index
+FULL_SCAN_PATTERNS = {
+    'sqlite': re.compile(r'\bSCAN (\w+)$'),
+    'postgresql': re.compile(r'Seq Scan on (\w+)'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Run EXPLAIN on the hot endpoint querysets against a seeded dataset and fail on full table scans'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200, help='Rows seeded per table')
+
+    def handle(self, *args, **options):
+        if connection.vendor not in FULL_SCAN_PATTERNS:
+            raise CommandError(f'EXPLAIN checks are not supported on {connection.vendor}')
+
+        failures = []
+        # Seed inside a transaction that is always rolled back
+        with transaction.atomic():
+            fixtures = self.seed(options['rows'])
+
+            if connection.vendor == 'postgresql':
+                with connection.cursor() as cursor:
+                    # A tiny seeded table is cheaper to scan than to index; only
+                    # report a sequential scan when no index can serve the query
+                    cursor.execute('SET LOCAL enable_seqscan = off')
+
+            for label, queryset in self.endpoint_querysets(**fixtures):
+                plan = queryset.explain()
+                scanned = self.full_scans(plan)
+                if scanned:
+                    failures.append(label)
+                    self.stdout.write(self.style.ERROR(f'FULL SCAN  {label}: {", ".join(scanned)}'))
+                else:
+                    self.stdout.write(f'ok         {label}')
+                if options['verbosity'] > 1:
+                    self.stdout.write(plan)
+
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError(f'{len(failures)} endpoint queryset(s) do a full table scan')
+        self.stdout.write(self.style.SUCCESS('All endpoint querysets use an index'))
+
+    def full_scans(self, plan):
+        pattern = FULL_SCAN_PATTERNS[connection.vendor]
+        return [match.group(1) for match in map(pattern.search, plan.splitlines()) if match]
+
+    def seed(self, rows):
+        users = User.objects.bulk_create(
+            User(username=f'explain-{i}', email=f'explain-{i}@example.com', user_type='restaurant' if i % 4 == 0 else 'customer')
+            for i in range(rows)
+        )
+        owners = [user for user in users if user.user_type == 'restaurant']
+        restaurants = Restaurant.objects.bulk_create(
+            Restaurant(
+                owner=owner, name=f'Restaurant {i}', description='-', address='-', phone_number='0',
+                opening_time=time(9, 0), closing_time=time(23, 0), is_active=i % 3 != 0, is_approved=i % 3 != 0,
+            )
+            for i, owner in enumerate(owners)
+        )
+        categories = MealCategory.objects.bulk_create(MealCategory(name=f'Category {i}') for i in range(10))
+        Ingredient.objects.bulk_create(
+            Ingredient(
+                restaurant=restaurants[i % len(restaurants)], name=f'Ingredient {i}', quantity=i,
+                unit='g', price_per_unit=1, is_available=i % 5 != 0,
+            )
+            for i in range(rows)
+        )
+        meals = Meal.objects.bulk_create(
+            Meal(
+                restaurant=restaurants[i % len(restaurants)], category=categories[i % len(categories)],
+                name=f'Meal {i}', description='-', base_price=10,
+            )
+            for i in range(rows)
+        )
+        CustomMeal.objects.bulk_create(
+            CustomMeal(user=users[i], name=f'Custom {i}', base_meal=meals[i], is_public=i % 2 == 0)
+            for i in range(rows)
+        )
+        statuses = [choice[0] for choice in Order.STATUS_CHOICES]
+        orders = Order.objects.bulk_create(
+            Order(
+                user=users[i], restaurant=restaurants[i % len(restaurants)], status=statuses[i % len(statuses)],
+                total_price=10, delivery_address='-',
+            )
+            for i in range(rows)
+        )
+        Notification.objects.bulk_create(
+            Notification(
+                recipient=users[i], restaurant=order.restaurant, order=order, notification_type='new_order',
+                title='-', message='-', is_read=i % 2 == 0,
+            )
+            for i, order in enumerate(orders)
+        )
+
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
+
+        customer = next(user for user in users if user.user_type == 'customer')
+        return {'customer': customer, 'restaurant': restaurants[0], 'category': categories[0]}
+
+    def endpoints(self, customer, restaurant, category):
+        """(label, viewset, action, user, query params) of each hot endpoint"""
+        owner = restaurant.owner
+        return [
+            ('notifications (customer)', NotificationViewSet, 'list', customer, {}),
+            ('notifications unread (customer)', NotificationViewSet, 'unread', customer, {}),
+            ('notifications (restaurant)', NotificationViewSet, 'list', owner, {}),
+            ('notifications unread (restaurant)', NotificationViewSet, 'unread', owner, {}),
+            ('orders (customer)', OrderViewSet, 'list', customer, {}),
+            ('orders (restaurant)', OrderViewSet, 'list', owner, {}),
+            ('orders (restaurant, by status)', OrderViewSet, 'list', owner, {'ordering': 'status'}),
+            ('meals (restaurant)', MealViewSet, 'list', None, {'restaurant': restaurant.id}),
+            ('meals (restaurant, category)', MealViewSet, 'list', None, {'restaurant': restaurant.id, 'category': category.id}),
+            ('ingredients (restaurant)', IngredientViewSet, 'list', None, {'restaurant': restaurant.id}),
+            ('restaurants (public)', RestaurantViewSet, 'list', None, {}),
+            ('custom meals (public)', CustomMealViewSet, 'list', None, {}),
+        ]
+
+    def endpoint_querysets(self, **fixtures):
+        """
+        The page queryset behind each hot endpoint, built by its own viewset
+        for a fake request: get_queryset(), the filter backends and the
+        paginator's ordering, so the checks follow the views as they change
+        """
+        factory = APIRequestFactory()
+        for label, viewset_class, action, user, params in self.endpoints(**fixtures):
+            request = Request(factory.get('/', params))
+            request.user = user or AnonymousUser()
+            viewset = viewset_class(request=request, args=(), kwargs={}, action=action, format_kwarg=None)
+            queryset = viewset.filter_queryset(viewset.get_queryset())
+            if viewset.paginator is not None:
+                queryset = queryset.order_by(*viewset.paginator.get_ordering(request, queryset, viewset))
+            yield label, queryset
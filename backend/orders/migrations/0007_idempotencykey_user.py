@@ -0,0 +1,37 @@
+# Generated by Django 5.2 on 2026-10-18 12:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def delete_keys(apps, schema_editor):
+    # Stored keys belong to no user and expire within a day; retries after
+    # the migration simply run again
+    apps.get_model('orders', 'IdempotencyKey').objects.all().delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0006_idempotencykey'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RunPython(delete_keys, migrations.RunPython.noop),
+        migrations.RemoveConstraint(
+            model_name='idempotencykey',
+            name='idempotency_scope_key_uniq',
+        ),
+        migrations.AddField(
+            model_name='idempotencykey',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='idempotency_keys', to=settings.AUTH_USER_MODEL),
+            preserve_default=False,
+        ),
+        migrations.AddConstraint(
+            model_name='idempotencykey',
+            constraint=models.UniqueConstraint(fields=('user', 'scope', 'key'), name='idempotency_user_scope_key_uniq'),
+        ),
+    ]
@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from restaurants.models import Restaurant
 from meals.models import Meal, CustomMeal
 
@@ -22,6 +23,13 @@ class Order(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='order_created_idx'),
+            models.Index(fields=['restaurant', 'status', '-created_at'], name='order_restaurant_status_idx'),
+            models.Index(fields=['user', '-created_at'], name='order_user_created_idx'),
+        ]
+    
     def __str__(self):
         return f"Order #{self.id} by {self.user.username}"
 
@@ -67,5 +75,32 @@ class Payment(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     payment_date = models.DateTimeField(auto_now_add=True)
     
+    class Meta:
+        indexes = [
+            models.Index(fields=['-payment_date', '-id'], name='payment_date_idx'),
+        ]
+    
     def __str__(self):
         return f"Payment for Order #{self.order.id}"
+
+class IdempotencyKey(models.Model):
+    """The stored outcome of a request sent with an Idempotency-Key header (see orders.idempotency)"""
+    # Keys are per user, so one customer's key never replays another's response
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='idempotency_keys')
+    scope = models.CharField(max_length=50)  # the endpoint the key was used on
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    response_body = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'scope', 'key'], name='idempotency_user_scope_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['created_at'], name='idempotency_created_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.scope} {self.key}"
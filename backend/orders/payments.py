@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import uuid
+from collections import namedtuple
+from decimal import Decimal, ROUND_HALF_UP
+from functools import lru_cache
+
+import requests
+import stripe
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+PaymentIntent = namedtuple('PaymentIntent', ['id', 'client_secret', 'amount', 'currency'])
+
+
+class GatewayError(Exception):
+    """The payment provider refused or failed to create the payment"""
+
+
+def amount_in_cents(total_price):
+    """Order totals are stored in major units; providers expect integer minor units"""
+    return int((Decimal(total_price) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+
+
+class PaymentGateway:
+    """
+    What the order flow needs from a payment provider.
+
+    Implementations provide the blocking create_payment_intent(); the async
+    variant defaults to running it in a worker thread so async views never
+    block the event loop.
+    """
+
+    def create_payment_intent(self, amount, currency, idempotency_key=None, metadata=None):
+        raise NotImplementedError
+
+    async def acreate_payment_intent(self, amount, currency, idempotency_key=None, metadata=None):
+        # thread_sensitive=False: don't queue behind the single shared sync thread
+        return await sync_to_async(self.create_payment_intent, thread_sensitive=False)(
+            amount, currency, idempotency_key=idempotency_key, metadata=metadata
+        )
+
+
+class StripeGateway(PaymentGateway):
+    """Stripe over one pooled HTTP session with bounded timeouts and network retries"""
+
+    def __init__(self):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=getattr(settings, 'PAYMENT_POOL_SIZE', 10))
+        session.mount('https://', adapter)
+        self.client = stripe.StripeClient(
+            settings.STRIPE_SECRET_KEY,
+            http_client=stripe.RequestsClient(timeout=settings.PAYMENT_TIMEOUT, session=session),
+            max_network_retries=2,
+        )
+
+    def create_payment_intent(self, amount, currency, idempotency_key=None, metadata=None):
+        options = {'idempotency_key': idempotency_key} if idempotency_key else {}
+        try:
+            intent = self.client.payment_intents.create(
+                params={'amount': amount, 'currency': currency, 'metadata': metadata or {}},
+                options=options,
+            )
+        except stripe.StripeError as e:
+            raise GatewayError(e.user_message or str(e))
+        return PaymentIntent(intent.id, intent.client_secret, intent.amount, intent.currency)
+
+
+class FakeGateway(PaymentGateway):
+    """
+    In-memory gateway for tests and load runs: no network, optional latency.
+
+    Like Stripe, repeating an idempotency key returns the intent it created.
+    """
+    latency = 0  # seconds, simulated per call
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.intents = {}
+
+    def create_payment_intent(self, amount, currency, idempotency_key=None, metadata=None):
+        with self._lock:
+            if idempotency_key and idempotency_key in self.intents:
+                return self.intents[idempotency_key]
+            intent_id = f'pi_fake_{uuid.uuid4().hex[:24]}'
+            intent = PaymentIntent(intent_id, f'{intent_id}_secret_{uuid.uuid4().hex[:16]}', amount, currency)
+            self.intents[idempotency_key or intent_id] = intent
+            return intent
+
+    async def acreate_payment_intent(self, amount, currency, idempotency_key=None, metadata=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.create_payment_intent(amount, currency, idempotency_key=idempotency_key, metadata=metadata)
+
+
+@lru_cache(maxsize=None)
+def get_gateway():
+    """The gateway configured by PAYMENT_GATEWAY (Stripe by default), shared by the process"""
+    return import_string(settings.PAYMENT_GATEWAY)()
@@ -0,0 +1,43 @@
+from decimal import Decimal
+
+from django.db.models import Prefetch
+from meals.models import CustomMealIngredient
+from .models import OrderItem
+
+
+class PricingError(ValueError):
+    """An order item can't be priced from the menu any more"""
+
+
+def unit_price(item):
+    """
+    Menu price of one order item: the meal's base price, or for a custom
+    meal the sum of its ingredients' prices (its base meal's price when it
+    has no ingredients). None if the meal was deleted.
+    """
+    if item.meal is not None:
+        return item.meal.base_price
+    custom_meal = item.custom_meal
+    if custom_meal is None:
+        return None
+    ingredients = custom_meal.ingredients.all()
+    if ingredients:
+        return sum((row.ingredient.price_per_unit * Decimal(str(row.quantity)) for row in ingredients), Decimal(0))
+    return custom_meal.base_meal.base_price if custom_meal.base_meal else None
+
+
+def order_amount(order):
+    """
+    What `order` costs at the menu's prices. The order's total_price and the
+    item prices come from the client, so payments never use them.
+    """
+    items = OrderItem.objects.filter(order=order).select_related('meal', 'custom_meal__base_meal').prefetch_related(
+        Prefetch('custom_meal__ingredients', queryset=CustomMealIngredient.objects.select_related('ingredient'))
+    )
+    total = Decimal(0)
+    for item in items:
+        price = unit_price(item)
+        if price is None:
+            raise PricingError('This order contains items that are no longer on the menu.')
+        total += price * item.quantity
+    return total
@@ -1,6 +1,9 @@
 from rest_framework import serializers
+from django.db.models import Prefetch
 from .models import Order, OrderItem, Payment
-from meals.serializers import MealSerializer, CustomMealSerializer
+from meals.serializers import (
+    MealSerializer, CustomMealSerializer, _meal_ingredients_prefetch, _custom_meal_ingredients_prefetch,
+)
 
 class OrderItemSerializer(serializers.ModelSerializer):
     meal_details = MealSerializer(source='meal', read_only=True)
@@ -11,6 +14,18 @@ class OrderItemSerializer(serializers.ModelSerializer):
         fields = ['id', 'meal', 'meal_details', 'custom_meal', 'custom_meal_details', 
                   'quantity', 'price', 'special_instructions']
         read_only_fields = ['id']
+    
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """Load the meal and custom meal trees of every item with a fixed number of queries"""
+        return queryset.select_related(
+            'meal__category', 'meal__restaurant',
+            'custom_meal__user', 'custom_meal__base_meal__category', 'custom_meal__base_meal__restaurant',
+        ).prefetch_related(
+            _meal_ingredients_prefetch('meal__meal_ingredients'),
+            _custom_meal_ingredients_prefetch('custom_meal__ingredients'),
+            _meal_ingredients_prefetch('custom_meal__base_meal__meal_ingredients'),
+        )
 
 class PaymentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -32,6 +47,17 @@ class OrderSerializer(serializers.ModelSerializer):
                   'created_at', 'updated_at', 'items', 'payment']
         read_only_fields = ['id', 'created_at', 'updated_at']
     
+    @staticmethod
+    def setup_eager_loading(queryset):
+        """
+        Load the whole nested tree (items, meals, recipes, ingredients, payment)
+        with a fixed number of queries, however many orders are serialized
+        """
+        items = OrderItemSerializer.setup_eager_loading(OrderItem.objects.all())
+        return queryset.select_related('user', 'restaurant__owner', 'payment').prefetch_related(
+            Prefetch('items', queryset=items)
+        )
+    
     def create(self, validated_data):
         items_data = self.context.get('items', [])
         payment_data = self.context.get('payment', None)
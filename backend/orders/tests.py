@@ -1,3 +1,359 @@
-from django.test import TestCase
+import threading
+from datetime import time, timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connections
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from uchef_project.pagination import OrderCursorPagination
+from users.models import User
+from restaurants.models import Restaurant, Ingredient
+from meals.models import Meal, MealIngredient, CustomMeal, CustomMealIngredient
+from meals.availability import AvailabilityPlan
+from .idempotency import CLAIM_LEASE
+from .models import IdempotencyKey, Order, OrderItem, Payment
+from .payments import get_gateway
+from .views import OrderViewSet
+
+ORDERS_URL = '/api/orders/orders/'
+PAYMENT_INTENT_URL = '/api/orders/create-payment-intent/'
+
+
+def create_menu(stock):
+    """A restaurant with one meal that uses one unit of an ingredient holding `stock` units"""
+    owner = User.objects.create_user(username='owner', password='x', user_type='restaurant')
+    restaurant = Restaurant.objects.create(
+        owner=owner, name='Test', description='-', address='-', phone_number='0',
+        opening_time=time(0, 0), closing_time=time(23, 59), is_active=True, is_approved=True,
+    )
+    ingredient = Ingredient.objects.create(
+        restaurant=restaurant, name='Dough', quantity=stock, unit='pieces', price_per_unit=1,
+    )
+    meal = Meal.objects.create(restaurant=restaurant, name='Pizza', description='-', base_price=10)
+    MealIngredient.objects.create(meal=meal, ingredient=ingredient, quantity=1)
+    return restaurant, ingredient, meal
+
+
+def order_payload(customer, restaurant, meal, quantity=1):
+    return {
+        'user': customer.id, 'restaurant': restaurant.id, 'total_price': '10.00', 'delivery_address': '-',
+        'items': [{'meal': meal.id, 'quantity': quantity, 'price': '10.00'}],
+    }
+
+
+class ConcurrentCheckoutTests(TransactionTestCase):
+    """Checkouts racing for the same stock through the order API"""
+    CUSTOMERS = 6
+    STOCK = 3
+
+    def setUp(self):
+        self.restaurant, self.ingredient, self.meal = create_menu(self.STOCK)
+        self.customers = [
+            User.objects.create_user(username=f'customer{i}', password='x', user_type='customer')
+            for i in range(self.CUSTOMERS)
+        ]
+
+    def test_concurrent_orders_never_oversell(self):
+        statuses = []
+        lock = threading.Lock()
+        start = threading.Barrier(self.CUSTOMERS)
+
+        def checkout(customer):
+            try:
+                client = APIClient()
+                client.force_authenticate(customer)
+                start.wait()
+                response = client.post(
+                    ORDERS_URL, order_payload(customer, self.restaurant, self.meal), format='json'
+                )
+                with lock:
+                    statuses.append((customer.id, response.status_code))
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=checkout, args=(customer,)) for customer in self.customers]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        placed = [customer_id for customer_id, status_code in statuses if status_code == 201]
+        rejected = [customer_id for customer_id, status_code in statuses if status_code == 400]
+        self.assertEqual(len(placed), self.STOCK)
+        self.assertEqual(len(rejected), self.CUSTOMERS - self.STOCK)
+
+        self.ingredient.refresh_from_db()
+        self.assertEqual(self.ingredient.quantity, 0)
+        # The orders that lost the race left nothing behind
+        self.assertCountEqual(Order.objects.values_list('user_id', flat=True), placed)
+        self.assertEqual(OrderItem.objects.count(), self.STOCK)
+        self.assertFalse(Order.objects.filter(user_id__in=rejected).exists())
+
+    def test_order_losing_the_race_after_the_check_is_rolled_back(self):
+        customer = self.customers[0]
+        reserve = AvailabilityPlan.reserve
+
+        def reserve_after_another_checkout(plan):
+            # Another checkout takes the stock between the availability check and the reservation
+            Ingredient.objects.filter(pk=self.ingredient.pk).update(quantity=0)
+            return reserve(plan)
+
+        client = APIClient()
+        client.force_authenticate(customer)
+        AvailabilityPlan.reserve = reserve_after_another_checkout
+        try:
+            response = client.post(ORDERS_URL, order_payload(customer, self.restaurant, self.meal), format='json')
+        finally:
+            AvailabilityPlan.reserve = reserve
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('unavailable_ingredients', response.data)
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+
+    def test_non_numeric_quantity_is_rejected(self):
+        customer = self.customers[0]
+        client = APIClient()
+        client.force_authenticate(customer)
+        for quantity in ('abc', 0, -1, 1.5, None):
+            response = client.post(
+                ORDERS_URL, order_payload(customer, self.restaurant, self.meal, quantity), format='json'
+            )
+            self.assertEqual(response.status_code, 400, quantity)
+        self.assertFalse(Order.objects.exists())
+
+
+class OrderListQueryCountTests(TestCase):
+    """The order list runs a fixed number of queries, however many orders are on the page"""
+    # Auth is forced, so: count-free cursor page, then the prefetches of items,
+    # meal recipes, custom meal ingredients and base meal recipes
+    LIST_QUERIES = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant, cls.ingredient, cls.meal = create_menu(stock=1000)
+        cls.customer = User.objects.create_user(username='customer', password='x', user_type='customer')
+        cls.custom_meal = CustomMeal.objects.create(
+            user=cls.customer, name='Mine', base_meal=cls.meal, is_public=True,
+        )
+        CustomMealIngredient.objects.create(custom_meal=cls.custom_meal, ingredient=cls.ingredient, quantity=2)
+
+    def create_orders(self, count):
+        for _ in range(count):
+            order = Order.objects.create(
+                user=self.customer, restaurant=self.restaurant, total_price=22, delivery_address='-',
+            )
+            OrderItem.objects.create(order=order, meal=self.meal, quantity=1, price=10)
+            OrderItem.objects.create(order=order, custom_meal=self.custom_meal, quantity=1, price=12)
+            Payment.objects.create(order=order, amount=22, payment_method='cash')
+
+    def list_orders(self):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        with self.assertNumQueries(self.LIST_QUERIES):
+            response = client.get(ORDERS_URL)
+        self.assertEqual(response.status_code, 200)
+        return response.data['results']
+
+    def test_one_order(self):
+        self.create_orders(1)
+        self.assertEqual(len(self.list_orders()), 1)
+
+    def test_many_orders(self):
+        self.create_orders(15)
+        orders = self.list_orders()
+        self.assertEqual(len(orders), 15)
+        self.assertTrue(all(len(order['items']) == 2 and order['payment'] for order in orders))
+
+
+class OrderPaginationTests(TestCase):
+    """Paging through orders sorted on a column many orders share"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant, _, _ = create_menu(stock=0)
+        cls.customer = User.objects.create_user(username='customer', password='x', user_type='customer')
+        cls.orders = [
+            Order.objects.create(
+                user=cls.customer, restaurant=cls.restaurant, total_price=10, delivery_address='-', status=status,
+            )
+            for status in ['pending', 'delivered', 'pending', 'pending', 'delivered', 'pending', 'cancelled']
+        ]
+
+    def test_every_order_is_listed_once(self):
+        client = APIClient()
+        client.force_authenticate(self.customer)
+        seen = []
+        url = f'{ORDERS_URL}?ordering=status&page_size=2'
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [order['id'] for order in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(sorted(seen), sorted(order.id for order in self.orders))
+        statuses = dict(Order.objects.values_list('id', 'status'))
+        self.assertEqual([statuses[order_id] for order_id in seen], sorted(statuses[order_id] for order_id in seen))
+
+    def test_ordering_ends_in_a_unique_column(self):
+        request = Request(APIRequestFactory().get(ORDERS_URL, {'ordering': 'status'}))
+        ordering = OrderCursorPagination().get_ordering(request, Order.objects.all(), OrderViewSet())
+        self.assertEqual(ordering, ('status', '-created_at', '-id'))
+
+
+class IdempotentCheckoutTests(TestCase):
+    """Idempotency-Key replays are per customer"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant, _, cls.meal = create_menu(stock=10)
+        cls.customers = [
+            User.objects.create_user(username=f'customer{i}', password='x', user_type='customer') for i in range(2)
+        ]
+
+    def checkout(self, customer, key):
+        client = APIClient()
+        client.force_authenticate(customer)
+        return client.post(
+            ORDERS_URL, order_payload(customer, self.restaurant, self.meal), format='json', HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_the_order(self):
+        first = self.checkout(self.customers[0], 'checkout-1')
+        retry = self.checkout(self.customers[0], 'checkout-1')
+        self.assertEqual((first.status_code, retry.status_code), (201, 201))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.data['id'], first.data['id'])
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_customers_sharing_a_key_get_their_own_orders(self):
+        mine = self.checkout(self.customers[0], 'checkout-1')
+        theirs = self.checkout(self.customers[1], 'checkout-1')
+        self.assertEqual((mine.status_code, theirs.status_code), (201, 201))
+        self.assertFalse(theirs.has_header('Idempotent-Replayed'))
+        self.assertNotEqual(theirs.data['id'], mine.data['id'])
+        self.assertEqual(Order.objects.get(id=theirs.data['id']).user, self.customers[1])
+
+
+@override_settings(PAYMENT_GATEWAY='orders.payments.FakeGateway')
+class PaymentIntentTests(TestCase):
+    """The intent is priced from the menu and honours Idempotency-Key"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.restaurant, cls.ingredient, cls.meal = create_menu(stock=10)
+        cls.customer = User.objects.create_user(username='customer', password='x', user_type='customer')
+        cls.token = Token.objects.create(user=cls.customer)
+        custom_meal = CustomMeal.objects.create(user=cls.customer, name='Mine', base_meal=cls.meal)
+        # 2 units at 1.00
+        CustomMealIngredient.objects.create(custom_meal=custom_meal, ingredient=cls.ingredient, quantity=2)
+        # The client claimed a total of 1.00 and item prices of 0.50
+        cls.order = Order.objects.create(
+            user=cls.customer, restaurant=cls.restaurant, total_price=1, delivery_address='-',
+        )
+        OrderItem.objects.create(order=cls.order, meal=cls.meal, quantity=2, price='0.50')
+        OrderItem.objects.create(order=cls.order, custom_meal=custom_meal, quantity=1, price='0.50')
+
+    def setUp(self):
+        get_gateway.cache_clear()
+        self.addCleanup(get_gateway.cache_clear)
+
+    def create_intent(self, **headers):
+        return self.client.post(
+            PAYMENT_INTENT_URL, {'order': self.order.id}, content_type='application/json',
+            HTTP_AUTHORIZATION=f'Token {self.token.key}', **headers,
+        )
+
+    def test_amount_is_priced_from_the_menu(self):
+        response = self.create_intent()
+        self.assertEqual(response.status_code, 200)
+        # 2 x 10.00 + 1 x 2.00
+        self.assertEqual(response.json()['amount'], 2200)
+
+    def test_item_no_longer_on_the_menu_is_rejected(self):
+        Meal.objects.filter(pk=self.meal.pk).delete()
+        self.assertEqual(self.create_intent().status_code, 400)
+
+    def test_retry_with_the_same_key_replays_the_intent(self):
+        first = self.create_intent(HTTP_IDEMPOTENCY_KEY='pay-1')
+        retry = self.create_intent(HTTP_IDEMPOTENCY_KEY='pay-1')
+        self.assertEqual((first.status_code, retry.status_code), (200, 200))
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(retry.json(), first.json())
+
+
+    def test_failed_request_releases_the_key(self):
+        Order.objects.filter(pk=self.order.pk).update(status='cancelled')
+        self.assertEqual(self.create_intent(HTTP_IDEMPOTENCY_KEY='pay-1').status_code, 400)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_abandoned_claim_is_taken_over(self):
+        # Left unfinished by a request that died during the provider call
+        IdempotencyKey.objects.create(user=self.customer, scope='orders.payment_intent', key='pay-1', fingerprint='-')
+        IdempotencyKey.objects.update(created_at=timezone.now() - timedelta(seconds=CLAIM_LEASE + 1))
+        response = self.create_intent(HTTP_IDEMPOTENCY_KEY='pay-1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 200)
+
+
+@override_settings(PAYMENT_GATEWAY='orders.payments.FakeGateway')
+class PaymentIntentClaimTests(TransactionTestCase):
+    """The provider call runs after the key's claim has committed, outside any transaction"""
+
+    def setUp(self):
+        self.restaurant, _, self.meal = create_menu(stock=10)
+        customer = User.objects.create_user(username='customer', password='x', user_type='customer')
+        self.token = Token.objects.create(user=customer)
+        self.order = Order.objects.create(user=customer, restaurant=self.restaurant, total_price=10, delivery_address='-')
+        OrderItem.objects.create(order=self.order, meal=self.meal, quantity=1, price=10)
+        get_gateway.cache_clear()
+        self.addCleanup(get_gateway.cache_clear)
+
+    def create_intent(self, client):
+        return client.post(
+            PAYMENT_INTENT_URL, {'order': self.order.id}, content_type='application/json',
+            HTTP_AUTHORIZATION=f'Token {self.token.key}', HTTP_IDEMPOTENCY_KEY='pay-1',
+        )
+
+    def test_duplicate_during_the_provider_call_is_told_to_wait(self):
+        gateway = get_gateway()
+        create = gateway.create_payment_intent
+        during_call = {}
+
+        def duplicate():
+            # Another connection, as a second worker would have
+            try:
+                during_call['claims'] = list(IdempotencyKey.objects.values_list('status_code', flat=True))
+                during_call['status_code'] = self.create_intent(Client()).status_code
+            finally:
+                connections.close_all()
+
+        def create_with_a_duplicate(*args, **kwargs):
+            thread = threading.Thread(target=duplicate)
+            thread.start()
+            thread.join()
+            return create(*args, **kwargs)
+
+        gateway.create_payment_intent = create_with_a_duplicate
+        response = self.create_intent(Client())
+
+        self.assertEqual(response.status_code, 200)
+        # The claim was committed, unfinished, before the provider was called
+        self.assertEqual(during_call, {'claims': [None], 'status_code': 409})
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 200)
+
+
+class ExplainEndpointsTests(TestCase):
+
+    def test_every_endpoint_uses_an_index(self):
+        out = StringIO()
+        call_command('explain_endpoints', rows=40, stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertIn('ok         notifications unread (restaurant)', lines)
+        self.assertEqual(lines[-1], 'All endpoint querysets use an index')
+        # Everything seeded was rolled back
+        self.assertFalse(User.objects.exists())
@@ -2,12 +2,18 @@ from rest_framework import viewsets, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
 from django.shortcuts import get_object_or_404
+from django.db import transaction
 from .models import Order, OrderItem, Payment
 from .serializers import OrderSerializer, OrderItemSerializer, PaymentSerializer
 from restaurants.models import Restaurant
+from uchef_project.pagination import OrderCursorPagination, PaymentCursorPagination
+from meals.availability import AvailabilityPlan, InsufficientStock, InvalidItem
+from .idempotency import aidempotent, idempotent
+from uchef_project.streaming import StreamingListMixin
 # Import for notifications
-from notifications.views import create_notification
+from notifications.services import create_notification
 
 class IsOrderOwnerOrRestaurantOwnerOrAdmin(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -25,10 +31,11 @@ class IsOrderOwnerOrRestaurantOwnerOrAdmin(permissions.BasePermission):
         
         return False
 
-class OrderViewSet(viewsets.ModelViewSet):
+class OrderViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     permission_classes = [IsAuthenticated, IsOrderOwnerOrRestaurantOwnerOrAdmin]
+    pagination_class = OrderCursorPagination
     filter_backends = [filters.OrderingFilter]
     ordering_fields = ['created_at', 'status']
     
@@ -37,241 +44,81 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         # Admin can see all orders
         if user.user_type == 'admin':
-            return Order.objects.all()
+            queryset = Order.objects.all()
         
         # Restaurant owner can see orders for their restaurant
-        if user.user_type == 'restaurant':
+        elif user.user_type == 'restaurant':
             try:
                 restaurant = user.restaurant
-                return Order.objects.filter(restaurant=restaurant)
+                queryset = Order.objects.filter(restaurant=restaurant)
             except Restaurant.DoesNotExist:
                 return Order.objects.none()
         
         # Regular users can only see their own orders
-        return Order.objects.filter(user=user)
+        else:
+            queryset = Order.objects.filter(user=user)
+        
+        # Eager-load everything OrderSerializer nests so the query count doesn't grow with the page
+        return OrderSerializer.setup_eager_loading(queryset)
+    
+    def create(self, request, *args, **kwargs):
+        # A retried checkout with the same Idempotency-Key gets the original order back
+        return idempotent(
+            request, 'orders.create', request.data,
+            lambda: super(OrderViewSet, self).create(request, *args, **kwargs),
+            lambda body, status_code: Response(body, status=status_code),
+        )
     
     def perform_create(self, serializer):
         # Process the order items to check availability before creating the order
         items_data = self.request.data.get('items', [])
         
-        from meals.models import Meal, CustomMeal, CustomMealIngredient, MealIngredient
-        from restaurants.models import Ingredient
+        # Load every meal, recipe and ingredient in the cart once and sum the
+        # required quantity per ingredient across all items
+        try:
+            plan = AvailabilityPlan(items_data)
+        except InvalidItem as e:
+            raise ValidationError({'items': str(e)})
         
         # First, check if all ingredients are available
-        unavailable_ingredients = []
-        
-        for item_data in items_data:
-            # Check regular meals
-            if 'meal' in item_data and item_data['meal']:
-                try:
-                    meal_id = item_data['meal']
-                    meal = Meal.objects.get(id=meal_id)
-                    
-                    # Get the meal ingredients and check availability
-                    meal_ingredients = MealIngredient.objects.filter(meal=meal)
-                    order_quantity = int(item_data.get('quantity', 1))
-                    
-                    for mi in meal_ingredients:
-                        # Skip optional ingredients
-                        if mi.is_optional:
-                            continue
-                            
-                        ingredient = mi.ingredient
-                        required_quantity = float(mi.quantity) * order_quantity
-                        
-                        # Check if ingredient is available and has enough quantity
-                        if not ingredient.is_available or ingredient.quantity < required_quantity:
-                            unavailable_ingredients.append({
-                                'name': ingredient.name,
-                                'meal': meal.name,
-                                'available': ingredient.is_available,
-                                'required': required_quantity,
-                                'in_stock': ingredient.quantity
-                            })
-                except Meal.DoesNotExist:
-                    pass
-            
-            # Check custom meals
-            if 'custom_meal' in item_data and item_data['custom_meal']:
-                try:
-                    custom_meal_id = item_data['custom_meal']
-                    custom_meal = CustomMeal.objects.get(id=custom_meal_id)
-                    
-                    # Get the custom meal ingredients and check availability
-                    custom_meal_ingredients = CustomMealIngredient.objects.filter(custom_meal=custom_meal)
-                    order_quantity = int(item_data.get('quantity', 1))
-                    
-                    for cmi in custom_meal_ingredients:
-                        ingredient = cmi.ingredient
-                        required_quantity = float(cmi.quantity) * order_quantity
-                        
-                        # Check if ingredient is available and has enough quantity
-                        if not ingredient.is_available or ingredient.quantity < required_quantity:
-                            unavailable_ingredients.append({
-                                'name': ingredient.name,
-                                'meal': custom_meal.name,
-                                'available': ingredient.is_available,
-                                'required': required_quantity,
-                                'in_stock': ingredient.quantity
-                            })
-                except CustomMeal.DoesNotExist:
-                    pass
+        unavailable_ingredients = plan.unavailable_ingredients()
         
         # If any ingredients are unavailable, return an error
         if unavailable_ingredients:
-            error_message = "Cannot place order due to unavailable ingredients:\n"
-            for item in unavailable_ingredients:
-                error_message += f"- {item['name']} (required for {item['meal']}) is {'out of stock' if not item['available'] else 'low in stock'}. "
-                error_message += f"Required: {item['required']}, Available: {item['in_stock']}\n"
-            
-            from rest_framework.exceptions import ValidationError
-            raise ValidationError({'unavailable_ingredients': unavailable_ingredients, 'message': error_message})
+            self._raise_unavailable(unavailable_ingredients)
         
-        # If all ingredients are available, save the order with the current user
-        order = serializer.save(user=self.request.user)
-        
-        for item_data in items_data:
-            # Create a copy of the item data to avoid modifying the original
-            item_to_create = item_data.copy() if isinstance(item_data, dict) else {}
-            
-            # Handle meal ID - convert to Meal object
-            if 'meal' in item_to_create and item_to_create['meal']:
-                try:
-                    meal_id = item_to_create.pop('meal')
-                    meal = Meal.objects.get(id=meal_id)
-                    item_to_create['meal'] = meal
-                    
-                    # Get the meal ingredients and subtract quantities from inventory
-                    meal_ingredients = MealIngredient.objects.filter(meal=meal)
-                    order_quantity = int(item_to_create.get('quantity', 1))
-                    
-                    for mi in meal_ingredients:
-                        try:
-                            # Get the ingredient
-                            ingredient = mi.ingredient
-                            
-                            # Skip optional ingredients (if applicable)
-                            if mi.is_optional:
-                                continue
-                                
-                            # Calculate how much to subtract (ingredient quantity per meal × order quantity)
-                            subtract_amount = float(mi.quantity) * order_quantity
-                            
-                            # Update the ingredient quantity
-                            if ingredient.quantity >= subtract_amount:
-                                ingredient.quantity -= subtract_amount
-                                
-                                # If quantity becomes zero or very close to zero, mark as unavailable
-                                if ingredient.quantity < 0.001:
-                                    ingredient.quantity = 0
-                                    ingredient.is_available = False
-                                
-                                ingredient.save()
-                                
-                                # Log the update for debugging
-                                import logging
-                                logger = logging.getLogger(__name__)
-                                logger.info(
-                                    f"Updated ingredient {ingredient.name} (ID: {ingredient.id}): "
-                                    f"Previous quantity: {ingredient.quantity + subtract_amount}, "
-                                    f"Subtracted: {subtract_amount}, "
-                                    f"New quantity: {ingredient.quantity}"
-                                )
-                            else:
-                                # Not enough quantity available
-                                # We'll still create the order but log this issue
-                                import logging
-                                logger = logging.getLogger(__name__)
-                                logger.warning(
-                                    f"Not enough quantity of ingredient {ingredient.name} (ID: {ingredient.id}) "
-                                    f"for meal {meal.name} (ID: {meal.id}). "
-                                    f"Required: {subtract_amount}, Available: {ingredient.quantity}"
-                                )
-                        except Exception as e:
-                            # Log any errors but continue processing the order
-                            import logging
-                            logger = logging.getLogger(__name__)
-                            logger.error(f"Error updating ingredient quantity for meal: {str(e)}")
-                            
-                except Meal.DoesNotExist:
-                    continue  # Skip this item if meal doesn't exist
-            
-            # Handle custom meal ID - convert to CustomMeal object
-            if 'custom_meal' in item_to_create and item_to_create['custom_meal']:
-                try:
-                    custom_meal_id = item_to_create.pop('custom_meal')
-                    custom_meal = CustomMeal.objects.get(id=custom_meal_id)
-                    item_to_create['custom_meal'] = custom_meal
-                    
-                    # Get the custom meal ingredients and subtract quantities from inventory
-                    custom_meal_ingredients = CustomMealIngredient.objects.filter(custom_meal=custom_meal)
-                    order_quantity = int(item_to_create.get('quantity', 1))
-                    
-                    for cmi in custom_meal_ingredients:
-                        try:
-                            # Get the ingredient
-                            ingredient = cmi.ingredient
-                            
-                            # Calculate how much to subtract (ingredient quantity per meal × order quantity)
-                            subtract_amount = float(cmi.quantity) * order_quantity
-                            
-                            # Update the ingredient quantity
-                            if ingredient.quantity >= subtract_amount:
-                                ingredient.quantity -= subtract_amount
-                                
-                                # If quantity becomes zero or very close to zero, mark as unavailable
-                                if ingredient.quantity < 0.001:
-                                    ingredient.quantity = 0
-                                    ingredient.is_available = False
-                                
-                                ingredient.save()
-                                
-                                # Log the update for debugging
-                                import logging
-                                logger = logging.getLogger(__name__)
-                                logger.info(
-                                    f"Updated ingredient {ingredient.name} (ID: {ingredient.id}) for custom meal: "
-                                    f"Previous quantity: {ingredient.quantity + subtract_amount}, "
-                                    f"Subtracted: {subtract_amount}, "
-                                    f"New quantity: {ingredient.quantity}"
-                                )
-                            else:
-                                # Not enough quantity available
-                                # We'll still create the order but log this issue
-                                import logging
-                                logger = logging.getLogger(__name__)
-                                logger.warning(
-                                    f"Not enough quantity of ingredient {ingredient.name} (ID: {ingredient.id}) "
-                                    f"for custom meal {custom_meal.name} (ID: {custom_meal.id}). "
-                                    f"Required: {subtract_amount}, Available: {ingredient.quantity}"
-                                )
-                        except Exception as e:
-                            # Log any errors but continue processing the order
-                            import logging
-                            logger = logging.getLogger(__name__)
-                            logger.error(f"Error updating ingredient quantity for custom meal: {str(e)}")
-                            
-                except CustomMeal.DoesNotExist:
-                    continue  # Skip this item if custom meal doesn't exist
-            
-            # Create the order item
-            OrderItem.objects.create(order=order, **item_to_create)
-        
-        # Process payment if provided
-        payment_data = self.request.data.get('payment', None)
-        if payment_data:
-            Payment.objects.create(order=order, **payment_data)
+        try:
+            # Create the order and reserve its stock in one transaction so a
+            # shortfall leaves neither a half-created order nor partial deductions
+            with transaction.atomic():
+                order = serializer.save(user=self.request.user)
+                
+                # Subtract the planned quantities from inventory
+                plan.reserve()
+                
+                # Create the order items with the meals already loaded by the plan
+                for item_to_create in plan.resolved_items():
+                    OrderItem.objects.create(order=order, **item_to_create)
+                
+                # Process payment if provided
+                payment_data = self.request.data.get('payment', None)
+                if payment_data:
+                    Payment.objects.create(order=order, **payment_data)
+        except InsufficientStock:
+            # Another checkout took the stock since the check above
+            plan.refresh()
+            self._raise_unavailable(plan.unavailable_ingredients())
         
         # Create notification for the restaurant about the new order
         try:
             # Notify restaurant owner about the new order
             create_notification(
-                recipient_id=order.restaurant.owner.id,
+                recipient_id=order.restaurant.owner_id,
                 notification_type='new_order',
                 title='New Order Received',
-                message=f'You have received a new order #{order.id} from {order.user.username}.',
-                sender_id=order.user.id,
-                restaurant_id=order.restaurant.id,
+                message=f'You have received a new order #{order.id} from {self.request.user.username}.',
+                sender_id=order.user_id,
+                restaurant_id=order.restaurant_id,
                 order_id=order.id
             )
         except Exception as e:
@@ -282,6 +129,14 @@ class OrderViewSet(viewsets.ModelViewSet):
         
         return Response(OrderSerializer(order).data, status=status.HTTP_201_CREATED)
     
+    def _raise_unavailable(self, unavailable_ingredients):
+        error_message = "Cannot place order due to unavailable ingredients:\n"
+        for item in unavailable_ingredients:
+            error_message += f"- {item['name']} (required for {item['meal']}) is {'out of stock' if not item['available'] else 'low in stock'}. "
+            error_message += f"Required: {item['required']}, Available: {item['in_stock']}\n"
+        
+        raise ValidationError({'unavailable_ingredients': unavailable_ingredients, 'message': error_message})
+    
     @action(detail=True, methods=['post'])
     def update_status(self, request, pk=None):
         order = self.get_object()
@@ -305,67 +160,68 @@ class OrderViewSet(viewsets.ModelViewSet):
         if status_value == 'confirmed':
             # Notify customer that their order has been accepted
             create_notification(
-                recipient_id=order.user.id,
+                recipient_id=order.user_id,
                 notification_type='order_accepted',
                 title='Order Accepted',
                 message=f'Your order #{order.id} has been accepted by {order.restaurant.name}.',
                 sender_id=request.user.id,
-                restaurant_id=order.restaurant.id,
+                restaurant_id=order.restaurant_id,
                 order_id=order.id
             )
         elif status_value == 'cancelled':
             reason = request.data.get('reason', 'No reason provided')
             # Notify customer that their order has been rejected/cancelled
             create_notification(
-                recipient_id=order.user.id,
+                recipient_id=order.user_id,
                 notification_type='order_rejected',
                 title='Order Rejected',
                 message=f'Your order #{order.id} has been rejected by {order.restaurant.name}. Reason: {reason}',
                 sender_id=request.user.id,
-                restaurant_id=order.restaurant.id,
+                restaurant_id=order.restaurant_id,
                 order_id=order.id
             )
         elif status_value == 'ready':
             # Notify customer that their order is ready for pickup
             create_notification(
-                recipient_id=order.user.id,
+                recipient_id=order.user_id,
                 notification_type='order_ready',
                 title='Order Ready',
                 message=f'Your order #{order.id} from {order.restaurant.name} is ready for pickup.',
                 sender_id=request.user.id,
-                restaurant_id=order.restaurant.id,
+                restaurant_id=order.restaurant_id,
                 order_id=order.id
             )
         elif status_value == 'delivered':
             # Notify customer that their order has been delivered
             create_notification(
-                recipient_id=order.user.id,
+                recipient_id=order.user_id,
                 notification_type='order_delivered',
                 title='Order Delivered',
                 message=f'Your order #{order.id} from {order.restaurant.name} has been delivered.',
                 sender_id=request.user.id,
-                restaurant_id=order.restaurant.id,
+                restaurant_id=order.restaurant_id,
                 order_id=order.id
             )
         else:
             # General status update notification
             status_display = dict(Order.STATUS_CHOICES).get(status_value, status_value)
             create_notification(
-                recipient_id=order.user.id,
+                recipient_id=order.user_id,
                 notification_type='order_status_update',
                 title=f'Order Status Update: {status_display}',
                 message=f'Your order #{order.id} from {order.restaurant.name} has been updated to: {status_display}',
                 sender_id=request.user.id,
-                restaurant_id=order.restaurant.id,
+                restaurant_id=order.restaurant_id,
                 order_id=order.id
             )
         
         return Response(OrderSerializer(order).data)
 
-class PaymentViewSet(viewsets.ModelViewSet):
+class PaymentViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
     permission_classes = [IsAuthenticated, IsOrderOwnerOrRestaurantOwnerOrAdmin]
+    pagination_class = PaymentCursorPagination
     
     def get_queryset(self):
         user = self.request.user
@@ -393,25 +249,74 @@ class PaymentViewSet(viewsets.ModelViewSet):
 
 from django.views.decorators.csrf import csrf_exempt
 import json
-import stripe
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.http import JsonResponse
-
-stripe.api_key = settings.STRIPE_SECRET_KEY
+from users.authentication import arequest_user
+from .payments import GatewayError, amount_in_cents, get_gateway
+from .pricing import PricingError, order_amount
 
 @csrf_exempt  # Disable CSRF protection for this view
-def create_payment_intent(request):
-    if request.method == 'POST':
-        try:
-            data = json.loads(request.body)
-            amount = data.get('amount')  # Amount should be in cents (e.g., $10 = 1000)
+async def create_payment_intent(request):
+    """
+    Create the provider payment intent for one of the user's orders.
 
-            # Create a PaymentIntent with the provided amount
-            intent = stripe.PaymentIntent.create(
-                amount=amount,
-                currency='usd',  # Change to your preferred currency
-            )
+    Async so that waiting on the payment provider doesn't pin a worker. The
+    amount is priced from the menu, never from client-supplied figures, and
+    the provider call is keyed on the order so a retried request gets the
+    same intent back. A request with an Idempotency-Key runs at most once per
+    key, like order creation.
+    """
+    if request.method != 'POST':
+        return JsonResponse({'detail': 'Method not allowed.'}, status=405)
 
-            return JsonResponse({'clientSecret': intent.client_secret})
-        except Exception as e:
-            return JsonResponse({'error': str(e)}, status=400)
\ No newline at end of file
+    user = await arequest_user(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided.'}, status=401)
+
+    try:
+        order_id = int(json.loads(request.body).get('order'))
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'detail': 'An order id is required.'}, status=400)
+
+    # Keyed on the caller: the middleware's request.user doesn't know token auth
+    request.user = user
+    return await aidempotent(
+        request, 'orders.payment_intent', {'order': order_id},
+        lambda: _payment_intent_response(user, order_id),
+        lambda body, status_code: JsonResponse(body, status=status_code),
+    )
+
+
+async def _payment_intent_response(user, order_id):
+    order = await Order.objects.select_related('payment').filter(id=order_id, user=user).afirst()
+    if order is None:
+        return JsonResponse({'detail': 'Order not found.'}, status=404)
+    if order.status == 'cancelled':
+        return JsonResponse({'detail': 'This order has been cancelled.'}, status=400)
+    payment = getattr(order, 'payment', None)
+    if payment is not None and payment.status == 'completed':
+        return JsonResponse({'detail': 'This order has already been paid.'}, status=400)
+
+    try:
+        amount = amount_in_cents(await sync_to_async(order_amount)(order))
+    except PricingError as e:
+        return JsonResponse({'detail': str(e)}, status=400)
+    if amount <= 0:
+        return JsonResponse({'detail': 'This order has nothing to pay.'}, status=400)
+
+    try:
+        intent = await get_gateway().acreate_payment_intent(
+            amount,
+            settings.PAYMENT_CURRENCY,
+            # Includes the amount: the provider rejects a reused key with different parameters
+            idempotency_key=f'order-{order.id}-{amount}',
+            metadata={'order_id': order.id},
+        )
+    except GatewayError as e:
+        return JsonResponse({'detail': str(e)}, status=502)
+
+    if payment is not None:
+        await Payment.objects.filter(id=payment.id).aupdate(transaction_id=intent.id)
+
+    return JsonResponse({'clientSecret': intent.client_secret, 'amount': intent.amount, 'currency': intent.currency})
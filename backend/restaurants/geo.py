@@ -0,0 +1,101 @@
+import math
+
+# Geohash cells: each extra character splits a cell into 32, alternating longitude and latitude bits
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+GEOHASH_PRECISION = 9  # cells of about 5m x 5m
+# Searches start in cells of about 5km x 5km and widen from there
+START_PRECISION = 5
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+
+
+def encode(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        coordinate, span = (longitude, lng_range) if even else (latitude, lat_range)
+        middle = (span[0] + span[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            span[0] = middle
+        else:
+            span[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return ''.join(chars)
+
+
+def cell_degrees(precision):
+    """(height, width) in degrees of the cells of a precision"""
+    total_bits = 5 * precision
+    lat_bits, lng_bits = total_bits // 2, total_bits - total_bits // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def neighborhood(latitude, longitude, precision):
+    """
+    The cell of the point and the 8 around it, and how far from the point
+    that block is guaranteed to reach in every direction (km).
+    """
+    height, width = cell_degrees(precision)
+    cells = set()
+    for lat_step in (-1, 0, 1):
+        for lng_step in (-1, 0, 1):
+            lat = min(max(latitude + lat_step * height, -90.0), 90.0 - 1e-9)
+            lng = (longitude + lng_step * width + 180.0) % 360.0 - 180.0
+            cells.add(encode(lat, lng, precision))
+    # Longitude degrees shrink towards the poles; use the width at the block's far edge
+    far_latitude = min(abs(latitude) + 2 * height, 90.0)
+    reach = min(height * KM_PER_DEGREE, width * KM_PER_DEGREE * math.cos(math.radians(far_latitude)))
+    return sorted(cells), reach
+
+
+def distance_km(lat1, lng1, lat2, lng2):
+    """Great-circle (haversine) distance"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def _in_cells(cells):
+    # Every geohash in a cell starts with the cell's hash, so each cell is an index range
+    from django.db.models import Q
+    condition = Q()
+    for cell in cells:
+        condition |= Q(geohash__gte=cell, geohash__lt=cell + '~')
+    return condition
+
+
+def nearest(queryset, latitude, longitude, limit, radius_km=None):
+    """
+    [(restaurant id, distance km)] of the `limit` restaurants of `queryset`
+    nearest to the point, nearest first, optionally within `radius_km`.
+
+    Looks in the 3x3 block of geohash cells around the point and widens the
+    cells until the block provably holds the nearest `limit` (or everything
+    within the radius), so only nearby rows are read.
+    """
+    queryset = queryset.filter(geohash__gt='')
+    precision = START_PRECISION
+    while True:
+        if precision:
+            cells, reach = neighborhood(latitude, longitude, precision)
+            candidates = queryset.filter(_in_cells(cells))
+        else:
+            # Past the coarsest cells: the whole table
+            candidates, reach = queryset, math.inf
+        found = sorted(
+            (distance_km(latitude, longitude, lat, lng), restaurant_id)
+            for restaurant_id, lat, lng in candidates.values_list('id', 'latitude', 'longitude')
+        )
+        if radius_km is not None:
+            found = [(distance, restaurant_id) for distance, restaurant_id in found if distance <= radius_km]
+        # Anything outside the block is farther than `reach`
+        complete = reach >= radius_km if radius_km is not None else False
+        if complete or (len(found) >= limit and found[limit - 1][0] <= reach) or not precision:
+            return [(restaurant_id, distance) for distance, restaurant_id in found[:limit]]
+        precision -= 1
@@ -0,0 +1,93 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import time as clock_time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from users.models import User
+from restaurants.models import Restaurant
+from restaurants.geo import distance_km, nearest
+
+# (latitude, longitude) of a few cities the restaurants cluster around
+CITIES = [(30.0444, 31.2357), (31.2001, 29.9187), (25.6872, 32.6396), (40.7128, -74.0060), (51.5074, -0.1278)]
+# Opening hours, including ones past midnight and around the clock
+HOURS = [(9, 22), (11, 23), (18, 2), (20, 4), (0, 0), (7, 15)]
+
+
+class Command(BaseCommand):
+    help = 'Compare nearest-restaurant lookups through the geohash index with a full scan (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--restaurants', type=int, default=50_000, help='Restaurants seeded before searching')
+        parser.add_argument('--queries', type=int, default=50, help='Random points searched from')
+        parser.add_argument('--limit', type=int, default=10, help='Restaurants returned per search')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.seed(options['restaurants'])
+            randomness = random.Random(1)
+            points = [self.near_city(randomness) for _ in range(options['queries'])]
+            moment = clock_time(1, 0)
+            queryset = Restaurant.objects.filter(is_active=True, is_approved=True).open_at(moment)
+
+            self.stdout.write(
+                f"{options['restaurants']} restaurants, {options['queries']} searches for the nearest "
+                f"{options['limit']} open at {moment:%H:%M}"
+            )
+            self.stdout.write(f"{'method':<16}{'median ms':>11}{'p95 ms':>9}")
+            results = {}
+            for method, search in (('geohash', self.indexed), ('full scan', self.full_scan)):
+                durations, results[method] = [], []
+                for latitude, longitude in points:
+                    start = time.perf_counter()
+                    found = search(queryset, latitude, longitude, options['limit'])
+                    durations.append(time.perf_counter() - start)
+                    results[method].append([round(distance, 6) for _, distance in found])
+                durations.sort()
+                self.stdout.write(
+                    f'{method:<16}{statistics.median(durations) * 1000:>11.1f}'
+                    f'{durations[int(len(durations) * 0.95) - 1] * 1000:>9.1f}'
+                )
+            # Ties can come back in either order, so compare the distances
+            if results['geohash'] != results['full scan']:
+                raise CommandError('The geohash search and the full scan disagree')
+            transaction.set_rollback(True)
+
+    def indexed(self, queryset, latitude, longitude, limit):
+        return nearest(queryset, latitude, longitude, limit)
+
+    def full_scan(self, queryset, latitude, longitude, limit):
+        # What a client does with the whole restaurant list
+        found = sorted(
+            (distance_km(latitude, longitude, lat, lng), restaurant_id)
+            for restaurant_id, lat, lng in queryset.exclude(latitude=None).values_list('id', 'latitude', 'longitude')
+        )
+        return [(restaurant_id, distance) for distance, restaurant_id in found[:limit]]
+
+    def near_city(self, randomness):
+        latitude, longitude = randomness.choice(CITIES)
+        # Within about 30km
+        return latitude + randomness.uniform(-0.3, 0.3), longitude + randomness.uniform(-0.3, 0.3)
+
+    def seed(self, count):
+        suffix = uuid.uuid4().hex[:8]
+        owners = User.objects.bulk_create([
+            User(username=f'nearby-{suffix}-{i}', user_type='restaurant') for i in range(count)
+        ], batch_size=2000)
+        randomness = random.Random(0)
+        restaurants = []
+        for i, owner in enumerate(owners):
+            opening, closing = randomness.choice(HOURS)
+            restaurant = Restaurant(
+                owner=owner, name=f'Nearby {i}', description='-', address='-', phone_number='0',
+                opening_time=clock_time(opening), closing_time=clock_time(closing),
+                is_active=True, is_approved=randomness.random() > 0.1,
+            )
+            restaurant.latitude, restaurant.longitude = self.near_city(randomness)
+            # bulk_create() skips save(), which fills the geohash
+            restaurant.geohash = restaurant.compute_geohash()
+            restaurants.append(restaurant)
+        Restaurant.objects.bulk_create(restaurants, batch_size=2000)
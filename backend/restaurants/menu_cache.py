@@ -0,0 +1,138 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import models, transaction
+from django.http import HttpResponse
+from rest_framework.renderers import JSONRenderer
+from uchef_project.querysets import UpdateSignalQuerySet
+
+# Serialized menu pages, kept per restaurant under a version that every menu write bumps
+MENU_TIMEOUT = 60 * 60
+STATS_KEYS = {'hits': 'menu:stats:hits', 'misses': 'menu:stats:misses'}
+
+
+def _version_key(restaurant_id):
+    return f'menu:{restaurant_id}:version'
+
+
+def menu_version(restaurant_id):
+    key = _version_key(restaurant_id)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock rather than 1: if the counter is evicted, old
+        # snapshots must not come back under a reused version number
+        cache.add(key, int(time.time() * 1000), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_menu_versions(restaurant_ids):
+    """Move the menus of `restaurant_ids` to a new version once the current transaction commits"""
+    restaurant_ids = {restaurant_id for restaurant_id in restaurant_ids if restaurant_id is not None}
+    if not restaurant_ids:
+        return
+
+    def bump():
+        for restaurant_id in restaurant_ids:
+            try:
+                cache.incr(_version_key(restaurant_id))
+            except ValueError:
+                # Never read yet, so there's nothing cached to invalidate
+                pass
+
+    # After commit, so a concurrent reader can't cache pre-commit data under the new version
+    transaction.on_commit(bump)
+
+
+def _count(name):
+    key = STATS_KEYS[name]
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def get_menu_bytes(restaurant_id, variant, build):
+    """
+    Return the JSON bytes of one menu page.
+
+    `variant` identifies the page within the restaurant's menu (the request
+    URL); `build()` renders the bytes and is only called on a miss.
+    """
+    digest = hashlib.md5(variant.encode()).hexdigest()
+    key = f'menu:{restaurant_id}:v{menu_version(restaurant_id)}:{digest}'
+    body = cache.get(key)
+    if body is not None:
+        _count('hits')
+        return body
+
+    _count('misses')
+    body = build()
+    cache.set(key, body, MENU_TIMEOUT)
+    return body
+
+
+def cached_menu_response(request, restaurant_id, build_response):
+    """Serve a menu page from cached bytes; `build_response()` returns the DRF Response rendered on a miss"""
+    body = get_menu_bytes(
+        restaurant_id, request.build_absolute_uri(), lambda: JSONRenderer().render(build_response().data)
+    )
+    return HttpResponse(body, content_type='application/json')
+
+
+def menu_cache_stats():
+    hits, misses = (cache.get(STATS_KEYS[name], 0) for name in ('hits', 'misses'))
+    lookups = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': round(hits / lookups, 4) if lookups else None,
+    }
+
+
+def reset_menu_cache_stats():
+    cache.delete_many(list(STATS_KEYS.values()))
+
+
+class MenuQuerySet(UpdateSignalQuerySet):
+    """
+    QuerySet for models that make up a restaurant's menu.
+
+    Bulk writes (update, bulk_create, bulk_update) don't send model signals,
+    so they bump the affected menus here. `menu_restaurant_lookup` is the
+    path from the model to its restaurant id.
+    """
+    menu_restaurant_lookup = 'restaurant_id'
+
+    def menu_restaurant_ids(self):
+        return set(
+            self.order_by().filter(**{f'{self.menu_restaurant_lookup}__isnull': False})
+            .values_list(self.menu_restaurant_lookup, flat=True).distinct()
+        )
+
+    def _bump_rows(self, pks):
+        bump_menu_versions(type(self)(self.model, using=self.db).filter(pk__in=pks).menu_restaurant_ids())
+
+    def update(self, **kwargs):
+        # An update that re-parents rows also changes the menus they move to
+        parent = self.menu_restaurant_lookup.split('__')[0].removesuffix('_id')
+        moved_pks = list(self.values_list('pk', flat=True)) if {parent, f'{parent}_id'} & kwargs.keys() else []
+
+        restaurant_ids = self.menu_restaurant_ids()
+        updated = super().update(**kwargs)
+        bump_menu_versions(restaurant_ids)
+        if moved_pks:
+            self._bump_rows(moved_pks)
+        return updated
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        self._bump_rows([obj.pk for obj in objs if obj.pk is not None])
+        return objs
+
+    def bulk_update(self, objs, *args, **kwargs):
+        updated = super().bulk_update(objs, *args, **kwargs)
+        self._bump_rows([obj.pk for obj in objs])
+        return updated
@@ -0,0 +1,19 @@
+# Generated by Django 5.2 on 2026-10-18 00:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('restaurants', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='restaurant',
+            index=models.Index(fields=['-created_at', '-id'], name='restaurant_created_idx'),
+        ),
+    ]
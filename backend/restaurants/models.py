@@ -1,5 +1,24 @@
 from django.db import models
 from django.conf import settings
+from .menu_cache import MenuQuerySet
+from .signals import stock_changed
+from .geo import encode, GEOHASH_PRECISION
+from uchef_project.querysets import UpdateSignalQuerySet
+
+class RestaurantQuerySet(UpdateSignalQuerySet):
+    # What the search index and suggestions are built from
+    SIGNALED_FIELDS = frozenset({'name', 'description', 'address', 'is_active', 'is_approved'})
+    
+    def open_at(self, moment):
+        """Restaurants whose opening hours include the time `moment`"""
+        same_day = models.Q(opening_time__lt=models.F('closing_time'), opening_time__lte=moment, closing_time__gt=moment)
+        # e.g. 18:00-02:00 is open from the evening until past midnight
+        overnight = models.Q(opening_time__gt=models.F('closing_time')) & (
+            models.Q(opening_time__lte=moment) | models.Q(closing_time__gt=moment)
+        )
+        # Opening and closing at the same time means open around the clock
+        all_day = models.Q(opening_time=models.F('closing_time'))
+        return self.filter(same_day | overnight | all_day)
 
 class Restaurant(models.Model):
     owner = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='restaurant')
@@ -10,14 +29,62 @@ class Restaurant(models.Model):
     logo = models.ImageField(upload_to='restaurant_logos/', blank=True, null=True)
     opening_time = models.TimeField()
     closing_time = models.TimeField()
+    latitude = models.FloatField(null=True, blank=True)
+    longitude = models.FloatField(null=True, blank=True)
+    # Geohash of the coordinates (empty without them), kept in sync by save()
+    geohash = models.CharField(max_length=GEOHASH_PRECISION, blank=True, default='', editable=False)
     is_active = models.BooleanField(default=True)
     is_approved = models.BooleanField(null=True, default=None)  # None = pending, True = approved, False = rejected
     rejection_reason = models.TextField(blank=True, null=True)
+    # Running rating aggregates, kept in sync by reviews.ratings
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    avg_rating = models.FloatField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = RestaurantQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='restaurant_created_idx'),
+            models.Index(fields=['is_active', 'is_approved'], name='restaurant_active_idx'),
+            models.Index(fields=['-avg_rating', '-review_count'], name='restaurant_rating_idx'),
+            models.Index(fields=['geohash'], name='restaurant_geohash_idx'),
+        ]
+    
     def __str__(self):
         return self.name
+    
+    def save(self, *args, **kwargs):
+        self.geohash = self.compute_geohash()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitude', 'longitude'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'geohash'}
+        super().save(*args, **kwargs)
+    
+    def compute_geohash(self):
+        if self.latitude is None or self.longitude is None:
+            return ''
+        return encode(self.latitude, self.longitude)
+
+class IngredientQuerySet(MenuQuerySet):
+    STOCK_FIELDS = {'quantity', 'is_available'}
+    SIGNALED_FIELDS = frozenset({'name'})  # suggested by name
+
+    def update(self, **kwargs):
+        if not self.STOCK_FIELDS & kwargs.keys():
+            return super().update(**kwargs)
+        ingredient_ids = list(self.values_list('pk', flat=True))
+        updated = super().update(**kwargs)
+        stock_changed.send(sender=self.model, ingredient_ids=ingredient_ids)
+        return updated
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        updated = super().bulk_update(objs, fields, *args, **kwargs)
+        if self.STOCK_FIELDS & set(fields):
+            stock_changed.send(sender=self.model, ingredient_ids=[obj.pk for obj in objs])
+        return updated
 
 class Ingredient(models.Model):
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='ingredients')
@@ -27,6 +94,14 @@ class Ingredient(models.Model):
     unit = models.CharField(max_length=50)  # e.g., kg, g, pieces
     price_per_unit = models.DecimalField(max_digits=10, decimal_places=2)
     is_available = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    objects = IngredientQuerySet.as_manager()
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['restaurant', 'is_available'], name='ingredient_available_idx'),
+        ]
     
     def __str__(self):
         return f"{self.name} ({self.restaurant.name})"
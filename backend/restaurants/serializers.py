@@ -9,9 +9,21 @@ class RestaurantSerializer(serializers.ModelSerializer):
     class Meta:
         model = Restaurant
         fields = ['id', 'name', 'description', 'address', 'phone_number', 
-                  'logo', 'opening_time', 'closing_time', 'is_active', 'is_approved',
-                  'rejection_reason', 'owner_id', 'owner_username', 'owner_details']
-        read_only_fields = ['id']
+                  'logo', 'opening_time', 'closing_time', 'latitude', 'longitude', 'is_active', 'is_approved',
+                  'rejection_reason', 'avg_rating', 'review_count', 'owner_id', 'owner_username', 'owner_details']
+        read_only_fields = ['id', 'avg_rating', 'review_count']
+        extra_kwargs = {
+            'latitude': {'min_value': -90, 'max_value': 90},
+            'longitude': {'min_value': -180, 'max_value': 180},
+        }
+    
+    def validate(self, data):
+        # Coordinates only make sense as a pair
+        latitude = data.get('latitude', getattr(self.instance, 'latitude', None))
+        longitude = data.get('longitude', getattr(self.instance, 'longitude', None))
+        if (latitude is None) != (longitude is None):
+            raise serializers.ValidationError({'latitude': 'Latitude and longitude must be set together.'})
+        return data
         
     def get_owner_details(self, obj):
         if not obj.owner:
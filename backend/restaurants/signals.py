@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent after a bulk write changed the stock (quantity or availability) of
+# ingredients without going through Ingredient.save(); provides `ingredient_ids`
+stock_changed = Signal()
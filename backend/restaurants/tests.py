@@ -1,3 +1,49 @@
+from datetime import time
+
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.models import User
+from .models import Restaurant
+
+NEARBY_URL = '/api/restaurants/restaurants/nearby/'
+
+
+class NearbyTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        owner = User.objects.create_user(username='owner', password='x', user_type='restaurant')
+        cls.restaurant = Restaurant.objects.create(
+            owner=owner, name='Test', description='-', address='-', phone_number='0',
+            opening_time=time(12, 0), closing_time=time(22, 0), is_active=True, is_approved=True,
+            latitude=30.0444, longitude=31.2357,
+        )
+
+    def nearby(self, **params):
+        return APIClient().get(NEARBY_URL, {'lat': 30.05, 'lng': 31.24, 'open_now': 'true', **params})
+
+    def test_open_at_a_given_time(self):
+        open_response, closed_response = self.nearby(at='18:30'), self.nearby(at='23:00')
+        self.assertEqual((open_response.status_code, closed_response.status_code), (200, 200))
+        self.assertEqual(len(open_response.data), 1)
+        self.assertEqual(len(closed_response.data), 0)
+
+    def test_malformed_time_is_rejected(self):
+        # 25:99 looks like a time but is out of range, which parse_time raises on
+        for at in ('25:99', '18:60', 'evening'):
+            response = self.nearby(at=at)
+            self.assertEqual(response.status_code, 400, at)
+            self.assertEqual(response.data['detail'], 'at must be a time such as 18:30.')
+
+    def test_non_finite_coordinates_are_rejected(self):
+        for params in ({'lat': 'nan'}, {'lng': 'inf'}, {'lat': '-Infinity'}, {'radius': 'nan'}, {'radius': 'inf'}, {'lat': 'abc'}):
+            response = self.nearby(**params)
+            self.assertEqual(response.status_code, 400, params)
+            self.assertEqual(
+                response.data['detail'], 'Numeric lat and lng query parameters are required (radius is optional).', params,
+            )
 
-# Create your tests here.
+    def test_radius_bounds_the_search(self):
+        self.assertEqual(len(self.nearby(radius='5', at='18:30').data), 1)
+        self.assertEqual(self.nearby(radius='0', at='18:30').status_code, 400)
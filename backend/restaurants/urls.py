@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RestaurantViewSet, IngredientViewSet
+from .views import RestaurantViewSet, IngredientViewSet, AsyncRestaurantView
 
 router = DefaultRouter()
 router.register(r'restaurants', RestaurantViewSet, basename='restaurant')
@@ -8,4 +8,7 @@ router.register(r'ingredients', IngredientViewSet, basename='ingredient')
 
 urlpatterns = [
     path('', include(router.urls)),
+    # ASGI-native read path
+    path('async/restaurants/', AsyncRestaurantView.as_view(), name='async-restaurant-list'),
+    path('async/restaurants/<int:pk>/', AsyncRestaurantView.as_view(), name='async-restaurant-detail'),
 ]
@@ -1,10 +1,24 @@
+import math
+
 from rest_framework import viewsets, permissions, status, filters
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny
 from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_time
 from .models import Restaurant, Ingredient
 from .serializers import RestaurantSerializer, IngredientSerializer
+from uchef_project.pagination import MenuCursorPagination, IdCursorPagination
+from uchef_project.conditional import collection_state, collection_validators, conditional_response
+from .menu_cache import cached_menu_response, menu_cache_stats
+from reviews.leaderboards import get_leaderboard, LEADERBOARD_SIZE, TOP_RATED_LIMIT, TOP_RESTAURANTS
+from uchef_project.async_views import AsyncReadView
+from search.filters import FullTextSearchFilter
+from .geo import nearest
+
+NEARBY_LIMIT = 10
+MAX_NEARBY_LIMIT = 50
 
 class IsOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -27,23 +41,98 @@ class IsRestaurantOwnerOrReadOnly(permissions.BasePermission):
 class RestaurantViewSet(viewsets.ModelViewSet):
     serializer_class = RestaurantSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrReadOnly]
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [FullTextSearchFilter, filters.OrderingFilter]
+    search_kind = 'restaurant'
     search_fields = ['name', 'description', 'address']
-    ordering_fields = ['name', 'created_at']
+    ordering_fields = ['name', 'created_at', 'avg_rating']
     
     def get_queryset(self):
         # For admin users, show all restaurants
+        # The serializer nests owner details
+        queryset = Restaurant.objects.select_related('owner')
         if self.request.user.is_authenticated and self.request.user.user_type == 'admin':
-            return Restaurant.objects.all()
+            return queryset
             
         # For public users, only show active and approved restaurants
-        return Restaurant.objects.filter(is_active=True, is_approved=True)
+        return queryset.filter(is_active=True, is_approved=True)
     
     def get_permissions(self):
-        if self.action in ['list', 'retrieve']:
+        if self.action in ['list', 'retrieve', 'top_rated', 'nearby']:
             return [AllowAny()]
         return super().get_permissions()
     
+    @action(detail=False, methods=['get'], url_path='top-rated', url_name='top-rated')
+    def top_rated(self, request):
+        """Get the top-rated restaurants serving a meal category"""
+        category_id = request.query_params.get('category')
+        if not category_id or not category_id.isdigit():
+            return Response({'detail': 'A numeric category query parameter is required.'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        def build():
+            queryset = Restaurant.objects.filter(
+                is_active=True, is_approved=True, review_count__gt=0,
+                id__in=Restaurant.objects.filter(meals__category_id=category_id).values('id'),
+            ).select_related('owner').order_by('-avg_rating', '-review_count')
+            return RestaurantSerializer(queryset[:LEADERBOARD_SIZE], many=True).data
+        
+        try:
+            limit = max(1, min(int(request.query_params.get('limit', TOP_RATED_LIMIT)), LEADERBOARD_SIZE))
+        except ValueError:
+            limit = TOP_RATED_LIMIT
+        return Response(get_leaderboard(TOP_RESTAURANTS, int(category_id), build, limit))
+    
+    @action(detail=False, methods=['get'])
+    def nearby(self, request):
+        """
+        The restaurants nearest to `lat`/`lng`, nearest first, with their distance.
+        
+        `radius` (km) bounds the search, `open_now=true` keeps only restaurants
+        open at the server's local time, or at `at` (HH:MM) if given.
+        """
+        params = request.query_params
+        try:
+            latitude, longitude = float(params['lat']), float(params['lng'])
+            radius = float(params['radius']) if params.get('radius') else None
+            # float() accepts nan and inf, which slip through the range checks below
+            if not all(math.isfinite(value) for value in (latitude, longitude, radius) if value is not None):
+                raise ValueError('lat, lng and radius must be finite')
+        except (KeyError, ValueError):
+            return Response({'detail': 'Numeric lat and lng query parameters are required (radius is optional).'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        if not (-90 <= latitude <= 90 and -180 <= longitude <= 180) or (radius is not None and radius <= 0):
+            return Response({'detail': 'lat, lng or radius is out of range.'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            limit = max(1, min(int(params.get('limit', NEARBY_LIMIT)), MAX_NEARBY_LIMIT))
+        except ValueError:
+            limit = NEARBY_LIMIT
+        
+        queryset = Restaurant.objects.filter(is_active=True, is_approved=True)
+        if params.get('open_now') in ('1', 'true'):
+            try:
+                moment = parse_time(params['at']) if params.get('at') else timezone.localtime().time()
+            except ValueError:
+                # Well formed but out of range, e.g. 25:99
+                moment = None
+            if moment is None:
+                return Response({'detail': 'at must be a time such as 18:30.'},
+                               status=status.HTTP_400_BAD_REQUEST)
+            queryset = queryset.open_at(moment)
+        
+        found = nearest(queryset, latitude, longitude, limit, radius)
+        restaurants = Restaurant.objects.select_related('owner').in_bulk([restaurant_id for restaurant_id, _ in found])
+        results = []
+        for restaurant_id, distance in found:
+            if restaurant_id not in restaurants:
+                # Deleted in between
+                continue
+            data = RestaurantSerializer(restaurants[restaurant_id], context={'request': request}).data
+            data['distance_km'] = round(distance, 3)
+            results.append(data)
+        return Response(results)
+    
     def perform_create(self, serializer):
         # For admin users, the owner_id is handled in the serializer's create method
         # For regular restaurant owners, use the current user
@@ -64,17 +153,48 @@ class RestaurantViewSet(viewsets.ModelViewSet):
     @action(detail=True, methods=['get'])
     def meals(self, request, pk=None):
         restaurant = self.get_object()
-        meals = restaurant.meals.all()
         from meals.serializers import MealSerializer
-        serializer = MealSerializer(meals, many=True)
-        return Response(serializer.data)
+        validators = collection_validators(
+            (1, restaurant.updated_at),
+            collection_state(restaurant.meals.all()),
+            collection_state(restaurant.ingredients.all()),
+        )
+        
+        def build_response():
+            meals = MealSerializer.setup_eager_loading(restaurant.meals.all())
+            paginator = MenuCursorPagination()
+            page = paginator.paginate_queryset(meals, request, view=self)
+            serializer = MealSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+        
+        return conditional_response(
+            request, validators, lambda: cached_menu_response(request, restaurant.id, build_response)
+        )
     
     @action(detail=True, methods=['get'], permission_classes=[AllowAny])
     def ingredients(self, request, pk=None):
         restaurant = self.get_object()
-        ingredients = restaurant.ingredients.all()
-        serializer = IngredientSerializer(ingredients, many=True)
-        return Response(serializer.data)
+        validators = collection_validators((1, restaurant.updated_at), collection_state(restaurant.ingredients.all()))
+        
+        def build_response():
+            ingredients = restaurant.ingredients.select_related('restaurant')
+            # Ingredients have no created_at, so page by id and ignore the restaurant ordering params
+            paginator = IdCursorPagination()
+            page = paginator.paginate_queryset(ingredients, request)
+            serializer = IngredientSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
+        
+        return conditional_response(request, validators, build_response)
+    
+    @action(detail=False, methods=['get'], url_path='menu-cache-stats', permission_classes=[IsAuthenticated])
+    def menu_cache_stats(self, request):
+        """Hit/miss counters of the restaurant menu cache (admin only)"""
+        if request.user.user_type != 'admin':
+            return Response(
+                {'detail': 'Only admins can access this endpoint.'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        return Response(menu_cache_stats())
     
     @action(detail=False, methods=['get'], url_path='my-restaurant', permission_classes=[IsAuthenticated])
     def my_restaurant(self, request):
@@ -99,6 +219,7 @@ class RestaurantViewSet(viewsets.ModelViewSet):
 class IngredientViewSet(viewsets.ModelViewSet):
     serializer_class = IngredientSerializer
     permission_classes = [IsAuthenticated, IsRestaurantOwnerOrReadOnly]
+    pagination_class = IdCursorPagination
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'description']
     
@@ -134,3 +255,8 @@ class IngredientViewSet(viewsets.ModelViewSet):
                            status=status.HTTP_403_FORBIDDEN)
         
         serializer.save()
+
+
+class AsyncRestaurantView(AsyncReadView):
+    """Restaurant list and detail on the ASGI read path"""
+    viewset_class = RestaurantViewSet
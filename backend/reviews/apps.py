@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ReviewsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'reviews'
+    
+    def ready(self):
+        # Keep the rating aggregates on meals, custom meals and restaurants in sync
+        from . import signals  # noqa: F401
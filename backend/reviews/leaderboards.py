@@ -0,0 +1,82 @@
+from django.core.cache import cache
+from django.db import transaction
+from meals.models import Meal
+from .models import RestaurantReview, MealReview, CustomMealReview
+
+# Leaderboards and the scope each one is kept per
+TOP_MEALS = 'meals'                  # per restaurant id
+TOP_RESTAURANTS = 'restaurants'      # per meal category id
+TOP_CUSTOM_MEALS = 'custom_meals'    # a single public board
+
+PUBLIC_SCOPE = 'public'
+
+# Entries materialized per leaderboard; `limit` slices this without recomputing
+LEADERBOARD_SIZE = 50
+# Entries the top-rated endpoints return unless asked for a `limit`
+TOP_RATED_LIMIT = 10
+LEADERBOARD_TIMEOUT = 60 * 60
+
+
+def _version_key(board, scope):
+    return f'leaderboard:{board}:{scope}:version'
+
+
+def _version(board, scope):
+    key = _version_key(board, scope)
+    version = cache.get(key)
+    if version is None:
+        # add() so concurrent first readers agree on the same version
+        cache.add(key, 1, timeout=None)
+        version = cache.get(key, 1)
+    return version
+
+
+def get_leaderboard(board, scope, build, limit=TOP_RATED_LIMIT):
+    """
+    Return the first `limit` entries of a leaderboard.
+
+    The ranking is built once with `build()` (which returns up to
+    LEADERBOARD_SIZE serialized rows) and cached under the board's current
+    version, so reads never touch the database until the board is invalidated.
+    """
+    limit = max(0, min(limit, LEADERBOARD_SIZE))
+    key = f'leaderboard:{board}:{scope}:v{_version(board, scope)}'
+    entries = cache.get(key)
+    if entries is None:
+        entries = build()
+        cache.set(key, entries, LEADERBOARD_TIMEOUT)
+    return entries[:limit]
+
+
+def invalidate(board, scope):
+    """Move a leaderboard to a new version; the old entries simply expire"""
+    key = _version_key(board, scope)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def invalidate_for_review(review_model, target_id):
+    """Invalidate only the leaderboards a review of `target_id` can move, once the change is committed"""
+    if review_model is MealReview:
+        restaurant_id = Meal.objects.filter(pk=target_id).values_list('restaurant_id', flat=True).first()
+        boards = [(TOP_MEALS, restaurant_id)] if restaurant_id else []
+    elif review_model is RestaurantReview:
+        # A restaurant ranks in the board of every category it serves
+        category_ids = (
+            Meal.objects.filter(restaurant_id=target_id, category__isnull=False)
+            .order_by().values_list('category_id', flat=True).distinct()
+        )
+        boards = [(TOP_RESTAURANTS, category_id) for category_id in category_ids]
+    elif review_model is CustomMealReview:
+        boards = [(TOP_CUSTOM_MEALS, PUBLIC_SCOPE)]
+    else:
+        boards = []
+
+    def bump():
+        for board, scope in boards:
+            invalidate(board, scope)
+
+    # Bumping after commit keeps a concurrent reader from caching pre-commit data under the new version
+    transaction.on_commit(bump)
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from reviews.ratings import RATED_TARGETS, rebuild_ratings
+
+
+class Command(BaseCommand):
+    help = 'Recompute the rating aggregates of restaurants, meals and custom meals from their reviews'
+
+    def handle(self, *args, **options):
+        for review_model, (_, target_model) in RATED_TARGETS.items():
+            updated = rebuild_ratings(review_model)
+            self.stdout.write(f'{target_model._meta.verbose_name_plural}: {updated} rebuilt')
+        self.stdout.write(self.style.SUCCESS('Rating aggregates rebuilt'))
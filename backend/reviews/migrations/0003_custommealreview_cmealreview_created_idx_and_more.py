@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 00:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0003_custommeal_custommeal_created_idx_and_more'),
+        ('restaurants', '0003_restaurant_restaurant_created_idx'),
+        ('reviews', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='custommealreview',
+            index=models.Index(fields=['-created_at', '-id'], name='cmealreview_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='mealreview',
+            index=models.Index(fields=['-created_at', '-id'], name='mealreview_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='restaurantreview',
+            index=models.Index(fields=['-created_at', '-id'], name='restreview_created_idx'),
+        ),
+    ]
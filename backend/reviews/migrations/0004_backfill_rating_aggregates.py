@@ -0,0 +1,42 @@
+from django.db import migrations
+from django.db.models import Count, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+
+TARGETS = [
+    ('RestaurantReview', 'restaurant', 'restaurants', 'Restaurant'),
+    ('MealReview', 'meal', 'meals', 'Meal'),
+    ('CustomMealReview', 'custom_meal', 'meals', 'CustomMeal'),
+]
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    for review_name, field, target_app, target_name in TARGETS:
+        review_model = apps.get_model('reviews', review_name)
+        target_model = apps.get_model(target_app, target_name)
+
+        reviews = review_model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+        target_model.objects.update(
+            rating_sum=Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0, output_field=IntegerField()),
+            review_count=Coalesce(Subquery(reviews.annotate(total=Count('id')).values('total')), 0, output_field=IntegerField()),
+        )
+        target_model.objects.update(
+            avg_rating=Coalesce(
+                Cast(F('rating_sum'), FloatField()) / NullIf(F('review_count'), 0),
+                Value(0.0),
+                output_field=FloatField(),
+            )
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('meals', '0005_custommeal_avg_rating_custommeal_rating_sum_and_more'),
+        ('restaurants', '0005_restaurant_avg_rating_restaurant_rating_sum_and_more'),
+        ('reviews', '0003_custommealreview_cmealreview_created_idx_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,16 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
 from restaurants.models import Restaurant
 from meals.models import Meal, CustomMeal
 
-class RestaurantReview(models.Model):
+class AtomicSaveMixin:
+    """Save inside a transaction so the rating aggregates updated on post_save commit or roll back with the review"""
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+class RestaurantReview(AtomicSaveMixin, models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='restaurant_reviews')
     restaurant = models.ForeignKey(Restaurant, on_delete=models.CASCADE, related_name='reviews')
     rating = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
@@ -14,11 +20,14 @@ class RestaurantReview(models.Model):
     
     class Meta:
         unique_together = ('user', 'restaurant')
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='restreview_created_idx'),
+        ]
     
     def __str__(self):
         return f"Review for {self.restaurant.name} by {self.user.username}"
 
-class MealReview(models.Model):
+class MealReview(AtomicSaveMixin, models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='meal_reviews')
     meal = models.ForeignKey(Meal, on_delete=models.CASCADE, related_name='reviews')
     rating = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
@@ -28,11 +37,14 @@ class MealReview(models.Model):
     
     class Meta:
         unique_together = ('user', 'meal')
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='mealreview_created_idx'),
+        ]
     
     def __str__(self):
         return f"Review for {self.meal.name} by {self.user.username}"
 
-class CustomMealReview(models.Model):
+class CustomMealReview(AtomicSaveMixin, models.Model):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='custom_meal_reviews')
     custom_meal = models.ForeignKey(CustomMeal, on_delete=models.CASCADE, related_name='reviews')
     rating = models.PositiveSmallIntegerField(validators=[MinValueValidator(1), MaxValueValidator(5)])
@@ -42,6 +54,9 @@ class CustomMealReview(models.Model):
     
     class Meta:
         unique_together = ('user', 'custom_meal')
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='cmealreview_created_idx'),
+        ]
     
     def __str__(self):
         return f"Review for {self.custom_meal.name} by {self.user.username}"
@@ -0,0 +1,58 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db import transaction
+from django.db.models import Count, F, FloatField, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+from restaurants.models import Restaurant
+from meals.models import Meal, CustomMeal
+from .models import RestaurantReview, MealReview, CustomMealReview
+
+# Review model -> (name of the FK to the reviewed object, reviewed model)
+RATED_TARGETS = {
+    RestaurantReview: ('restaurant', Restaurant),
+    MealReview: ('meal', Meal),
+    CustomMealReview: ('custom_meal', CustomMeal),
+}
+
+
+def _average(rating_sum, review_count):
+    # 0 for objects without reviews, so the column never holds NULL
+    return Coalesce(
+        Cast(rating_sum, FloatField()) / NullIf(review_count, 0),
+        Value(0.0),
+        output_field=FloatField(),
+    )
+
+
+def _touched(target_model):
+    # update() bypasses auto_now; keep updated_at moving so conditional GETs see the new aggregates
+    try:
+        target_model._meta.get_field('updated_at')
+    except FieldDoesNotExist:
+        return {}
+    return {'updated_at': timezone.now()}
+
+
+def apply_rating_change(target_model, target_id, rating_delta, count_delta):
+    """Shift the running aggregates of one reviewed object with a single UPDATE"""
+    rating_sum = F('rating_sum') + rating_delta
+    review_count = F('review_count') + count_delta
+    target_model.objects.filter(pk=target_id).update(
+        rating_sum=rating_sum,
+        review_count=review_count,
+        avg_rating=_average(rating_sum, review_count),
+        **_touched(target_model),
+    )
+
+
+def rebuild_ratings(review_model):
+    """Recompute the aggregates of every object reviewed through `review_model` in one statement"""
+    field, target_model = RATED_TARGETS[review_model]
+    reviews = review_model.objects.filter(**{field: OuterRef('pk')}).order_by().values(field)
+    rating_sum = Coalesce(Subquery(reviews.annotate(total=Sum('rating')).values('total')), 0, output_field=IntegerField())
+    review_count = Coalesce(Subquery(reviews.annotate(total=Count('id')).values('total')), 0, output_field=IntegerField())
+
+    with transaction.atomic():
+        updated = target_model.objects.update(rating_sum=rating_sum, review_count=review_count)
+        target_model.objects.update(avg_rating=_average(F('rating_sum'), F('review_count')), **_touched(target_model))
+    return updated
@@ -0,0 +1,47 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from .ratings import RATED_TARGETS, apply_rating_change
+from .leaderboards import invalidate_for_review
+
+
+def _snapshot(review):
+    """The (reviewed object id, rating) pair this review currently counts towards"""
+    field, _ = RATED_TARGETS[type(review)]
+    return getattr(review, f'{field}_id'), review.rating
+
+
+def remember_rating(sender, instance, **kwargs):
+    # Keep what was loaded from the database so an update can take it back out
+    instance._rating_snapshot = _snapshot(instance) if instance.pk else None
+
+
+def review_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+
+    _, target_model = RATED_TARGETS[sender]
+    previous = None if created else getattr(instance, '_rating_snapshot', None)
+    current = _snapshot(instance)
+
+    if previous == current:
+        return
+
+    if previous is not None:
+        apply_rating_change(target_model, previous[0], -previous[1], -1)
+        if previous[0] != current[0]:
+            invalidate_for_review(sender, previous[0])
+    apply_rating_change(target_model, current[0], current[1], 1)
+    invalidate_for_review(sender, current[0])
+    instance._rating_snapshot = current
+
+
+def review_deleted(sender, instance, **kwargs):
+    _, target_model = RATED_TARGETS[sender]
+    target_id, rating = getattr(instance, '_rating_snapshot', None) or _snapshot(instance)
+    apply_rating_change(target_model, target_id, -rating, -1)
+    invalidate_for_review(sender, target_id)
+
+
+for review_model in RATED_TARGETS:
+    post_init.connect(remember_rating, sender=review_model)
+    post_save.connect(review_saved, sender=review_model)
+    post_delete.connect(review_deleted, sender=review_model)
@@ -1,3 +1,316 @@
+from datetime import time
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, Sum
 from django.test import TestCase
+from rest_framework.test import APIClient
+
+from users.models import User
+from restaurants.models import Restaurant
+from meals.models import Meal, MealCategory, CustomMeal
+from .leaderboards import LEADERBOARD_SIZE, TOP_RATED_LIMIT
+from .models import MealReview, CustomMealReview, RestaurantReview
+from .ratings import RATED_TARGETS, rebuild_ratings
+
+MEAL_REVIEWS_URL = '/api/reviews/meal-reviews/'
+TOP_MEALS_URL = '/api/meals/meals/top-rated/'
+TOP_CUSTOM_MEALS_URL = '/api/meals/custom-meals/top-rated/'
+TOP_RESTAURANTS_URL = '/api/restaurants/restaurants/top-rated/'
+
+
+def create_meal():
+    owner = User.objects.create_user(username='owner', password='x', user_type='restaurant')
+    restaurant = Restaurant.objects.create(
+        owner=owner, name='Test', description='-', address='-', phone_number='0',
+        opening_time=time(0, 0), closing_time=time(23, 59), is_active=True, is_approved=True,
+    )
+    return Meal.objects.create(restaurant=restaurant, name='Pizza', description='-', base_price=10)
+
+
+class MealReviewListTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.meal = create_meal()
+        cls.reviewers = [
+            User.objects.create_user(username=f'customer{i}', password='x', user_type='customer') for i in range(5)
+        ]
+        for reviewer in cls.reviewers:
+            MealReview.objects.create(user=reviewer, meal=cls.meal, rating=4, comment='-')
+
+    def test_reviews_are_paged(self):
+        response = APIClient().get(MEAL_REVIEWS_URL, {'meal': self.meal.id, 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_own_review_is_found_whatever_its_page(self):
+        # The oldest review is on the last page
+        reviewer = self.reviewers[0]
+        response = APIClient().get(MEAL_REVIEWS_URL, {'meal': self.meal.id, 'user': reviewer.id, 'page_size': 2})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([review['user'] for review in response.data['results']], [reviewer.id])
+
+
+class TopRatedLimitTests(TestCase):
+    """?limit= on the top-rated endpoints is clamped, and malformed values fall back to the default"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = MealCategory.objects.create(name='Pizza')
+        cls.meal = create_meal()
+        cls.meal.category = category
+        cls.meal.save()
+        cls.restaurant, cls.category = cls.meal.restaurant, category
+        reviewer = User.objects.create_user(username='customer', password='x', user_type='customer')
+        for i in range(TOP_RATED_LIMIT + 2):
+            meal = Meal.objects.create(restaurant=cls.restaurant, name=f'Meal {i}', description='-', base_price=10)
+            MealReview.objects.create(user=reviewer, meal=meal, rating=1 + i % 5, comment='-')
+            custom_meal = CustomMeal.objects.create(user=reviewer, name=f'Mine {i}', base_meal=meal, is_public=True)
+            CustomMealReview.objects.create(user=reviewer, custom_meal=custom_meal, rating=1 + i % 5, comment='-')
+        RestaurantReview.objects.create(user=reviewer, restaurant=cls.restaurant, rating=5, comment='-')
+
+    def setUp(self):
+        cache.clear()
+
+    def boards(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.get(username='customer'))
+        return [
+            (client, TOP_MEALS_URL, {'restaurant': self.restaurant.id}, TOP_RATED_LIMIT + 2),
+            (client, TOP_CUSTOM_MEALS_URL, {}, TOP_RATED_LIMIT + 2),
+            (client, TOP_RESTAURANTS_URL, {'category': self.category.id}, 1),
+        ]
+
+    def test_malformed_limit_falls_back_to_the_default(self):
+        for client, url, params, entries in self.boards():
+            for limit in ('abc', '', '1.5'):
+                response = client.get(url, {**params, 'limit': limit})
+                self.assertEqual(response.status_code, 200, (url, limit))
+                self.assertEqual(len(response.data), min(entries, TOP_RATED_LIMIT), (url, limit))
+
+    def test_limit_is_clamped(self):
+        for client, url, params, entries in self.boards():
+            self.assertEqual(len(client.get(url, {**params, 'limit': 0}).data), 1, url)
+            self.assertEqual(len(client.get(url, {**params, 'limit': -5}).data), 1, url)
+            self.assertEqual(len(client.get(url, {**params, 'limit': 10 ** 6}).data), min(entries, LEADERBOARD_SIZE), url)
+
+
+class RunningRatingTests(TestCase):
+    """The running aggregates always equal the ones recomputed from the reviews"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.meal = create_meal()
+        cls.restaurant = cls.meal.restaurant
+        cls.reviewers = [
+            User.objects.create_user(username=f'customer{i}', password='x', user_type='customer') for i in range(4)
+        ]
+        owner = User.objects.create_user(username='other owner', password='x', user_type='restaurant')
+        cls.other_restaurant = Restaurant.objects.create(
+            owner=owner, name='Other', description='-', address='-', phone_number='0',
+            opening_time=time(0, 0), closing_time=time(23, 59), is_active=True, is_approved=True,
+        )
+        cls.other_meal = Meal.objects.create(restaurant=cls.restaurant, name='Pasta', description='-', base_price=10)
+        cls.custom_meal = CustomMeal.objects.create(user=cls.reviewers[0], name='Mine', base_meal=cls.meal, is_public=True)
+        cls.other_custom_meal = CustomMeal.objects.create(user=cls.reviewers[0], name='Yours', base_meal=cls.meal, is_public=True)
+
+    def cases(self):
+        """(review model, its FK, the two objects it can point at)"""
+        return [
+            (MealReview, 'meal', self.meal, self.other_meal),
+            (RestaurantReview, 'restaurant', self.restaurant, self.other_restaurant),
+            (CustomMealReview, 'custom_meal', self.custom_meal, self.other_custom_meal),
+        ]
+
+    def assert_aggregates_match(self):
+        for review_model, (field, target_model) in RATED_TARGETS.items():
+            expected = target_model.objects.annotate(
+                expected_sum=Sum('reviews__rating'), expected_count=Count('reviews'), expected_avg=Avg('reviews__rating'),
+            )
+            for target in expected:
+                self.assertEqual(
+                    (target.rating_sum, target.review_count), (target.expected_sum or 0, target.expected_count), target,
+                )
+                self.assertAlmostEqual(target.avg_rating, target.expected_avg or 0, msg=target)
+
+    def review(self, review_model, field, target, reviewer, rating):
+        return review_model.objects.create(user=reviewer, rating=rating, comment='-', **{field: target})
+
+    def test_create(self):
+        for review_model, field, target, other in self.cases():
+            for reviewer, rating in zip(self.reviewers, (5, 4, 2)):
+                self.review(review_model, field, target, reviewer, rating)
+            self.review(review_model, field, other, self.reviewers[3], 1)
+        self.assert_aggregates_match()
+        self.meal.refresh_from_db()
+        self.assertAlmostEqual(self.meal.avg_rating, 11 / 3)
+
+    def test_rating_update(self):
+        for review_model, field, target, other in self.cases():
+            first = self.review(review_model, field, target, self.reviewers[0], 5)
+            self.review(review_model, field, target, self.reviewers[1], 3)
+
+            # The instance that was created, then a fresh copy from the database
+            first.rating = 1
+            first.save()
+            self.assert_aggregates_match()
+            again = review_model.objects.get(pk=first.pk)
+            again.rating = 4
+            again.save()
+            # Saving without a change is not counted twice
+            again.save()
+            again.comment = 'edited'
+            again.save()
+            self.assert_aggregates_match()
+
+    def test_reassignment_to_another_object(self):
+        for review_model, field, target, other in self.cases():
+            moved = self.review(review_model, field, target, self.reviewers[0], 5)
+            self.review(review_model, field, target, self.reviewers[1], 3)
+
+            setattr(moved, field, other)
+            moved.save()
+            self.assert_aggregates_match()
+
+            # Moved back with a new rating in the same save
+            moved = review_model.objects.get(pk=moved.pk)
+            setattr(moved, field, target)
+            moved.rating = 2
+            moved.save()
+            self.assert_aggregates_match()
+
+    def test_delete(self):
+        for review_model, field, target, other in self.cases():
+            reviews = [self.review(review_model, field, target, reviewer, rating) for reviewer, rating in zip(self.reviewers, (5, 4, 2, 1))]
+            # Changed, then deleted without a reload
+            reviews[0].rating = 3
+            reviews[0].save()
+            reviews[0].delete()
+            self.assert_aggregates_match()
+
+            review_model.objects.get(pk=reviews[1].pk).delete()
+            self.assert_aggregates_match()
+
+            review_model.objects.filter(pk__in=[review.pk for review in reviews[2:]]).delete()
+            self.assert_aggregates_match()
+            target.refresh_from_db()
+            self.assertEqual((target.rating_sum, target.review_count, target.avg_rating), (0, 0, 0))
+
+    def test_reviewer_deleted(self):
+        for review_model, field, target, other in self.cases():
+            self.review(review_model, field, target, self.reviewers[2], 5)
+            self.review(review_model, field, target, self.reviewers[3], 2)
+        # Cascades to the reviews, one post_delete each
+        self.reviewers[3].delete()
+        self.assert_aggregates_match()
+
+    def test_rebuild_agrees(self):
+        for review_model, field, target, other in self.cases():
+            self.review(review_model, field, target, self.reviewers[0], 5)
+            self.review(review_model, field, target, self.reviewers[1], 2)
+            self.review(review_model, field, other, self.reviewers[2], 4)
+            target._meta.model.objects.update(rating_sum=0, review_count=0, avg_rating=0)
+            rebuild_ratings(review_model)
+        self.assert_aggregates_match()
+
+
+class LeaderboardInvalidationTests(TestCase):
+    """A committed review moves the cached top-rated boards it affects, and only those"""
+
+    @classmethod
+    def setUpTestData(cls):
+        category = MealCategory.objects.create(name='Pizza')
+        cls.meal = create_meal()
+        cls.restaurant, cls.category = cls.meal.restaurant, category
+        cls.other_meal = Meal.objects.create(restaurant=cls.restaurant, name='Pasta', description='-', base_price=10)
+        Meal.objects.filter(pk__in=[cls.meal.pk, cls.other_meal.pk]).update(category=category)
+
+        owner = User.objects.create_user(username='other owner', password='x', user_type='restaurant')
+        cls.other_restaurant = Restaurant.objects.create(
+            owner=owner, name='Other', description='-', address='-', phone_number='0',
+            opening_time=time(0, 0), closing_time=time(23, 59), is_active=True, is_approved=True,
+        )
+        cls.elsewhere = Meal.objects.create(
+            restaurant=cls.other_restaurant, name='Soup', description='-', base_price=10, category=category,
+        )
+
+        cls.reviewers = [
+            User.objects.create_user(username=f'customer{i}', password='x', user_type='customer') for i in range(2)
+        ]
+        reviewer = cls.reviewers[0]
+        MealReview.objects.create(user=reviewer, meal=cls.meal, rating=4, comment='-')
+        MealReview.objects.create(user=reviewer, meal=cls.other_meal, rating=3, comment='-')
+        MealReview.objects.create(user=reviewer, meal=cls.elsewhere, rating=5, comment='-')
+        RestaurantReview.objects.create(user=reviewer, restaurant=cls.restaurant, rating=4, comment='-')
+        RestaurantReview.objects.create(user=reviewer, restaurant=cls.other_restaurant, rating=3, comment='-')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.reviewers[1])
+
+    def top_meals(self, restaurant):
+        response = self.client.get(TOP_MEALS_URL, {'restaurant': restaurant.id})
+        self.assertEqual(response.status_code, 200)
+        return [meal['id'] for meal in response.data]
+
+    def top_restaurants(self):
+        response = self.client.get(TOP_RESTAURANTS_URL, {'category': self.category.id})
+        self.assertEqual(response.status_code, 200)
+        return [restaurant['id'] for restaurant in response.data]
+
+    def test_new_review_moves_the_meal_board(self):
+        self.assertEqual(self.top_meals(self.restaurant), [self.meal.id, self.other_meal.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            MealReview.objects.create(user=self.reviewers[1], meal=self.other_meal, rating=5, comment='-')
+        # Pasta now averages 4 like Pizza, over more reviews
+        self.assertEqual(self.top_meals(self.restaurant), [self.other_meal.id, self.meal.id])
+
+    def test_board_is_only_invalidated_once_committed(self):
+        self.assertEqual(self.top_meals(self.restaurant), [self.meal.id, self.other_meal.id])
+        with self.captureOnCommitCallbacks(execute=False):
+            MealReview.objects.create(user=self.reviewers[1], meal=self.other_meal, rating=5, comment='-')
+        self.assertEqual(self.top_meals(self.restaurant), [self.meal.id, self.other_meal.id])
+
+    def test_other_boards_stay_cached(self):
+        self.assertEqual(self.top_meals(self.other_restaurant), [self.elsewhere.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            MealReview.objects.create(user=self.reviewers[1], meal=self.other_meal, rating=5, comment='-')
+        with self.assertNumQueries(0):
+            self.assertEqual(self.top_meals(self.other_restaurant), [self.elsewhere.id])
+
+    def test_rating_change_and_delete_move_the_board(self):
+        self.assertEqual(self.top_meals(self.restaurant), [self.meal.id, self.other_meal.id])
+        review = MealReview.objects.get(meal=self.meal)
+        with self.captureOnCommitCallbacks(execute=True):
+            review.rating = 1
+            review.save()
+        self.assertEqual(self.top_meals(self.restaurant), [self.other_meal.id, self.meal.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            review.delete()
+        # Meals without reviews drop off the board
+        self.assertEqual(self.top_meals(self.restaurant), [self.other_meal.id])
+
+    def test_new_review_moves_the_restaurant_board(self):
+        self.assertEqual(self.top_restaurants(), [self.restaurant.id, self.other_restaurant.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            RestaurantReview.objects.create(user=self.reviewers[1], restaurant=self.other_restaurant, rating=5, comment='-')
+        self.assertEqual(self.top_restaurants(), [self.other_restaurant.id, self.restaurant.id])
+
+    def test_new_review_moves_the_custom_meal_board(self):
+        mine, theirs = (
+            CustomMeal.objects.create(user=self.reviewers[0], name=name, base_meal=self.meal, is_public=True)
+            for name in ('Mine', 'Theirs')
+        )
+        CustomMealReview.objects.create(user=self.reviewers[0], custom_meal=mine, rating=4, comment='-')
+        CustomMealReview.objects.create(user=self.reviewers[0], custom_meal=theirs, rating=3, comment='-')
+
+        def board():
+            return [custom_meal['id'] for custom_meal in self.client.get(TOP_CUSTOM_MEALS_URL).data]
 
-# Create your tests here.
+        self.assertEqual(board(), [mine.id, theirs.id])
+        with self.captureOnCommitCallbacks(execute=True):
+            CustomMealReview.objects.create(user=self.reviewers[1], custom_meal=theirs, rating=5, comment='-')
+        self.assertEqual(board(), [theirs.id, mine.id])
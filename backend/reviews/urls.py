@@ -1,6 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RestaurantReviewViewSet, MealReviewViewSet, CustomMealReviewViewSet
+from .views import (
+    RestaurantReviewViewSet, MealReviewViewSet, CustomMealReviewViewSet,
+    AsyncRestaurantReviewView, AsyncMealReviewView, AsyncCustomMealReviewView,
+)
 from .api_views import DebugMealReviewCreateView
 
 router = DefaultRouter()
@@ -11,4 +14,8 @@ router.register(r'custom-meal-reviews', CustomMealReviewViewSet)
 urlpatterns = [
     path('', include(router.urls)),
     path('debug-meal-review/', DebugMealReviewCreateView.as_view(), name='debug-meal-review'),
+    # ASGI-native read path
+    path('async/restaurant-reviews/', AsyncRestaurantReviewView.as_view(), name='async-restaurant-review-list'),
+    path('async/meal-reviews/', AsyncMealReviewView.as_view(), name='async-meal-review-list'),
+    path('async/custom-meal-reviews/', AsyncCustomMealReviewView.as_view(), name='async-custom-meal-review-list'),
 ]
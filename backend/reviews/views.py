@@ -4,6 +4,7 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from django.shortcuts import get_object_or_404
 from .models import RestaurantReview, MealReview, CustomMealReview
 from .serializers import RestaurantReviewSerializer, MealReviewSerializer, CustomMealReviewSerializer
+from uchef_project.async_views import AsyncReadView
 
 class IsReviewOwnerOrReadOnly(permissions.BasePermission):
     def has_object_permission(self, request, view, obj):
@@ -28,9 +29,15 @@ class RestaurantReviewViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         restaurant_id = self.request.query_params.get('restaurant', None)
+        # The serializer reads the author's and the target's names
+        queryset = RestaurantReview.objects.select_related('user', 'restaurant')
         if restaurant_id:
-            return RestaurantReview.objects.filter(restaurant_id=restaurant_id)
-        return RestaurantReview.objects.all()
+            queryset = queryset.filter(restaurant_id=restaurant_id)
+        # ?user= finds the reviewer's own review, whichever page it is on
+        user_id = self.request.query_params.get('user', None)
+        if user_id:
+            queryset = queryset.filter(user_id=user_id)
+        return queryset
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -49,9 +56,15 @@ class MealReviewViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         meal_id = self.request.query_params.get('meal', None)
+        # The serializer reads the author's and the target's names
+        queryset = MealReview.objects.select_related('user', 'meal')
         if meal_id:
-            return MealReview.objects.filter(meal_id=meal_id)
-        return MealReview.objects.all()
+            queryset = queryset.filter(meal_id=meal_id)
+        # ?user= finds the reviewer's own review, whichever page it is on
+        user_id = self.request.query_params.get('user', None)
+        if user_id:
+            queryset = queryset.filter(user_id=user_id)
+        return queryset
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
@@ -70,9 +83,27 @@ class CustomMealReviewViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         custom_meal_id = self.request.query_params.get('custom_meal', None)
+        # The serializer reads the author's and the target's names
+        queryset = CustomMealReview.objects.select_related('user', 'custom_meal')
         if custom_meal_id:
-            return CustomMealReview.objects.filter(custom_meal_id=custom_meal_id)
-        return CustomMealReview.objects.all()
+            queryset = queryset.filter(custom_meal_id=custom_meal_id)
+        # ?user= finds the reviewer's own review, whichever page it is on
+        user_id = self.request.query_params.get('user', None)
+        if user_id:
+            queryset = queryset.filter(user_id=user_id)
+        return queryset
     
     def perform_create(self, serializer):
         serializer.save(user=self.request.user)
+
+
+# Reviews of one target (?restaurant=, ?meal=, ?custom_meal=) on the ASGI read path
+
+class AsyncRestaurantReviewView(AsyncReadView):
+    viewset_class = RestaurantReviewViewSet
+
+class AsyncMealReviewView(AsyncReadView):
+    viewset_class = MealReviewViewSet
+
+class AsyncCustomMealReviewView(AsyncReadView):
+    viewset_class = CustomMealReviewViewSet
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'search'
+    
+    def ready(self):
+        # Keep the full-text index in step with meal, restaurant and custom meal rows
+        from . import signals  # noqa: F401
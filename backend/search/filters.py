@@ -0,0 +1,25 @@
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+from .index import get_index, search_terms
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    `?search=` answered from the full-text index: every term must match a
+    word prefix in the view's `search_kind` documents.
+
+    Databases without an index fall back to SearchFilter's LIKE over
+    `search_fields`.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        index = get_index()
+        if index is None:
+            return super().filter_queryset(request, queryset, view)
+
+        terms = search_terms(request.query_params.get(self.search_param, ''))
+        if not terms:
+            return queryset
+        sql, params = index.match_sql(view.search_kind, terms)
+        return queryset.filter(pk__in=RawSQL(sql, params))
@@ -0,0 +1,197 @@
+import re
+
+from django.apps import apps
+from django.db import connection
+
+# Documents in the index, one per searchable row
+KINDS = {'meal': 1, 'restaurant': 2, 'custom_meal': 3}
+MAX_TERMS = 8
+# Letters and digits only, so a term can never carry query syntax
+TERM_RE = re.compile(r'[^\W_]+')
+TABLE = 'search_document'
+# Title matches weigh ten times as much as body matches
+TITLE_WEIGHT, BODY_WEIGHT = 10.0, 1.0
+# Documents rewritten per statement, to stay under the databases' parameter limits
+REINDEX_BATCH = 500
+
+
+def search_terms(query):
+    return TERM_RE.findall(query.lower())[:MAX_TERMS]
+
+
+def _sources(get_model):
+    """kind -> SELECT of (object_id, title, body) over the rows of that kind, and its id column"""
+    meal = get_model('meals', 'Meal')._meta.db_table
+    category = get_model('meals', 'MealCategory')._meta.db_table
+    restaurant = get_model('restaurants', 'Restaurant')._meta.db_table
+    custom_meal = get_model('meals', 'CustomMeal')._meta.db_table
+    # The same text the SearchFilters matched on before: meal name, description and category name;
+    # restaurant name, description and address; custom meal name and description
+    return {
+        'meal': (
+            f"SELECT m.id AS object_id, m.name AS title, "
+            f"COALESCE(m.description, '') || ' ' || COALESCE(c.name, '') AS body "
+            f"FROM {meal} m LEFT JOIN {category} c ON c.id = m.category_id",
+            'm.id',
+        ),
+        'restaurant': (
+            f"SELECT r.id AS object_id, r.name AS title, "
+            f"COALESCE(r.description, '') || ' ' || COALESCE(r.address, '') AS body FROM {restaurant} r",
+            'r.id',
+        ),
+        'custom_meal': (
+            f"SELECT cm.id AS object_id, cm.name AS title, COALESCE(cm.description, '') AS body FROM {custom_meal} cm",
+            'cm.id',
+        ),
+    }
+
+
+def _placeholders(values):
+    return ', '.join(['%s'] * len(values))
+
+
+class SqliteIndex:
+    """
+    An FTS5 table. The rowid encodes the document (object_id * 4 + kind), so
+    updating one document is a rowid lookup rather than a scan.
+    """
+
+    def create(self, cursor):
+        cursor.execute(
+            f"CREATE VIRTUAL TABLE {TABLE} USING fts5("
+            f"title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def delete(self, cursor, kind, ids=None):
+        if ids is None:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid %% 4 = %s', [KINDS[kind]])
+        else:
+            rowids = [object_id * 4 + KINDS[kind] for object_id in ids]
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid IN ({_placeholders(rowids)})', rowids)
+
+    def insert(self, cursor, kind, source, params):
+        cursor.execute(
+            f'INSERT INTO {TABLE} (rowid, title, body) '
+            f'SELECT object_id * 4 + %s, title, body FROM ({source}) AS source',
+            [KINDS[kind], *params],
+        )
+
+    def _match(self, terms):
+        # Every term must match, each as a prefix
+        return ' '.join(f'"{term}"*' for term in terms)
+
+    def match_sql(self, kind, terms):
+        return f'SELECT rowid / 4 FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid %% 4 = %s', [
+            self._match(terms), KINDS[kind]
+        ]
+
+    def ranked_sql(self, kind, terms, limit):
+        # bm25() is lower for better matches
+        rank = f'bm25({TABLE}, {TITLE_WEIGHT}, {BODY_WEIGHT})'
+        return (
+            f'SELECT rowid / 4, -{rank} FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid %% 4 = %s '
+            f'ORDER BY {rank}, rowid LIMIT %s',
+            [self._match(terms), KINDS[kind], limit],
+        )
+
+
+class PostgresIndex:
+    """A table with a generated, weighted tsvector column under a GIN index"""
+    DOCUMENT = (
+        "setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B')"
+    )
+
+    def create(self, cursor):
+        cursor.execute(
+            f'CREATE TABLE {TABLE} ('
+            f'kind smallint NOT NULL, object_id bigint NOT NULL, title text NOT NULL, body text NOT NULL, '
+            f'document tsvector GENERATED ALWAYS AS ({self.DOCUMENT}) STORED, '
+            f'PRIMARY KEY (kind, object_id))'
+        )
+        cursor.execute(f'CREATE INDEX {TABLE}_gin ON {TABLE} USING GIN (document)')
+
+    def drop(self, cursor):
+        cursor.execute(f'DROP TABLE IF EXISTS {TABLE}')
+
+    def delete(self, cursor, kind, ids=None):
+        if ids is None:
+            cursor.execute(f'DELETE FROM {TABLE} WHERE kind = %s', [KINDS[kind]])
+        else:
+            cursor.execute(
+                f'DELETE FROM {TABLE} WHERE kind = %s AND object_id IN ({_placeholders(ids)})', [KINDS[kind], *ids]
+            )
+
+    def insert(self, cursor, kind, source, params):
+        cursor.execute(
+            f'INSERT INTO {TABLE} (kind, object_id, title, body) '
+            f'SELECT %s, object_id, title, body FROM ({source}) AS source',
+            [KINDS[kind], *params],
+        )
+
+    def _query(self, terms):
+        return ' & '.join(f'{term}:*' for term in terms)
+
+    def match_sql(self, kind, terms):
+        return f"SELECT object_id FROM {TABLE} WHERE kind = %s AND document @@ to_tsquery('simple', %s)", [
+            KINDS[kind], self._query(terms)
+        ]
+
+    def ranked_sql(self, kind, terms, limit):
+        # Weights are {D, C, B, A}: a title (A) match counts ten times a body (B) match
+        return (
+            f"SELECT object_id, ts_rank('{{0, 0, 0.1, 1}}', document, query) AS rank "
+            f"FROM {TABLE}, to_tsquery('simple', %s) AS query WHERE kind = %s AND document @@ query "
+            f"ORDER BY rank DESC, object_id LIMIT %s",
+            [self._query(terms), KINDS[kind], limit],
+        )
+
+
+INDEXES = {'sqlite': SqliteIndex, 'postgresql': PostgresIndex}
+
+
+def get_index(db=connection):
+    """The full-text index of this database, or None where there is none (searches fall back to LIKE)"""
+    index_class = INDEXES.get(db.vendor)
+    return index_class() if index_class else None
+
+
+def reindex(kind, ids):
+    """Rewrite the documents of `ids`; ids whose rows are gone are just dropped"""
+    index = get_index()
+    ids = list(ids)
+    if index is None or not ids:
+        return
+    source, id_column = _sources(apps.get_model)[kind]
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), REINDEX_BATCH):
+            batch = ids[start:start + REINDEX_BATCH]
+            index.delete(cursor, kind, batch)
+            index.insert(cursor, kind, f'{source} WHERE {id_column} IN ({_placeholders(batch)})', batch)
+
+
+def rebuild_index(db=connection, get_model=apps.get_model):
+    """Rewrite every document (backfills and repairs); returns the number of documents"""
+    index = get_index(db)
+    if index is None:
+        return 0
+    with db.cursor() as cursor:
+        for kind, (source, _) in _sources(get_model).items():
+            index.delete(cursor, kind)
+            index.insert(cursor, kind, source, [])
+        cursor.execute(f'SELECT COUNT(*) FROM {TABLE}')
+        return cursor.fetchone()[0]
+
+
+def ranked_ids(kind, query, limit):
+    """[(object_id, rank)] of the best `limit` matches for `query`, best first"""
+    index = get_index()
+    terms = search_terms(query)
+    if index is None or not terms:
+        return []
+    sql, params = index.ranked_sql(kind, terms, limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.fetchall()
@@ -0,0 +1,110 @@
+import random
+import statistics
+import time
+import uuid
+from datetime import time as clock_time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+from django.db.models.expressions import RawSQL
+
+from users.models import User
+from restaurants.models import Restaurant
+from meals.models import MealCategory, Meal
+from search.index import get_index, rebuild_index, ranked_ids, search_terms
+
+WORDS = [
+    'spicy', 'grilled', 'chicken', 'beef', 'lamb', 'falafel', 'shawarma', 'pizza', 'pasta', 'salad',
+    'cheese', 'tomato', 'garlic', 'lemon', 'herb', 'roasted', 'crispy', 'smoked', 'vegan', 'classic',
+    'burger', 'wrap', 'rice', 'noodle', 'curry', 'honey', 'pepper', 'mushroom', 'olive', 'chickpea',
+]
+# Plus a long tail of rarer made-up words, like dish and ingredient names
+SYLLABLES = ['ka', 'ri', 'mo', 'ta', 'shi', 'lu', 'ba', 'ne', 'zo', 'fe', 'gu', 'po', 'la', 'vi', 'dra']
+RARE_WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+# Common words, a common phrase, a rare word and its prefix, and a miss
+QUERIES = ['chi', 'chicken', 'spicy chick', RARE_WORDS[1234], RARE_WORDS[1234][:4], 'zzz']
+PAGE_SIZE = 50
+
+
+class Command(BaseCommand):
+    help = 'Compare LIKE search with the full-text index over a seeded meal table (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--meals', type=int, default=100_000, help='Meals seeded before searching')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query, the median is reported')
+
+    def handle(self, *args, **options):
+        if get_index() is None:
+            raise CommandError(f'There is no full-text index on {connection.vendor}')
+
+        with transaction.atomic():
+            self.seed(options['meals'])
+            start = time.perf_counter()
+            documents = rebuild_index()
+            self.stdout.write(f'{connection.vendor}: indexed {documents} documents in {time.perf_counter() - start:.1f}s')
+
+            self.stdout.write(
+                f"{'query':<16}{'matches':>9}{'LIKE page':>11}{'LIKE count':>12}"
+                f"{'index page':>12}{'index count':>13}{'ranked top 20':>15}   (ms)"
+            )
+            for query in QUERIES:
+                like = self.like_queryset(query)
+                indexed = self.indexed_queryset(query)
+                matches = indexed.count()
+                if like.count() < matches:
+                    # LIKE matches substrings, so it finds at least what the prefix index does
+                    raise CommandError(f'The index found more matches than LIKE for {query!r}')
+                self.stdout.write(
+                    f'{query:<16}{matches:>9}'
+                    f'{self.timed(lambda: list(like[:PAGE_SIZE]), options):>11.1f}'
+                    f'{self.timed(like.count, options):>12.1f}'
+                    f'{self.timed(lambda: list(indexed[:PAGE_SIZE]), options):>12.1f}'
+                    f'{self.timed(indexed.count, options):>13.1f}'
+                    f"{self.timed(lambda: ranked_ids('meal', query, 20), options):>15.1f}"
+                )
+            transaction.set_rollback(True)
+
+    def timed(self, run, options):
+        durations = []
+        for _ in range(options['repeat']):
+            start = time.perf_counter()
+            run()
+            durations.append(time.perf_counter() - start)
+        return statistics.median(durations) * 1000
+
+    def like_queryset(self, query):
+        # What SearchFilter compiled to: every term in any of the search fields
+        queryset = Meal.objects.all()
+        for term in search_terms(query):
+            queryset = queryset.filter(
+                Q(name__icontains=term) | Q(description__icontains=term) | Q(category__name__icontains=term)
+            )
+        return queryset.order_by('-created_at', '-id')
+
+    def indexed_queryset(self, query):
+        sql, params = get_index().match_sql('meal', search_terms(query))
+        return Meal.objects.filter(pk__in=RawSQL(sql, params)).order_by('-created_at', '-id')
+
+    def seed(self, meal_count):
+        suffix = uuid.uuid4().hex[:8]
+        owner = User.objects.create_user(username=f'search-{suffix}', user_type='restaurant')
+        restaurant = Restaurant.objects.create(
+            owner=owner, name=f'Search {suffix}', description='Search benchmark', address='-',
+            phone_number='0', opening_time=clock_time(0, 0), closing_time=clock_time(23, 59),
+        )
+        categories = MealCategory.objects.bulk_create([
+            MealCategory(name=f'{word.title()} {suffix}') for word in WORDS[:10]
+        ])
+        words = random.Random(0)
+        Meal.objects.bulk_create(
+            (
+                Meal(
+                    restaurant=restaurant, category=words.choice(categories), base_price=10,
+                    name=' '.join([words.choice(WORDS), *words.sample(RARE_WORDS, 2)]).title(),
+                    description=' '.join([*words.sample(WORDS, 2), *words.sample(RARE_WORDS, 6)]),
+                )
+                for _ in range(meal_count)
+            ),
+            batch_size=2000,
+        )
@@ -0,0 +1,48 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from search.suggest import PrefixTrie
+from search.management.commands.benchmark_search import WORDS, RARE_WORDS
+
+# A user typing, one keystroke at a time
+QUERIES = ['c', 'ch', 'chi', 'chic', 'chick', 'spicy k', RARE_WORDS[1234][:2], RARE_WORDS[1234][:4], 'zzz']
+
+
+class Command(BaseCommand):
+    help = 'Time autocomplete lookups in a prefix trie of generated names (no database involved)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--names', type=int, default=100_000, help='Names in the trie')
+        parser.add_argument('--repeat', type=int, default=10_000, help='Lookups per query')
+
+    def handle(self, *args, **options):
+        words = random.Random(0)
+        names = {' '.join([words.choice(WORDS), *words.sample(RARE_WORDS, 2)]).title() for _ in range(options['names'])}
+
+        trie = PrefixTrie()
+        start = time.perf_counter()
+        for name in names:
+            trie.add(name, refresh=False)
+        trie.finish_build()
+        self.stdout.write(f'Built a trie of {len(names)} names in {time.perf_counter() - start:.1f}s')
+
+        self.stdout.write(f"{'query':<12}{'results':>9}{'median us':>11}{'max us':>9}")
+        for query in QUERIES:
+            durations = []
+            for _ in range(options['repeat']):
+                start = time.perf_counter()
+                results = trie.complete(query)
+                durations.append(time.perf_counter() - start)
+            self.stdout.write(
+                f'{query:<12}{len(results):>9}{statistics.median(durations) * 1e6:>11.1f}{max(durations) * 1e6:>9.1f}'
+            )
+
+        # A rename: one remove and one add, each refreshing only the nodes on the name's paths
+        name = next(iter(names))
+        start = time.perf_counter()
+        trie.remove(name)
+        trie.add(name)
+        self.stdout.write(f'Renaming one name took {(time.perf_counter() - start) * 1e6:.0f}us')
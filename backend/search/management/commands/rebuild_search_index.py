@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from search.index import rebuild_index
+
+
+class Command(BaseCommand):
+    help = 'Rewrite every document of the full-text search index from the meal, restaurant and custom meal tables'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            documents = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {documents} documents'))
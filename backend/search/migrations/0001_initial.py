@@ -0,0 +1,74 @@
+from django.db import migrations
+
+# The DDL and backfill are written out here rather than imported from
+# search.index, so later changes to that module never change what this
+# migration does. Kinds: 1 meal, 2 restaurant, 3 custom meal.
+CREATE = {
+    # The rowid encodes the document: object_id * 4 + kind
+    'sqlite': [
+        "CREATE VIRTUAL TABLE search_document USING fts5("
+        "title, body, tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')",
+    ],
+    'postgresql': [
+        "CREATE TABLE search_document ("
+        "kind smallint NOT NULL, object_id bigint NOT NULL, title text NOT NULL, body text NOT NULL, "
+        "document tsvector GENERATED ALWAYS AS ("
+        "setweight(to_tsvector('simple', title), 'A') || setweight(to_tsvector('simple', body), 'B')"
+        ") STORED, "
+        "PRIMARY KEY (kind, object_id))",
+        "CREATE INDEX search_document_gin ON search_document USING GIN (document)",
+    ],
+}
+INSERT = {
+    'sqlite': (
+        'INSERT INTO search_document (rowid, title, body) '
+        'SELECT object_id * 4 + {kind}, title, body FROM ({source}) AS source'
+    ),
+    'postgresql': (
+        'INSERT INTO search_document (kind, object_id, title, body) '
+        'SELECT {kind}, object_id, title, body FROM ({source}) AS source'
+    ),
+}
+SOURCES = {
+    1: (
+        "SELECT m.id AS object_id, m.name AS title, "
+        "COALESCE(m.description, '') || ' ' || COALESCE(c.name, '') AS body "
+        "FROM meals_meal m LEFT JOIN meals_mealcategory c ON c.id = m.category_id"
+    ),
+    2: (
+        "SELECT r.id AS object_id, r.name AS title, "
+        "COALESCE(r.description, '') || ' ' || COALESCE(r.address, '') AS body FROM restaurants_restaurant r"
+    ),
+    3: "SELECT cm.id AS object_id, cm.name AS title, COALESCE(cm.description, '') AS body FROM meals_custommeal cm",
+}
+
+
+def create_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor not in CREATE:
+        # Searches fall back to LIKE
+        return
+    for statement in CREATE[vendor]:
+        schema_editor.execute(statement)
+    for kind, source in SOURCES.items():
+        schema_editor.execute(INSERT[vendor].format(kind=kind, source=source))
+
+
+def drop_index(apps, schema_editor):
+    if schema_editor.connection.vendor in CREATE:
+        schema_editor.execute('DROP TABLE IF EXISTS search_document')
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('meals', '0007_backfill_servings_available'),
+        ('restaurants', '0006_ingredient_updated_at'),
+    ]
+
+    operations = [
+        # A vendor-specific table (FTS5 on SQLite, tsvector + GIN on PostgreSQL), so no model
+        migrations.RunPython(create_index, drop_index),
+    ]
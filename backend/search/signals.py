@@ -0,0 +1,100 @@
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete
+from restaurants.models import Restaurant, Ingredient
+from meals.models import MealCategory, Meal, CustomMeal
+from uchef_project.querysets import rows_updated
+from .index import reindex
+from .suggest import get_suggester
+
+# Model -> (document kind, the fields its document is built from)
+INDEXED_MODELS = {
+    Meal: ('meal', {'name', 'description', 'category', 'category_id'}),
+    Restaurant: ('restaurant', {'name', 'description', 'address'}),
+    CustomMeal: ('custom_meal', {'name', 'description'}),
+}
+
+
+def document_changed(sender, instance, update_fields=None, **kwargs):
+    kind, fields = INDEXED_MODELS[sender]
+    # e.g. rating or servings updates don't touch the text
+    if update_fields is not None and not fields & set(update_fields):
+        return
+    reindex(kind, [instance.pk])
+
+
+def document_deleted(sender, instance, **kwargs):
+    kind, _ = INDEXED_MODELS[sender]
+    # The row is gone, so this only drops its document
+    reindex(kind, [instance.pk])
+
+
+def category_saved(sender, instance, update_fields=None, **kwargs):
+    # The category name is part of its meals' documents
+    if update_fields is None or 'name' in update_fields:
+        reindex('meal', Meal.objects.filter(category_id=instance.pk).values_list('pk', flat=True))
+
+
+def remember_category_meals(sender, instance, **kwargs):
+    # After the delete the meals are already unlinked from the category
+    instance._search_meal_ids = list(Meal.objects.filter(category_id=instance.pk).values_list('pk', flat=True))
+
+
+def category_deleted(sender, instance, **kwargs):
+    reindex('meal', getattr(instance, '_search_meal_ids', []))
+
+
+# Model -> the suggestion type its names complete as
+SUGGESTED_MODELS = {
+    Meal: 'meal',
+    Restaurant: 'restaurant',
+    MealCategory: 'category',
+    Ingredient: 'ingredient',
+}
+
+
+def suggestion_changed(sender, instance, **kwargs):
+    # Only approved, active restaurants are suggested
+    if sender is Restaurant and not (instance.is_active and instance.is_approved):
+        name = None
+    else:
+        name = instance.name
+    object_id = instance.pk
+    # Rolled back saves never reach the trie
+    transaction.on_commit(lambda: get_suggester().update(SUGGESTED_MODELS[sender], object_id, name))
+
+
+def suggestion_deleted(sender, instance, **kwargs):
+    # Django clears instance.pk once the delete is done
+    object_id = instance.pk
+    transaction.on_commit(lambda: get_suggester().update(SUGGESTED_MODELS[sender], object_id, None))
+
+
+def rows_bulk_updated(sender, pks, fields, **kwargs):
+    # QuerySet.update() and bulk_update() send no post_save, so the querysets
+    # report the rows whose text changed (see uchef_project.querysets)
+    if sender in INDEXED_MODELS:
+        kind, indexed_fields = INDEXED_MODELS[sender]
+        if indexed_fields & fields:
+            reindex(kind, pks)
+    if sender is MealCategory:
+        reindex('meal', Meal.objects.filter(category_id__in=pks).values_list('pk', flat=True))
+    # Restaurants are only suggested while approved and active
+    if sender in SUGGESTED_MODELS and fields & {'name', 'is_active', 'is_approved'}:
+        for instance in sender._base_manager.filter(pk__in=pks):
+            suggestion_changed(sender, instance)
+
+
+for indexed_model in INDEXED_MODELS:
+    post_save.connect(document_changed, sender=indexed_model)
+    post_delete.connect(document_deleted, sender=indexed_model)
+
+post_save.connect(category_saved, sender=MealCategory)
+pre_delete.connect(remember_category_meals, sender=MealCategory)
+post_delete.connect(category_deleted, sender=MealCategory)
+
+for suggested_model in SUGGESTED_MODELS:
+    post_save.connect(suggestion_changed, sender=suggested_model)
+    post_delete.connect(suggestion_deleted, sender=suggested_model)
+
+for updated_model in {*INDEXED_MODELS, *SUGGESTED_MODELS}:
+    rows_updated.connect(rows_bulk_updated, sender=updated_model)
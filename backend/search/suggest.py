@@ -0,0 +1,274 @@
+import logging
+import threading
+import time
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+SUGGESTION_TYPES = ('meal', 'restaurant', 'category', 'ingredient')
+MAX_SUGGESTIONS = 10
+# Completions are keyed on at most this many characters after a word start
+MAX_KEY_LENGTH = 48
+
+
+def normalize(text):
+    """Lowercase, without accents and with single spaces, so 'Entrées' completes 'entree'"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ' '.join(''.join(c for c in decomposed if not unicodedata.combining(c)).split())
+
+
+def _word_starts(text):
+    return [i for i, c in enumerate(text) if c.isalnum() and (i == 0 or not text[i - 1].isalnum())]
+
+
+class _Node:
+    __slots__ = ('children', 'terminals', 'top')
+
+    def __init__(self):
+        self.children = {}
+        # Suggestions whose key ends here, and the best MAX_SUGGESTIONS at or below this node
+        self.terminals = []
+        self.top = ()
+
+
+class PrefixTrie:
+    """
+    Completions for name prefixes, best first.
+
+    Every name is reachable from the start of each of its words ('chi' finds
+    'Spicy Chicken'). Each node keeps its best MAX_SUGGESTIONS so a lookup
+    is one walk down the prefix. A node's best list is the merge of its
+    children's lists, so changing a name only recomputes the nodes on its
+    paths. Suggestions rank names matched at their start first, then shorter
+    names.
+    """
+
+    def __init__(self):
+        self.root = _Node()
+
+    def _keys(self, name):
+        normalized = normalize(name)
+        for start in _word_starts(normalized):
+            key = normalized[start:start + MAX_KEY_LENGTH]
+            yield key, (start > 0, len(normalized), normalized, name)
+
+    def add(self, name, refresh=True):
+        for key, rank in self._keys(name):
+            node, path = self.root, [self.root]
+            for char in key:
+                node = node.children.setdefault(char, _Node())
+                path.append(node)
+            node.terminals.append(rank)
+            if refresh:
+                self._refresh(path)
+
+    def remove(self, name):
+        for key, rank in self._keys(name):
+            node, path = self.root, [self.root]
+            for char in key:
+                node = node.children.get(char)
+                if node is None:
+                    break
+                path.append(node)
+            else:
+                node.terminals.remove(rank)
+                self._prune(key, path)
+                self._refresh(path)
+
+    def _prune(self, key, path):
+        # Drop the nodes left without suggestions, deepest first
+        for depth in range(len(key), 0, -1):
+            node = path[depth]
+            if node.children or node.terminals:
+                break
+            del path[depth - 1].children[key[depth - 1]]
+            path.pop()
+
+    def _best(self, node):
+        candidates = sorted([*node.terminals, *(entry for child in node.children.values() for entry in child.top)])
+        best, seen = [], set()
+        for entry in candidates:
+            # The same name can be reached from two of its words
+            if entry[-1] not in seen:
+                seen.add(entry[-1])
+                best.append(entry)
+                if len(best) == MAX_SUGGESTIONS:
+                    break
+        return tuple(best)
+
+    def _refresh(self, path):
+        # The root answers no query, skip it
+        for node in reversed(path[1:]):
+            node.top = self._best(node)
+
+    def finish_build(self):
+        """Compute every node's best list after add(..., refresh=False) calls, children first"""
+        stack = [(child, False) for child in self.root.children.values()]
+        while stack:
+            node, children_done = stack.pop()
+            if children_done:
+                node.top = self._best(node)
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children.values())
+
+    def complete(self, prefix, limit=MAX_SUGGESTIONS):
+        """The best `limit` (rank..., name) entries under `prefix`"""
+        node = self.root
+        for char in normalize(prefix)[:MAX_KEY_LENGTH]:
+            node = node.children.get(char)
+            if node is None:
+                return ()
+        return node.top[:limit]
+
+
+def _load_names():
+    """(type, object id, name) of everything that is suggested"""
+    from restaurants.models import Restaurant, Ingredient
+    from meals.models import MealCategory, Meal
+
+    sources = [
+        ('meal', Meal.objects.all()),
+        ('restaurant', Restaurant.objects.filter(is_active=True, is_approved=True)),
+        ('category', MealCategory.objects.all()),
+        ('ingredient', Ingredient.objects.all()),
+    ]
+    for suggestion_type, queryset in sources:
+        for object_id, name in queryset.values_list('id', 'name').iterator(chunk_size=2000):
+            yield suggestion_type, object_id, name
+
+
+class Suggester:
+    """
+    The process-wide tries of meal, restaurant, category and ingredient
+    names, one per type so a type filter still fills its limit.
+
+    Built in a background thread when the server starts (warm_up(), called
+    from wsgi.py and asgi.py); a request that comes in before the build is
+    done waits for it, and a process that never warmed up (tests, management
+    commands) builds on first use. Saves and deletes in this process update
+    it in place (see search.signals); changes made by other processes are
+    picked up by a rebuild in a background thread once the trie is
+    SUGGEST_REFRESH seconds old, while the old trie keeps serving.
+    """
+
+    def __init__(self):
+        self.refresh_interval = settings.SUGGEST_REFRESH
+        self._lock = threading.Lock()
+        # Held for the whole first build, so requests wait for it instead of building again
+        self._first_build_lock = threading.Lock()
+        self._tries = None
+        self._built_at = 0
+        self._rebuilding = False
+        # (type, id) -> name, and how many objects of a type share a name, so
+        # a name stays suggested until its last meal (say) is gone
+        self._names = {}
+        self._counts = Counter()
+        # Updates made while a build reads the database, replayed onto what it built
+        self._pending = None
+
+    def _build(self):
+        tries, names, counts = {t: PrefixTrie() for t in SUGGESTION_TYPES}, {}, Counter()
+        for suggestion_type, object_id, name in _load_names():
+            names[suggestion_type, object_id] = name
+            counts[suggestion_type, name] += 1
+            if counts[suggestion_type, name] == 1:
+                tries[suggestion_type].add(name, refresh=False)
+        for trie in tries.values():
+            trie.finish_build()
+        return tries, names, counts
+
+    def _start_build(self):
+        with self._lock:
+            self._pending = []
+
+    def _install(self, built):
+        with self._lock:
+            for update in self._pending or ():
+                self._apply(built, *update)
+            self._tries, self._names, self._counts = built
+            self._built_at = time.monotonic()
+            self._rebuilding = False
+            self._pending = None
+
+    def _build_first(self):
+        with self._first_build_lock:
+            if self._tries is None:
+                self._start_build()
+                self._install(self._build())
+
+    def _in_background(self, build):
+        def run():
+            from django.db import connection
+            try:
+                build()
+            except Exception as e:
+                logger.error(f"Building the suggestion trie failed: {str(e)}")
+                with self._lock:
+                    self._rebuilding = False
+                    self._pending = None
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def warm_up(self):
+        """Build the tries in a background thread, so no request has to; returns the thread"""
+        return self._in_background(self._build_first)
+
+    def complete(self, prefix, limit=MAX_SUGGESTIONS, suggestion_type=None):
+        tries = self._tries
+        if tries is None:
+            # Waits for the warm-up if it is still running, builds if there was none
+            self._build_first()
+            tries = self._tries
+        elif time.monotonic() - self._built_at > self.refresh_interval and not self._rebuilding:
+            with self._lock:
+                start = not self._rebuilding
+                self._rebuilding = True
+            if start:
+                self._start_build()
+                self._in_background(lambda: self._install(self._build()))
+        types = SUGGESTION_TYPES if suggestion_type is None else (suggestion_type,)
+        # Each trie's best `limit` are enough to pick the overall best `limit`
+        entries = sorted((entry, t) for t in types for entry in tries[t].complete(prefix, limit))
+        return [{'text': entry[-1], 'type': t} for entry, t in entries[:limit]]
+
+    def update(self, suggestion_type, object_id, name):
+        """Record that an object's name is now `name` (None once it's deleted or hidden)"""
+        with self._lock:
+            if self._pending is not None:
+                # A build may have read the old name; it is replayed onto the build's result
+                self._pending.append((suggestion_type, object_id, name))
+            if self._tries is not None:
+                self._apply((self._tries, self._names, self._counts), suggestion_type, object_id, name)
+
+    @staticmethod
+    def _apply(built, suggestion_type, object_id, name):
+        tries, names, counts = built
+        key = (suggestion_type, object_id)
+        old = names.get(key)
+        if old == name:
+            return
+        if old is not None:
+            del names[key]
+            counts[suggestion_type, old] -= 1
+            if not counts[suggestion_type, old]:
+                del counts[suggestion_type, old]
+                tries[suggestion_type].remove(old)
+        if name is not None:
+            names[key] = name
+            counts[suggestion_type, name] += 1
+            if counts[suggestion_type, name] == 1:
+                tries[suggestion_type].add(name)
+
+
+@lru_cache(maxsize=None)
+def get_suggester():
+    return Suggester()
@@ -0,0 +1,84 @@
+import threading
+import time
+from unittest import mock
+
+from django.test import TransactionTestCase
+
+from meals.models import MealCategory
+from .suggest import Suggester
+
+
+class SlowSuggester(Suggester):
+    """Counts its builds, each of which waits for `release` after reading the names"""
+
+    def __init__(self):
+        super().__init__()
+        self.builds = 0
+        self.reading_done = threading.Event()
+        self.release = threading.Event()
+
+    def _build(self):
+        self.builds += 1
+        built = super()._build()
+        self.reading_done.set()
+        self.release.wait(5)
+        return built
+
+
+class SuggesterWarmUpTests(TransactionTestCase):
+    """The trie is built at server start and refreshed in the background, never on a request"""
+
+    def setUp(self):
+        self.category = MealCategory.objects.create(name='Pizza')
+
+    def texts(self, suggester, prefix):
+        return [s['text'] for s in suggester.complete(prefix, suggestion_type='category')]
+
+    def test_warm_up_builds_before_any_request(self):
+        suggester = Suggester()
+        suggester.warm_up().join(5)
+        with mock.patch.object(suggester, '_build') as build, self.assertNumQueries(0):
+            self.assertEqual(self.texts(suggester, 'piz'), ['Pizza'])
+        build.assert_not_called()
+
+    def test_request_during_the_warm_up_waits_for_it(self):
+        suggester = SlowSuggester()
+        thread = suggester.warm_up()
+        self.assertTrue(suggester.reading_done.wait(5))
+        threading.Timer(0.1, suggester.release.set).start()
+
+        self.assertEqual(self.texts(suggester, 'piz'), ['Pizza'])
+        thread.join(5)
+        self.assertEqual(suggester.builds, 1)
+
+    def test_changes_during_a_build_are_kept(self):
+        suggester = SlowSuggester()
+        thread = suggester.warm_up()
+        self.assertTrue(suggester.reading_done.wait(5))
+        # What search.signals does on commit, after the build read 'Pizza'
+        suggester.update('category', self.category.id, 'Pasta')
+        suggester.release.set()
+        thread.join(5)
+
+        self.assertEqual(self.texts(suggester, 'p'), ['Pasta'])
+
+    def test_stale_trie_is_refreshed_in_the_background(self):
+        suggester = SlowSuggester()
+        suggester.release.set()
+        suggester.warm_up().join(5)
+        suggester.refresh_interval = 0
+        # Renamed by another process: no signal reaches this one
+        MealCategory.objects.filter(id=self.category.id).update(name='Pasta')
+        suggester.release.clear()
+
+        # The old trie keeps answering while the rebuild waits
+        self.assertEqual(self.texts(suggester, 'p'), ['Pizza'])
+        self.assertEqual(self.texts(suggester, 'p'), ['Pizza'])
+        self.assertEqual(suggester.builds, 2)
+
+        suggester.release.set()
+        deadline = time.monotonic() + 5
+        while suggester._rebuilding and time.monotonic() < deadline:
+            time.sleep(0.01)
+        suggester.refresh_interval = 60
+        self.assertEqual(self.texts(suggester, 'p'), ['Pasta'])
@@ -0,0 +1,97 @@
+from django.db.models import Q
+from rest_framework import status
+from rest_framework.decorators import api_view, authentication_classes, permission_classes
+from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from restaurants.models import Restaurant
+from restaurants.serializers import RestaurantSerializer
+from meals.models import Meal, CustomMeal
+from meals.serializers import MealSerializer, CustomMealSerializer
+from .index import KINDS, ranked_ids, search_terms
+from .suggest import SUGGESTION_TYPES, MAX_SUGGESTIONS, get_suggester
+
+DEFAULT_LIMIT = 10
+MAX_LIMIT = 50
+
+
+def _visible(kind, user):
+    """The rows of `kind` the user may see, as the kind's list endpoint scopes them"""
+    is_admin = user.is_authenticated and user.user_type == 'admin'
+    if kind == 'meal':
+        return MealSerializer, MealSerializer.setup_eager_loading(Meal.objects.all())
+    if kind == 'restaurant':
+        queryset = Restaurant.objects.select_related('owner')
+        return RestaurantSerializer, queryset if is_admin else queryset.filter(is_active=True, is_approved=True)
+    queryset = CustomMealSerializer.setup_eager_loading(CustomMeal.objects.all())
+    if not is_admin:
+        visible = Q(is_public=True) | Q(user_id=user.id) if user.is_authenticated else Q(is_public=True)
+        queryset = queryset.filter(visible)
+    return CustomMealSerializer, queryset
+
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def search(request):
+    """
+    Ranked full-text search over meals, restaurants and custom meals.
+
+    `q` terms all have to match (each as a word prefix); titles count more
+    than descriptions. `type` narrows the search to one kind of result.
+    """
+    query = request.query_params.get('q', '')
+    if not search_terms(query):
+        return Response({'detail': 'A q query parameter with at least one word is required.'},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    kinds = list(KINDS)
+    kind = request.query_params.get('type')
+    if kind:
+        if kind not in KINDS:
+            return Response({'detail': f"type must be one of: {', '.join(KINDS)}."},
+                           status=status.HTTP_400_BAD_REQUEST)
+        kinds = [kind]
+
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', DEFAULT_LIMIT)), MAX_LIMIT))
+    except ValueError:
+        limit = DEFAULT_LIMIT
+
+    results = {}
+    for kind in kinds:
+        serializer_class, queryset = _visible(kind, request.user)
+        # Over-fetch so that a few hidden rows ranking high don't shorten the page
+        ranked = [object_id for object_id, _ in ranked_ids(kind, query, limit * 2)]
+        rows = queryset.in_bulk(ranked)
+        page = [rows[object_id] for object_id in ranked if object_id in rows][:limit]
+        results[kind] = serializer_class(page, many=True, context={'request': request}).data
+    return Response({'query': query, 'results': results})
+
+
+@api_view(['GET'])
+# Suggestions are the same for everyone, so skip the token/session lookups
+@authentication_classes([])
+@permission_classes([AllowAny])
+def suggest(request):
+    """
+    Typeahead completions of meal, restaurant, category and ingredient names.
+
+    Answered from an in-memory prefix trie, without touching the database.
+    `q` matches the start of any word of a name; `type` narrows the
+    suggestions to one kind.
+    """
+    query = request.query_params.get('q', '')
+    if not query.strip():
+        return Response({'query': query, 'suggestions': []})
+
+    suggestion_type = request.query_params.get('type') or None
+    if suggestion_type and suggestion_type not in SUGGESTION_TYPES:
+        return Response({'detail': f"type must be one of: {', '.join(SUGGESTION_TYPES)}."},
+                       status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        limit = max(1, min(int(request.query_params.get('limit', MAX_SUGGESTIONS)), MAX_SUGGESTIONS))
+    except ValueError:
+        limit = MAX_SUGGESTIONS
+
+    suggestions = get_suggester().complete(query, limit, suggestion_type)
+    return Response({'query': query, 'suggestions': suggestions})
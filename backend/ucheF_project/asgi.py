@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'uchef_project.settings')
 
 application = get_asgi_application()
+
+# Build the search suggestions now rather than on the first autocomplete request
+from search.suggest import get_suggester  # noqa: E402
+
+get_suggester().warm_up()
@@ -0,0 +1,57 @@
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from django.views import View
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+from users.authentication import arequest_user
+
+
+class AsyncReadView(View):
+    """
+    ASGI-native list/retrieve for a read-only endpoint of a DRF viewset.
+
+    The viewset still builds the queryset (get_queryset(), search and
+    ordering filters), so both paths return the same rows. Here the rows are
+    fetched with aget()/aiterator(), or a page with apaginate_queryset() (the
+    paginator in a worker thread), and the viewset's serializer only reads
+    what was loaded eagerly: a lazy query would raise SynchronousOnlyOperation
+    instead of blocking the loop.
+
+    Only for actions that are public (AllowAny) on the viewset; DRF
+    permissions and throttles are not run.
+    """
+    viewset_class = None
+
+    async def get(self, request, pk=None):
+        drf_request = Request(request)
+        # Resolved here because DRF authentication would query synchronously
+        drf_request.user = await arequest_user(request) or AnonymousUser()
+
+        action = 'list' if pk is None else 'retrieve'
+        viewset = self.viewset_class(
+            request=drf_request, args=(), kwargs={} if pk is None else {'pk': pk},
+            action=action, format_kwarg=None,
+        )
+        queryset = viewset.filter_queryset(viewset.get_queryset())
+
+        if pk is None:
+            data = await self.alist(viewset, queryset, drf_request)
+        else:
+            try:
+                instance = await queryset.aget(pk=pk)
+            except queryset.model.DoesNotExist:
+                return self.render({'detail': 'Not found.'}, status=404)
+            data = viewset.get_serializer(instance).data
+        return self.render(data)
+
+    def render(self, data, status=200):
+        return HttpResponse(JSONRenderer().render(data), status=status, content_type='application/json')
+
+    async def alist(self, viewset, queryset, request):
+        paginator = viewset.paginator
+        if paginator is None:
+            instances = [instance async for instance in queryset.aiterator()]
+            return viewset.get_serializer(instances, many=True).data
+        page = await paginator.apaginate_queryset(queryset, request, view=viewset)
+        return paginator.get_paginated_response(viewset.get_serializer(page, many=True).data).data
@@ -0,0 +1,46 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+
+def collection_state(queryset, field='updated_at'):
+    """(row count, newest `field`) of a collection, read with a single aggregate query"""
+    state = queryset.order_by().aggregate(count=Count('pk'), last_modified=Max(field))
+    return state['count'], state['last_modified']
+
+
+def collection_validators(*states):
+    """
+    Build an (ETag, Last-Modified) pair from collection_state() results.
+
+    The count catches deletions, which don't move any max(updated_at); the
+    timestamps catch edits and additions.
+    """
+    timestamps = [last_modified for _, last_modified in states if last_modified]
+    key = '|'.join(f'{count}:{last_modified.timestamp() if last_modified else 0}' for count, last_modified in states)
+    etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+    return etag, max(timestamps, default=None)
+
+
+def conditional_response(request, validators, build_response):
+    """
+    Answer a conditional GET with 304 before anything is serialized.
+
+    `build_response` is only called when the client's copy is stale; the
+    validators are attached to the fresh response so the next request can
+    revalidate.
+    """
+    etag, last_modified = validators
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    not_modified = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if not_modified is not None:
+        return not_modified
+
+    response = build_response()
+    response['ETag'] = etag
+    if timestamp is not None:
+        response['Last-Modified'] = http_date(timestamp)
+    return response
@@ -0,0 +1,67 @@
+from asgiref.sync import sync_to_async
+from rest_framework.pagination import CursorPagination
+
+
+class CreatedAtCursorPagination(CursorPagination):
+    """
+    Keyset pagination over (-created_at, -id).
+
+    Each page is fetched with `WHERE created_at < <cursor>` against an index,
+    so the cost of a page doesn't grow with how deep the client has paged.
+    Clients may ask for `?page_size=` up to `max_page_size`.
+
+    Orderings picked with `?ordering=` are completed with the default
+    ordering, so they always end in a unique column: rows sharing a value
+    (`?ordering=status`) still come in a fixed order and the cursor offset
+    within them neither skips nor repeats rows.
+    """
+    ordering = ('-created_at', '-id')
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for the async views (uchef_project.async_views).
+
+        DRF's own implementation runs in a worker thread, so the page query
+        and its prefetches don't block the event loop, and the cursor logic
+        is DRF's rather than a copy of its internals.
+        """
+        return await sync_to_async(self.paginate_queryset)(queryset, request, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        fields = {field.lstrip('-') for field in ordering}
+        return ordering + tuple(field for field in type(self).ordering if field.lstrip('-') not in fields)
+
+
+class OrderCursorPagination(CreatedAtCursorPagination):
+    # Every order nests its items, meals and recipes, so keep pages small
+    max_page_size = 50
+
+
+class NotificationCursorPagination(CreatedAtCursorPagination):
+    max_page_size = 50
+
+
+class MenuCursorPagination(CreatedAtCursorPagination):
+    # Menus are browsed as a whole, allow larger pages
+    page_size = 50
+    max_page_size = 200
+
+
+class IdCursorPagination(CreatedAtCursorPagination):
+    """For models without a creation timestamp (categories, ingredients, profiles)"""
+    ordering = ('id',)
+    page_size = 50
+    max_page_size = 200
+
+
+class UserCursorPagination(CreatedAtCursorPagination):
+    ordering = ('-date_joined', '-id')
+
+
+class PaymentCursorPagination(CreatedAtCursorPagination):
+    ordering = ('-payment_date', '-id')
+    max_page_size = 50
@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 from pathlib import Path
+from corsheaders.defaults import default_headers
 import os 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 
@@ -34,6 +35,7 @@ EMAIL_USE_TLS = config('EMAIL_USE_TLS') == 'True'
 EMAIL_HOST_USER = config('EMAIL_HOST_USER')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD')
 DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL')
+EMAIL_TIMEOUT = int(config('EMAIL_TIMEOUT', default=10))  # seconds; bounds a stuck SMTP server in the outbox worker
 ACTIVATION_URL = config('ACTIVATION_URL')
 
 
@@ -71,6 +73,7 @@ INSTALLED_APPS = [
     'orders',
     'reviews',
     'notifications',  # Add notifications app
+    'search',
 ]
 
 MIDDLEWARE = [
@@ -111,10 +114,37 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # A file rather than SQLite's in-memory default, so threaded tests get connections of their own
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
 
+# Cache
+# Local memory by default (and in tests); point CACHE_BACKEND/CACHE_LOCATION at a
+# shared backend such as Redis or Memcached when running several workers
+
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='uchef'),
+    }
+}
+
+
+# Real-time notification push
+# The in-process broker only reaches streams served by the same worker; use
+# notifications.push.DatabaseBroker when running several ASGI workers
+
+NOTIFICATION_BROKER = config('NOTIFICATION_BROKER', default='notifications.push.InProcessBroker')
+
+
+# Idempotency keys
+# How long (in seconds) a request sent with an Idempotency-Key can be replayed
+
+IDEMPOTENCY_KEY_TTL = config('IDEMPOTENCY_KEY_TTL', default=60 * 60 * 24, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -166,6 +196,7 @@ AUTH_USER_MODEL = 'users.User'
 
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = True  # For development only, restrict in production
+CORS_ALLOW_HEADERS = (*default_headers, 'idempotency-key')
 
 # REST Framework settings
 REST_FRAMEWORK = {
@@ -177,9 +208,22 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # Keyset pagination on (-created_at, -id); views override it for other orderings and page-size caps
+    'DEFAULT_PAGINATION_CLASS': 'uchef_project.pagination.CreatedAtCursorPagination',
 }
 
 
+OPENWEATHERMAP_API_KEY = config('OPENWEATHERMAP_API_KEY', default='your_default_api_key')
+# Point at a local stub server in tests and load runs
+WEATHER_API_URL = config('WEATHER_API_URL', default='https://api.openweathermap.org/data/2.5/weather')
+
 STRIPE_SECRET_KEY = config('STRIPE_SECRET_KEY')
 STRIPE_PUBLISHABLE_KEY = config('STRIPE_PUBLISHABLE_KEY')
 
+# orders.payments.FakeGateway needs no network, for tests and load runs
+PAYMENT_GATEWAY = config('PAYMENT_GATEWAY', default='orders.payments.StripeGateway')
+PAYMENT_CURRENCY = config('PAYMENT_CURRENCY', default='usd')
+PAYMENT_TIMEOUT = config('PAYMENT_TIMEOUT', default=10, cast=int)  # seconds per provider request
+
+# Seconds before a process rebuilds its autocomplete trie, to pick up other processes' changes
+SUGGEST_REFRESH = config('SUGGEST_REFRESH', default=300, cast=int)
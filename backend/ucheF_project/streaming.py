@@ -0,0 +1,70 @@
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+STREAM_FORMATS = {
+    'json': 'application/json',
+    'ndjson': 'application/x-ndjson',
+}
+STREAM_CHUNK_SIZE = 500
+
+
+def _serialized_rows(queryset, serializer_class, context, chunk_size):
+    # iterator() doesn't fill the queryset cache, and with a chunk_size it runs
+    # the queryset's prefetch_related() per chunk, so only one chunk of model
+    # instances is alive at a time
+    rows = queryset.iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        yield from serializer_class(chunk, many=True, context=context).data
+
+
+def _json_array(rows, renderer):
+    yield b'['
+    for index, row in enumerate(rows):
+        yield (b',' if index else b'') + renderer.render(row)
+    yield b']'
+
+
+def _ndjson(rows, renderer):
+    for row in rows:
+        yield renderer.render(row) + b'\n'
+
+
+def stream_queryset(queryset, serializer_class, context=None, format='json', chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Stream a serialized queryset as one JSON array or as NDJSON (one object per line).
+
+    Rows are read, serialized and written `chunk_size` at a time, so memory
+    use stays flat however many rows are exported.
+    """
+    rows = _serialized_rows(queryset, serializer_class, context or {}, chunk_size)
+    body = _ndjson if format == 'ndjson' else _json_array
+    return StreamingHttpResponse(body(rows, JSONRenderer()), content_type=STREAM_FORMATS[format])
+
+
+class StreamingListMixin:
+    """
+    Let `list` stream the whole filtered queryset unpaginated with
+    `?stream=json` (or `?stream=1`) and `?stream=ndjson`, for exports.
+    """
+
+    def list(self, request, *args, **kwargs):
+        format = request.query_params.get('stream')
+        if not format:
+            return super().list(request, *args, **kwargs)
+        if format in ('1', 'true'):
+            format = 'json'
+        if format not in STREAM_FORMATS:
+            return Response(
+                {'detail': f"stream must be one of: {', '.join(STREAM_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        queryset = self.filter_queryset(self.get_queryset())
+        if not queryset.ordered:
+            # Same order as the paginated listing
+            queryset = queryset.order_by(*getattr(self.paginator, 'ordering', None) or ('pk',))
+        return stream_queryset(queryset, self.get_serializer_class(), self.get_serializer_context(), format)
@@ -34,6 +34,7 @@ urlpatterns = [
     path('api/orders/', include('orders.urls')),
     path('api/reviews/', include('reviews.urls')),
     path('api/notifications/', include('notifications.urls')),  # Add notifications URL patterns
+    path('api/search/', include('search.urls')),
 ]
 
 # Serve media files in development
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'uchef_project.settings')
 
 application = get_wsgi_application()
+
+# Build the search suggestions now rather than on the first autocomplete request
+from search.suggest import get_suggester  # noqa: E402
+
+get_suggester().warm_up()
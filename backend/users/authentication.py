@@ -0,0 +1,21 @@
+from rest_framework.authtoken.models import Token
+
+
+async def arequest_user(request, allow_query_token=False):
+    """
+    Authenticate a plain async Django view with a DRF token or the session.
+
+    `allow_query_token` also accepts ?token=, for clients such as EventSource
+    that can't set headers. Returns None for anonymous or inactive users.
+    """
+    key = request.GET.get('token') if allow_query_token else None
+    authorization = request.headers.get('Authorization', '')
+    if not key and authorization.startswith('Token '):
+        key = authorization.split(' ', 1)[1]
+
+    if key:
+        token = await Token.objects.select_related('user').filter(key=key).afirst()
+        return token.user if token and token.user.is_active else None
+
+    user = await request.auser()
+    return user if user.is_authenticated else None
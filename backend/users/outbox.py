@@ -0,0 +1,105 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 8
+# Retry delays double from RETRY_BASE_DELAY up to RETRY_MAX_DELAY (seconds)
+RETRY_BASE_DELAY = 30
+RETRY_MAX_DELAY = 60 * 60
+# How long a worker owns the batch it claimed before another worker may take it over
+CLAIM_LEASE = 5 * 60
+
+
+def queue_email(recipient, subject, body, from_email=None):
+    """
+    Put an email in the outbox instead of talking to the mail server.
+
+    The row is written in the caller's transaction, so an email for a user
+    whose registration rolls back is never sent.
+    """
+    return OutboundEmail.objects.create(
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL,
+    )
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_DELAY * 2 ** (attempts - 1), RETRY_MAX_DELAY))
+
+
+def claim_batch(batch_size):
+    """Lease up to `batch_size` due emails to this worker"""
+    now = timezone.now()
+    with transaction.atomic():
+        due = OutboundEmail.objects.filter(status='pending', next_attempt_at__lte=now).order_by('next_attempt_at', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            # Concurrent workers take disjoint batches instead of waiting on each other
+            due = due.select_for_update(skip_locked=True)
+        batch = list(due[:batch_size])
+        OutboundEmail.objects.filter(id__in=[email.id for email in batch]).update(
+            next_attempt_at=now + timedelta(seconds=CLAIM_LEASE)
+        )
+    return batch
+
+
+def send_batch(batch_size=50):
+    """
+    Send one batch of due emails over a single mail server connection.
+
+    Returns (sent, failed) counts. A failed email is retried with exponential
+    backoff and given up on after MAX_ATTEMPTS.
+    """
+    batch = claim_batch(batch_size)
+    if not batch:
+        return 0, 0
+
+    sent = failed = 0
+    mail_connection = get_connection(fail_silently=False)
+    try:
+        mail_connection.open()
+    except Exception as e:
+        # The server is unreachable: count it as a failed attempt for the whole batch
+        logger.error(f"Could not connect to the mail server: {str(e)}")
+        for email in batch:
+            _record_failure(email, e)
+        return 0, len(batch)
+
+    try:
+        for email in batch:
+            message = EmailMessage(
+                email.subject, email.body, email.from_email, [email.recipient], connection=mail_connection
+            )
+            try:
+                message.send()
+            except Exception as e:
+                failed += 1
+                _record_failure(email, e)
+            else:
+                sent += 1
+                OutboundEmail.objects.filter(id=email.id).update(
+                    status='sent', attempts=email.attempts + 1, sent_at=timezone.now(), last_error=''
+                )
+    finally:
+        mail_connection.close()
+    return sent, failed
+
+
+def _record_failure(email, error):
+    attempts = email.attempts + 1
+    if attempts >= MAX_ATTEMPTS:
+        logger.error(f"Giving up on email {email.id} to {email.recipient} after {attempts} attempts: {str(error)}")
+        changes = {'status': 'failed'}
+    else:
+        logger.warning(f"Email {email.id} to {email.recipient} failed (attempt {attempts}), retrying: {str(error)}")
+        changes = {'next_attempt_at': timezone.now() + retry_delay(attempts)}
+    OutboundEmail.objects.filter(id=email.id).update(attempts=attempts, last_error=str(error), **changes)
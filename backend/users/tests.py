@@ -1,3 +1,212 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from .models import OutboundEmail, User
+from .outbox import MAX_ATTEMPTS, RETRY_MAX_DELAY, queue_email, retry_delay, send_batch
+
+PASSWORD_RESET_URL = '/api/users/password-reset/'
+
+
+class CountingBackend(EmailBackend):
+    """The locmem backend, counting the connections opened to it"""
+    opened = 0
+
+    def open(self):
+        CountingBackend.opened += 1
+        return super().open()
+
+
+class RejectingBackend(EmailBackend):
+    """Refuses every message sent to a recipient in `rejected`"""
+    rejected = set()
+
+    def send_messages(self, messages):
+        for message in messages:
+            if set(message.to) & self.rejected:
+                raise ConnectionResetError('rejected')
+        return super().send_messages(messages)
+
+
+class UnreachableBackend(EmailBackend):
+
+    def open(self):
+        raise ConnectionRefusedError('unreachable')
+
+
+class OutboxTests(TestCase):
+    """Emails wait in the outbox and are delivered, retried or given up on by send_batch"""
+
+    def setUp(self):
+        CountingBackend.opened = 0
+        RejectingBackend.rejected = set()
+
+    def queue(self, count):
+        return [queue_email(f'user{n}@example.com', f'Subject {n}', 'Body') for n in range(count)]
+
+    def make_due(self):
+        OutboundEmail.objects.update(next_attempt_at=timezone.now())
+
+    def send_failing_batch(self):
+        with self.assertLogs('users.outbox', 'WARNING') as logs:
+            result = send_batch()
+        return result, logs.output
+
+    def test_queued_email_is_sent_by_the_worker(self):
+        email = queue_email('user@example.com', 'Hello', 'Body')
+        self.assertEqual(mail.outbox, [])
+
+        self.assertEqual(send_batch(), (1, 0))
+        self.assertEqual([(m.to, m.subject, m.body) for m in mail.outbox], [(['user@example.com'], 'Hello', 'Body')])
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts, email.last_error), ('sent', 1, ''))
+        self.assertIsNotNone(email.sent_at)
+
+    def test_rolled_back_email_is_never_queued(self):
+        try:
+            with transaction.atomic():
+                queue_email('user@example.com', 'Hello', 'Body')
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertEqual(send_batch(), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+    @override_settings(EMAIL_BACKEND='users.tests.CountingBackend')
+    def test_batch_is_sent_over_one_connection(self):
+        self.queue(5)
+        self.assertEqual(send_batch(batch_size=3), (3, 0))
+        self.assertEqual(CountingBackend.opened, 1)
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(OutboundEmail.objects.filter(status='pending').count(), 2)
+
+    @override_settings(EMAIL_BACKEND='users.tests.RejectingBackend')
+    def test_failed_email_is_retried_with_backoff(self):
+        rejected, delivered = self.queue(2)
+        RejectingBackend.rejected = {rejected.recipient}
+
+        before = timezone.now()
+        self.assertEqual(self.send_failing_batch()[0], (1, 1))
+        self.assertEqual([m.to for m in mail.outbox], [[delivered.recipient]])
+        rejected.refresh_from_db()
+        self.assertEqual((rejected.status, rejected.attempts, rejected.last_error), ('pending', 1, 'rejected'))
+        self.assertGreaterEqual(rejected.next_attempt_at, before + retry_delay(1))
+
+        # Not due again until the backoff has passed
+        self.assertEqual(send_batch(), (0, 0))
+
+        self.make_due()
+        before = timezone.now()
+        self.assertEqual(self.send_failing_batch()[0], (0, 1))
+        rejected.refresh_from_db()
+        self.assertEqual(rejected.attempts, 2)
+        self.assertGreaterEqual(rejected.next_attempt_at, before + retry_delay(2))
+
+        RejectingBackend.rejected = set()
+        self.make_due()
+        self.assertEqual(send_batch(), (1, 0))
+        rejected.refresh_from_db()
+        self.assertEqual((rejected.status, rejected.attempts, rejected.last_error), ('sent', 3, ''))
+
+    def test_retry_delay_doubles_up_to_the_cap(self):
+        self.assertEqual(retry_delay(2), 2 * retry_delay(1))
+        self.assertEqual(retry_delay(3), 2 * retry_delay(2))
+        self.assertEqual(retry_delay(MAX_ATTEMPTS * 4), timedelta(seconds=RETRY_MAX_DELAY))
+
+    @override_settings(EMAIL_BACKEND='users.tests.RejectingBackend')
+    def test_email_is_given_up_on_after_max_attempts(self):
+        email = queue_email('user@example.com', 'Hello', 'Body')
+        RejectingBackend.rejected = {email.recipient}
+
+        for attempt in range(1, MAX_ATTEMPTS + 1):
+            self.make_due()
+            result, logs = self.send_failing_batch()
+            self.assertEqual(result, (0, 1))
+            email.refresh_from_db()
+            self.assertEqual(email.attempts, attempt)
+        self.assertEqual(email.status, 'failed')
+        self.assertTrue(logs[-1].startswith('ERROR:users.outbox:Giving up on email'), logs)
+
+        self.make_due()
+        self.assertEqual(send_batch(), (0, 0))
+        self.assertEqual(mail.outbox, [])
+
+    @override_settings(EMAIL_BACKEND='users.tests.UnreachableBackend')
+    def test_unreachable_server_fails_the_whole_batch(self):
+        self.queue(3)
+        result, logs = self.send_failing_batch()
+        self.assertEqual(result, (0, 3))
+        self.assertEqual(logs[0], 'ERROR:users.outbox:Could not connect to the mail server: unreachable')
+        self.assertEqual(
+            list(OutboundEmail.objects.values_list('status', 'attempts', 'last_error').distinct()),
+            [('pending', 1, 'unreachable')],
+        )
+
+
+class SendQueuedEmailsCommandTests(TestCase):
+
+    def send_queued_emails(self, **options):
+        out = StringIO()
+        call_command('send_queued_emails', stdout=out, **options)
+        return out.getvalue()
+
+    def test_drains_the_outbox_in_batches(self):
+        for n in range(5):
+            queue_email(f'user{n}@example.com', 'Hello', 'Body')
+
+        output = self.send_queued_emails(batch_size=2)
+        self.assertEqual(output.splitlines(), [
+            'sent 2, failed 0', 'sent 2, failed 0', 'sent 1, failed 0', 'Outbox drained: 5 sent, 0 failed attempts',
+        ])
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(OutboundEmail.objects.exclude(status='sent').exists())
+
+    @override_settings(EMAIL_BACKEND='users.tests.UnreachableBackend')
+    def test_failed_emails_wait_for_their_retry(self):
+        queue_email('user@example.com', 'Hello', 'Body')
+        # The failed email is not due again, so one pass ends the run
+        with self.assertLogs('users.outbox', 'WARNING'):
+            output = self.send_queued_emails()
+        self.assertEqual(output.splitlines(), [
+            'sent 0, failed 1', 'Outbox drained: 0 sent, 1 failed attempts',
+        ])
+
+    def test_empty_outbox(self):
+        self.assertEqual(self.send_queued_emails().splitlines(), ['Outbox drained: 0 sent, 0 failed attempts'])
+
+
+class PasswordResetRequestTests(TestCase):
+    """The answer doesn't reveal whether an email belongs to an account"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='customer', email='known@example.com', password='x')
+
+    def request_reset(self, data):
+        return APIClient().post(PASSWORD_RESET_URL, data, format='json')
+
+    def test_known_and_unknown_emails_get_the_same_answer(self):
+        known = self.request_reset({'email': 'known@example.com'})
+        unknown = self.request_reset({'email': 'unknown@example.com'})
+
+        self.assertEqual((known.status_code, unknown.status_code), (200, 200))
+        self.assertEqual(known.data, unknown.data)
+        # Nothing is sent during the request; only the known email is queued
+        self.assertEqual(mail.outbox, [])
+        self.assertEqual(list(OutboundEmail.objects.values_list('recipient', flat=True)), ['known@example.com'])
+
+        self.assertEqual(send_batch(), (1, 0))
+        self.assertEqual(mail.outbox[0].to, ['known@example.com'])
+        self.assertIn('/reset-password/', mail.outbox[0].body)
+
+    def test_missing_email_is_rejected(self):
+        response = self.request_reset({})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data, {'error': 'Email is required'})
@@ -1,10 +1,10 @@
-from django.core.mail import send_mail
 from django.conf import settings
 from django.utils.http import urlsafe_base64_encode
 from django.utils.encoding import force_bytes
 from django.contrib.auth.tokens import default_token_generator
 from decouple import config
 import logging
+from .outbox import queue_email
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +12,7 @@ def send_activation_email(user):
     """
     Centralized function to send activation emails to users.
     This eliminates redundant code across the application.
+    The email is queued in the outbox and delivered by the send_queued_emails command.
     """
     try:
         # Get the base URL from environment variable
@@ -29,20 +30,19 @@ def send_activation_email(user):
         subject = "Activate your Uchef account"
         message = f"Hi {user.username},\n\nPlease click the link below to activate your account:\n\n{activation_link}\n\nThank you!"
         from_email = settings.DEFAULT_FROM_EMAIL
-        recipient_list = [user.email]
         
-        logger.info(f"Sending activation email to {user.email} with link {activation_link}")
-        send_mail(subject, message, from_email, recipient_list, fail_silently=False)
-        logger.info(f"Activation email sent successfully to {user.email}")
+        queue_email(user.email, subject, message, from_email)
+        logger.info(f"Activation email queued for {user.email}")
         return True
     except Exception as e:
-        logger.error(f"Failed to send activation email to {user.email}: {str(e)}")
+        logger.error(f"Failed to queue activation email for {user.email}: {str(e)}")
         return False
 
 
 def send_password_reset_email(user):
     """
     Send a password reset email to the user with a secure token link.
+    The email is queued in the outbox and delivered by the send_queued_emails command.
     """
     try:
         # Get the base URL from environment variable
@@ -57,12 +57,10 @@ def send_password_reset_email(user):
         subject = "Reset your UChef password"
         message = f"Hi {user.username},\n\nWe received a request to reset your password. If you didn't make this request, you can safely ignore this email.\n\nTo reset your password, click the link below:\n\n{reset_url}\n\nThis link will expire in 24 hours.\n\nThank you!"
         from_email = settings.DEFAULT_FROM_EMAIL
-        recipient_list = [user.email]
         
-        logger.info(f"Sending password reset email to {user.email} with link {reset_url}")
-        send_mail(subject, message, from_email, recipient_list, fail_silently=False)
-        logger.info(f"Password reset email sent successfully to {user.email}")
+        queue_email(user.email, subject, message, from_email)
+        logger.info(f"Password reset email queued for {user.email}")
         return True
     except Exception as e:
-        logger.error(f"Failed to send password reset email to {user.email}: {str(e)}")
+        logger.error(f"Failed to queue password reset email for {user.email}: {str(e)}")
         return False
\ No newline at end of file
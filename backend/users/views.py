@@ -10,6 +10,8 @@ from django.utils.http import urlsafe_base64_decode
 from django.contrib.auth.tokens import default_token_generator
 from rest_framework.views import APIView
 from .utils import send_activation_email, send_password_reset_email
+from uchef_project.pagination import UserCursorPagination, IdCursorPagination
+from uchef_project.streaming import StreamingListMixin
 from decouple import config
 
 
@@ -72,10 +74,11 @@ class UserRegistrationView(generics.CreateAPIView):
         user = serializer.save(is_active=False)
       
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(StreamingListMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = UserCursorPagination
     
     def get_permissions(self):
         if self.action == 'create':
@@ -84,9 +87,11 @@ class UserViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         user = self.request.user
+        # The serializer nests the profile
+        queryset = User.objects.select_related('profile')
         if user.is_staff or user.user_type == 'admin':
-            return User.objects.all()
-        return User.objects.filter(id=user.id)
+            return queryset
+        return queryset.filter(id=user.id)
     
     
     
@@ -95,6 +100,7 @@ class UserProfileViewSet(viewsets.ModelViewSet):
     queryset = UserProfile.objects.all()
     serializer_class = UserProfileSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = IdCursorPagination
     
     def get_queryset(self):
         user = self.request.user
@@ -174,19 +180,14 @@ class PasswordResetRequestView(APIView):
         if not email:
             return Response({'error': 'Email is required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        try:
-            user = User.objects.get(email=email)
-            success = send_password_reset_email(user)
-            
-            if success:
-                return Response({'message': 'Password reset email sent successfully'}, status=status.HTTP_200_OK)
-            else:
-                return Response({'error': 'Failed to send reset email'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-                
-        except User.DoesNotExist:
-            # We don't want to reveal which emails exist in our system
-            # So we still return success even if the email doesn't exist
-            return Response({'message': 'Password reset email sent successfully'}, status=status.HTTP_200_OK)
+        # The answer is the same whether or not the email belongs to an account,
+        # and sending happens later in the outbox worker, so neither the status
+        # code nor the response time reveals which emails exist
+        for user in User.objects.filter(email=email):
+            send_password_reset_email(user)
+        
+        return Response({'message': 'If an account exists for this email, a password reset link has been sent'},
+                        status=status.HTTP_200_OK)
 
 
 class PasswordResetConfirmView(APIView):
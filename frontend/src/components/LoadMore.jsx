@@ -0,0 +1,16 @@
+import React from 'react';
+
+// "Load more" button for cursor-paginated lists; hidden on the last page
+const LoadMore = ({ next, loading, onLoadMore }) => {
+  if (!next) return null;
+
+  return (
+    <div style={{ textAlign: 'center', margin: '2rem 0' }}>
+      <button className="btn btn-outline" onClick={() => onLoadMore(next)} disabled={loading}>
+        {loading ? 'Loading...' : 'Load more'}
+      </button>
+    </div>
+  );
+};
+
+export default LoadMore;
@@ -2,26 +2,62 @@ import React, { useEffect } from 'react';
 import { useDispatch, useSelector } from 'react-redux';
 import { Link } from 'react-router-dom';
 import { FaBell } from 'react-icons/fa';
-import { fetchUnreadNotifications } from '../../store/slices/notificationSlice';
+import {
+  addNotification,
+  fetchUnreadNotifications,
+  NOTIFICATION_STREAM_URL
+} from '../../store/slices/notificationSlice';
 import './notifications.css';
 
+// How often unread notifications are polled while the stream is unavailable
+const POLL_INTERVAL_MS = 30000;
+
 const NotificationIcon = () => {
   const dispatch = useDispatch();
   const { unreadNotifications } = useSelector((state) => state.notifications);
   const { isAuthenticated } = useSelector((state) => state.auth);
 
-  // Fetch unread notifications on component mount and when user authenticates
+  // Fetch unread notifications on mount, then add each one the server pushes
+  // (the stream resumes from the last event on reconnect). While the stream
+  // is down - no EventSource, network errors, or a WSGI server refusing it
+  // with 503 - poll every 30 seconds instead.
   useEffect(() => {
-    if (isAuthenticated) {
-      dispatch(fetchUnreadNotifications());
-      
-      // Set up polling to fetch notifications every 30 seconds
-      const interval = setInterval(() => {
-        dispatch(fetchUnreadNotifications());
-      }, 30000);
-      
-      return () => clearInterval(interval);
+    if (!isAuthenticated) return;
+    
+    dispatch(fetchUnreadNotifications());
+    
+    let interval = null;
+    const startPolling = () => {
+      if (!interval) {
+        interval = setInterval(() => {
+          dispatch(fetchUnreadNotifications());
+        }, POLL_INTERVAL_MS);
+      }
+    };
+    const stopPolling = () => {
+      clearInterval(interval);
+      interval = null;
+    };
+    
+    const token = localStorage.getItem('token');
+    if (!token || typeof EventSource === 'undefined') {
+      startPolling();
+      return stopPolling;
     }
+    
+    const stream = new EventSource(`${NOTIFICATION_STREAM_URL}?token=${encodeURIComponent(token)}`);
+    stream.addEventListener('notification', (event) => {
+      dispatch(addNotification(JSON.parse(event.data)));
+    });
+    // Connected again: the stream replays what was missed, so polling can stop
+    stream.onopen = stopPolling;
+    // The browser retries on its own unless the server refused the stream
+    stream.onerror = startPolling;
+    
+    return () => {
+      stream.close();
+      stopPolling();
+    };
   }, [dispatch, isAuthenticated]);
 
   if (!isAuthenticated) return null;
@@ -2,6 +2,8 @@ import { useState, useEffect } from 'react';
 import { useSelector } from 'react-redux';
 import axios from 'axios';
 import ReviewForm from './ReviewForm';
+import LoadMore from '../LoadMore';
+import { mergePage, toPage } from '../../utils/pagination';
 
 // API URL constant
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
@@ -10,6 +12,8 @@ const ReviewList = ({ type, itemId }) => {
   const { user, isAuthenticated } = useSelector(state => state.auth);
   
   const [reviews, setReviews] = useState([]);
+  const [reviewsNext, setReviewsNext] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
   const [showReviewForm, setShowReviewForm] = useState(false);
@@ -58,12 +62,15 @@ const ReviewList = ({ type, itemId }) => {
       console.log(`Fetching reviews from: ${endpoint}?${queryParam}=${itemId}`);
       const response = await axios.get(`${endpoint}?${queryParam}=${itemId}`);
       console.log('Reviews data:', response.data);
-      setReviews(response.data);
+      const page = toPage(response.data);
+      setReviews(page.results);
+      setReviewsNext(page.next);
       
-      // Check if the user has already reviewed this item
+      // Check if the user has already reviewed this item; it may be on a later page, so ask for it
       if (isAuthenticated && user) {
         console.log('Looking for user review with user ID:', user.id);
-        const userReviewFound = response.data.find(review => review.user === user.id);
+        const userResponse = await axios.get(`${endpoint}?${queryParam}=${itemId}&user=${user.id}`);
+        const userReviewFound = toPage(userResponse.data).results[0];
         console.log('User review found:', userReviewFound);
         if (userReviewFound) {
           setUserReview(userReviewFound);
@@ -80,6 +87,21 @@ const ReviewList = ({ type, itemId }) => {
     }
   };
   
+  // Append the next page of reviews
+  const loadMoreReviews = async (next) => {
+    setLoadingMore(true);
+    try {
+      const page = toPage((await axios.get(next)).data);
+      setReviews(rows => mergePage(rows, page, true));
+      setReviewsNext(page.next);
+    } catch (error) {
+      console.error('Error fetching reviews:', error);
+      setError('Failed to load reviews');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+  
   // Delete a review
   const handleDeleteReview = async (reviewId) => {
     if (!window.confirm('Are you sure you want to delete your review?')) {
@@ -266,6 +288,7 @@ const ReviewList = ({ type, itemId }) => {
           </div>
         ))}
       </div>
+      <LoadMore next={reviewsNext} loading={loadingMore} onLoadMore={loadMoreReviews} />
     </div>
   );
 };
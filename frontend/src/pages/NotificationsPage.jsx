@@ -18,11 +18,12 @@ import {
   markNotificationAsRead, 
   markAllNotificationsAsRead 
 } from '../store/slices/notificationSlice';
+import LoadMore from '../components/LoadMore';
 import './NotificationsPage.css';
 
 const NotificationsPage = () => {
   const dispatch = useDispatch();
-  const { notifications, loading, error } = useSelector((state) => state.notifications);
+  const { notifications, notificationsNext, loading, loadingMore, error } = useSelector((state) => state.notifications);
   const [activeTab, setActiveTab] = useState('all');
   const [filteredNotifications, setFilteredNotifications] = useState([]);
 
@@ -201,6 +202,12 @@ const NotificationsPage = () => {
           ))}
         </div>
       )}
+      
+      <LoadMore
+        next={notificationsNext}
+        loading={loadingMore}
+        onLoadMore={(next) => dispatch(fetchNotifications({ next }))}
+      />
     </div>
   );
 };
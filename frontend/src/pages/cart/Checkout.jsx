@@ -1,14 +1,17 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useMemo } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useDispatch, useSelector } from 'react-redux';
 import { createOrder } from '../../store/slices/orderSlice.js';
+import { clearCart } from '../../store/slices/cartSlice.js';
 import { CardElement, Elements, useStripe, useElements } from '@stripe/react-stripe-js';
 import { stripePromise } from '../../services/api.js';
 import axios from 'axios';
 
-const CheckoutForm = ({ formData, setFormData, handleSubmit, items, total }) => {
+const CheckoutForm = ({ formData, setFormData, handleSubmit, placeOrder, idempotencyKey }) => {
     const stripe = useStripe();
     const elements = useElements();
+    const dispatch = useDispatch();
+    const navigate = useNavigate();
     const [error, setError] = useState(null);
     const [loading, setLoading] = useState(false);
 
@@ -23,14 +26,28 @@ const CheckoutForm = ({ formData, setFormData, handleSubmit, items, total }) =>
         setError(null);
 
         try {
-            // Step 1: Call the backend to create a Payment Intent
+            // Step 1: Create the order; the cart is kept until the payment goes through
+            const resultAction = await placeOrder({ keepCart: true });
+            if (!createOrder.fulfilled.match(resultAction)) {
+                setLoading(false);
+                return;
+            }
+            const order = resultAction.payload;
+
+            // Step 2: Create a Payment Intent for it; the backend prices the order from the menu
             const response = await axios.post('http://127.0.0.1:8000/api/orders/create-payment-intent/', {
-                amount: Math.round(total * 100), // Convert total to cents
+                order: order.id,
+            }, {
+                headers: {
+                    Authorization: `Token ${localStorage.getItem('token')}`,
+                    // A resubmitted checkout gets the same intent back
+                    'Idempotency-Key': idempotencyKey,
+                },
             });
 
             const { clientSecret } = response.data;
 
-            // Step 2: Confirm the payment using Stripe.js
+            // Step 3: Confirm the payment using Stripe.js
             const { error, paymentIntent } = await stripe.confirmCardPayment(clientSecret, {
                 payment_method: {
                     card: elements.getElement(CardElement),
@@ -41,11 +58,11 @@ const CheckoutForm = ({ formData, setFormData, handleSubmit, items, total }) =>
                 setError(error.message);
                 setLoading(false);
             } else if (paymentIntent.status === 'succeeded') {
-                // Payment succeeded, proceed with order creation
-                handleSubmit(e);
+                dispatch(clearCart());
+                navigate(`/orders/${order.id}`);
             }
         } catch (err) {
-            setError(err.message);
+            setError(err.response?.data?.detail || err.message);
             setLoading(false);
         }
     };
@@ -92,6 +109,10 @@ const Checkout = () => {
 
     const { delivery_address, delivery_notes, payment_method } = formData;
 
+    // One key per distinct submission: resubmitting the same checkout replays the
+    // first result, while editing the form or cart starts a new order
+    const idempotencyKey = useMemo(() => crypto.randomUUID(), [formData, items]);
+
     useEffect(() => {
         // Redirect if not authenticated or cart is empty
         if (!isAuthenticated) {
@@ -123,9 +144,7 @@ const Checkout = () => {
         setFormData({ ...formData, [e.target.name]: e.target.value });
     };
 
-    const handleSubmit = (e) => {
-        e.preventDefault();
-
+    const placeOrder = ({ keepCart = false } = {}) => {
         const orderData = {
             ...formData,
             restaurant: restaurantId,
@@ -136,14 +155,22 @@ const Checkout = () => {
             amount: total,
         };
 
-        dispatch(
+        return dispatch(
             createOrder({
                 orderData,
                 cartItems: items,
                 restaurantId,
                 paymentData,
+                idempotencyKey,
+                keepCart,
             })
-        ).then((resultAction) => {
+        );
+    };
+
+    const handleSubmit = (e) => {
+        e.preventDefault();
+
+        placeOrder().then((resultAction) => {
             if (createOrder.fulfilled.match(resultAction)) {
                 const order = resultAction.payload;
                 navigate(`/orders/${order.id}`);
@@ -171,8 +198,8 @@ const Checkout = () => {
                                 formData={formData}
                                 setFormData={setFormData}
                                 handleSubmit={handleSubmit}
-                                items={items}
-                                total={total}
+                                placeOrder={placeOrder}
+                                idempotencyKey={idempotencyKey}
                             />
                         </Elements>
                     ) : (
@@ -5,6 +5,8 @@ import { fetchAllUsers, deleteUser } from '../../store/slices/authSlice';
 import { fetchRestaurants, updateRestaurantStatus } from '../../store/slices/restaurantSlice';
 import { fetchUserOrders } from '../../store/slices/orderSlice';
 import axios from 'axios';
+import LoadMore from '../../components/LoadMore';
+import { toPage } from '../../utils/pagination';
 
 // API URL constant
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
@@ -95,6 +97,11 @@ const AdminDashboard = () => {
   const [adminUsers, setAdminUsers] = useState([]);
   const [adminRestaurants, setAdminRestaurants] = useState([]);
   const [adminOrders, setAdminOrders] = useState([]);
+  // Cursor links to the next page of each list (null on the last page)
+  const [adminUsersNext, setAdminUsersNext] = useState(null);
+  const [adminRestaurantsNext, setAdminRestaurantsNext] = useState(null);
+  const [adminOrdersNext, setAdminOrdersNext] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   
   // Authentication and role check
   useEffect(() => {
@@ -128,19 +135,18 @@ const AdminDashboard = () => {
             axios.get(`${API_URL}/orders/orders/`, { headers })
           ]);
           
-          // Update local state - ensure we're always setting arrays
-          // For users, we need to handle the response format correctly
-          const usersData = usersResponse.data;
-          setAdminUsers(Array.isArray(usersData) ? usersData : 
-                        (usersData && typeof usersData === 'object' && usersData.results ? usersData.results : []));
+          // Each list starts with its first page; "Load more" fetches the rest
+          const usersPage = toPage(usersResponse.data);
+          setAdminUsers(usersPage.results);
+          setAdminUsersNext(usersPage.next);
           
-          setAdminRestaurants(Array.isArray(restaurantsResponse.data) ? restaurantsResponse.data : 
-                             (restaurantsResponse.data && typeof restaurantsResponse.data === 'object' && 
-                              restaurantsResponse.data.results ? restaurantsResponse.data.results : []));
+          const restaurantsPage = toPage(restaurantsResponse.data);
+          setAdminRestaurants(restaurantsPage.results);
+          setAdminRestaurantsNext(restaurantsPage.next);
           
-          setAdminOrders(Array.isArray(ordersResponse.data) ? ordersResponse.data : 
-                        (ordersResponse.data && typeof ordersResponse.data === 'object' && 
-                         ordersResponse.data.results ? ordersResponse.data.results : []));
+          const ordersPage = toPage(ordersResponse.data);
+          setAdminOrders(ordersPage.results);
+          setAdminOrdersNext(ordersPage.next);
           setHasLoadedData(true);
         } catch (error) {
           console.error('Error fetching admin dashboard data:', error);
@@ -154,6 +160,22 @@ const AdminDashboard = () => {
     }
   }, [isAuthenticated, user, hasLoadedData, isLoading]);
   
+  // Append the page at `next` to one of the lists
+  const loadMore = async (next, setRows, setNext) => {
+    setLoadingMore(true);
+    try {
+      const token = localStorage.getItem('token');
+      const page = toPage((await axios.get(next, { headers: { Authorization: `Token ${token}` } })).data);
+      setRows(rows => [...rows, ...page.results]);
+      setNext(page.next);
+    } catch (error) {
+      console.error('Error loading more dashboard data:', error);
+      setError(error.message || 'Failed to load more data');
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+  
   // Ensure all data arrays are actually arrays before filtering
   const safeAdminUsers = Array.isArray(adminUsers) ? adminUsers : [];
   const safeAdminRestaurants = Array.isArray(adminRestaurants) ? adminRestaurants : [];
@@ -259,21 +281,21 @@ const AdminDashboard = () => {
                   <div style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fill, minmax(250px, 1fr))', gap: '1rem' }}>
                     <div className="card">
                       <div className="card-body" style={{ textAlign: 'center' }}>
-                        <h3>{safeAdminUsers.length}</h3>
+                        <h3>{safeAdminUsers.length}{adminUsersNext ? '+' : ''}</h3>
                         <p>Total Users</p>
                       </div>
                     </div>
                     
                     <div className="card">
                       <div className="card-body" style={{ textAlign: 'center' }}>
-                        <h3>{safeAdminRestaurants.length}</h3>
+                        <h3>{safeAdminRestaurants.length}{adminRestaurantsNext ? '+' : ''}</h3>
                         <p>Restaurants</p>
                       </div>
                     </div>
                     
                     <div className="card">
                       <div className="card-body" style={{ textAlign: 'center' }}>
-                        <h3>{safeAdminOrders.length}</h3>
+                        <h3>{safeAdminOrders.length}{adminOrdersNext ? '+' : ''}</h3>
                         <p>Total Orders</p>
                       </div>
                     </div>
@@ -285,6 +307,7 @@ const AdminDashboard = () => {
                             ? safeAdminOrders.reduce((total, order) => total + (parseFloat(order?.total_price) || 0), 0).toFixed(2)
                             : '0.00'
                           }
+                          {adminOrdersNext ? '+' : ''}
                         </h3>
                         <p>Total Revenue</p>
                       </div>
@@ -381,6 +404,11 @@ const AdminDashboard = () => {
                     </table>
                   </div>
                 )}
+                <LoadMore
+                  next={adminUsersNext}
+                  loading={loadingMore}
+                  onLoadMore={(next) => loadMore(next, setAdminUsers, setAdminUsersNext)}
+                />
               </div>
             )}
             
@@ -546,6 +574,11 @@ const AdminDashboard = () => {
                     </table>
                   </div>
                 )}
+                <LoadMore
+                  next={adminRestaurantsNext}
+                  loading={loadingMore}
+                  onLoadMore={(next) => loadMore(next, setAdminRestaurants, setAdminRestaurantsNext)}
+                />
               </div>
             )}
             
@@ -634,6 +667,11 @@ const AdminDashboard = () => {
                     </table>
                   </div>
                 )}
+                <LoadMore
+                  next={adminOrdersNext}
+                  loading={loadingMore}
+                  onLoadMore={(next) => loadMore(next, setAdminOrders, setAdminOrdersNext)}
+                />
               </div>
             )}
             
@@ -11,6 +11,8 @@ import {
   updateOrderStatus 
 } from '../../store/slices/orderSlice';
 import { fetchMeals } from '../../store/slices/mealSlice';
+import LoadMore from '../../components/LoadMore';
+import { mergePage, toPage } from '../../utils/pagination';
 
 const API_URL = 'http://localhost:8000/api';
 
@@ -19,8 +21,8 @@ const RestaurantDashboard = () => {
   const dispatch = useDispatch();
   const { user, isAuthenticated } = useSelector(state => state.auth);
   const { currentRestaurant, loading: restaurantLoading, error: restaurantError } = useSelector(state => state.restaurants);
-  const { orders, loading: ordersLoading, error: ordersError } = useSelector(state => state.orders);
-  const { meals, loading: mealsLoading, error: mealsError } = useSelector(state => state.meals);
+  const { orders, ordersNext, loading: ordersLoading, loadingMore: ordersLoadingMore, error: ordersError } = useSelector(state => state.orders);
+  const { meals, mealsNext, loading: mealsLoading, loadingMore: mealsLoadingMore, error: mealsError } = useSelector(state => state.meals);
   
   const [activeTab, setActiveTab] = useState('overview');
   const [editMode, setEditMode] = useState(false);
@@ -38,6 +40,8 @@ const RestaurantDashboard = () => {
   const [ingredients, setIngredients] = useState([]);
   const [ingredientsLoading, setIngredientsLoading] = useState(false);
   const [ingredientsError, setIngredientsError] = useState(null);
+  const [ingredientsNext, setIngredientsNext] = useState(null);
+  const [ingredientsLoadingMore, setIngredientsLoadingMore] = useState(false);
   
   const [mealSearchTerm, setMealSearchTerm] = useState('');
   const [ingredientSearchTerm, setIngredientSearchTerm] = useState('');
@@ -169,10 +173,12 @@ const RestaurantDashboard = () => {
       });
   };
   
-  const fetchIngredients = async () => {
+  // `next` appends the following page to the ingredients already shown
+  const fetchIngredients = async (next) => {
     if (!currentRestaurant) return;
     
-    setIngredientsLoading(true);
+    const setLoading = next ? setIngredientsLoadingMore : setIngredientsLoading;
+    setLoading(true);
     setIngredientsError(null);
     
     try {
@@ -180,7 +186,7 @@ const RestaurantDashboard = () => {
       if (!token) return;
       
       const response = await axios.get(
-        `${API_URL}/restaurants/restaurants/${currentRestaurant.id}/ingredients/`,
+        next || `${API_URL}/restaurants/restaurants/${currentRestaurant.id}/ingredients/`,
         {
           headers: {
             Authorization: `Token ${token}`
@@ -188,7 +194,9 @@ const RestaurantDashboard = () => {
         }
       );
       
-      setIngredients(response.data);
+      const page = toPage(response.data);
+      setIngredients(rows => mergePage(rows, page, next));
+      setIngredientsNext(page.next);
     } catch (err) {
       console.error('Failed to fetch ingredients:', err);
       setIngredientsError(
@@ -196,7 +204,7 @@ const RestaurantDashboard = () => {
         'Failed to load ingredients. Please try again.'
       );
     } finally {
-      setIngredientsLoading(false);
+      setLoading(false);
     }
   };
   
@@ -540,14 +548,14 @@ const RestaurantDashboard = () => {
               <div style={{ display: 'grid', gridTemplateColumns: 'repeat(auto-fill, minmax(250px, 1fr))', gap: '1rem', marginTop: '1rem' }}>
                 <div className="card">
                   <div className="card-body" style={{ textAlign: 'center' }}>
-                    <h3>{orders?.length || 0}</h3>
+                    <h3>{orders?.length || 0}{ordersNext ? '+' : ''}</h3>
                     <p>Total Orders</p>
                   </div>
                 </div>
                 
                 <div className="card">
                   <div className="card-body" style={{ textAlign: 'center' }}>
-                    <h3>{meals?.length || 0}</h3>
+                    <h3>{meals?.length || 0}{mealsNext ? '+' : ''}</h3>
                     <p>Menu Items</p>
                   </div>
                 </div>
@@ -571,6 +579,7 @@ const RestaurantDashboard = () => {
                         ? orders.reduce((total, order) => total + parseFloat(order?.total_price || 0), 0).toFixed(2)
                         : '0.00'
                       }
+                      {ordersNext ? '+' : ''}
                     </h3>
                     <p>Total Revenue</p>
                   </div>
@@ -679,6 +688,11 @@ const RestaurantDashboard = () => {
                 ))}
               </div>
             )}
+            <LoadMore
+              next={ordersNext}
+              loading={ordersLoadingMore}
+              onLoadMore={(next) => dispatch(fetchUserOrders({ next }))}
+            />
           </div>
         )}
         
@@ -809,6 +823,11 @@ const RestaurantDashboard = () => {
                 </table>
               </div>
             )}
+            <LoadMore
+              next={mealsNext}
+              loading={mealsLoadingMore}
+              onLoadMore={(next) => dispatch(fetchMeals({ next }))}
+            />
           </div>
         )}
         
@@ -961,6 +980,11 @@ const RestaurantDashboard = () => {
                 </table>
               </div>
             )}
+            <LoadMore
+              next={ingredientsNext}
+              loading={ingredientsLoadingMore}
+              onLoadMore={fetchIngredients}
+            />
           </div>
         )}
         
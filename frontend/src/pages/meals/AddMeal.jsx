@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react';
 import { useNavigate } from 'react-router-dom';
 import { useDispatch, useSelector } from 'react-redux';
 import axios from 'axios';
+import { PICK_LIST_PAGE_SIZE, fetchAllPages } from '../../utils/pagination';
 
 const API_URL = 'http://localhost:8000/api';
 
@@ -66,8 +67,8 @@ const AddMeal = () => {
         const token = localStorage.getItem('token');
         if (!token || !currentRestaurant) return;
         
-        const response = await axios.get(
-          `${API_URL}/restaurants/restaurants/${currentRestaurant.id}/ingredients/`,
+        const ingredients = await fetchAllPages(
+          `${API_URL}/restaurants/restaurants/${currentRestaurant.id}/ingredients/?page_size=${PICK_LIST_PAGE_SIZE}`,
           {
             headers: {
               Authorization: `Token ${token}`
@@ -75,7 +76,7 @@ const AddMeal = () => {
           }
         );
         
-        setIngredients(response.data);
+        setIngredients(ingredients);
       } catch (err) {
         console.error('Failed to fetch ingredients:', err);
       }
@@ -85,8 +86,7 @@ const AddMeal = () => {
     const fetchCategories = async () => {
       setCategoryLoading(true);
       try {
-        const response = await axios.get(`${API_URL}/meals/categories/`);
-        setCategories(response.data);
+        setCategories(await fetchAllPages(`${API_URL}/meals/categories/?page_size=${PICK_LIST_PAGE_SIZE}`));
       } catch (err) {
         console.error('Failed to fetch categories:', err);
         setError('Failed to load meal categories. Please try again.');
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { useDispatch, useSelector } from 'react-redux';
 import { fetchMeals, fetchMealCategories } from '../../store/slices/mealSlice';
+import LoadMore from '../../components/LoadMore';
 import { Link } from 'react-router-dom';
 import axios from 'axios';
 import { toast } from 'react-toastify';
@@ -13,7 +14,7 @@ const AllMeals = () => {
   const getAccentClass = (index) => accentClasses[index % accentClasses.length];
 
   const dispatch = useDispatch();
-  const { meals, loading, error, categories } = useSelector(state => state.meals);
+  const { meals, mealsNext, loading, loadingMore, error, categories } = useSelector(state => state.meals);
   const [searchTerm, setSearchTerm] = useState('');
   const [selectedCategory, setSelectedCategory] = useState('');
   const [priceRange, setPriceRange] = useState([0, 10000]);
@@ -26,24 +27,37 @@ const AllMeals = () => {
     dispatch(fetchMealCategories());
   }, [dispatch]);
 
-  // Fetch ingredient availability for all meals
+  // Fetch ingredient availability in batches (the API checks up to 200 per request),
+  // only for the meals not checked yet, i.e. the page "Load more" just added
   useEffect(() => {
+    const unchecked = meals.filter(meal => !(meal.id in availabilityMap));
     const checkAllAvailability = async () => {
       setCheckingAvailability(true);
       let map = {};
-      await Promise.all(meals.map(async meal => {
+      const batches = [];
+      for (let i = 0; i < unchecked.length; i += 200) {
+        batches.push(unchecked.slice(i, i + 200));
+      }
+      await Promise.all(batches.map(async batch => {
         try {
-          const res = await axios.get(`${API_URL}/api/meals/meals/${meal.id}/check_availability/`);
-          map[meal.id] = res.data.unavailable_ingredients.length === 0;
+          const res = await axios.post(`${API_URL}/api/meals/meals/availability/`, {
+            items: batch.map(meal => ({ meal: meal.id, quantity: 1 })),
+            combined: false,
+          });
+          res.data.items.forEach(entry => {
+            map[entry.meal] = entry.is_available;
+          });
         } catch (err) {
-          map[meal.id] = false;
+          batch.forEach(meal => {
+            map[meal.id] = false;
+          });
         }
       }));
-      setAvailabilityMap(map);
+      setAvailabilityMap(current => ({ ...current, ...map }));
       setCheckingAvailability(false);
     };
-    if (meals.length > 0) checkAllAvailability();
-  }, [meals]);
+    if (unchecked.length > 0) checkAllAvailability();
+  }, [meals, availabilityMap]);
 
   useEffect(() => {
     let result = meals;
@@ -149,7 +163,7 @@ const AllMeals = () => {
           </div>
         </div>
         
-        {loading || checkingAvailability ? (
+        {loading || (checkingAvailability && Object.keys(availabilityMap).length === 0) ? (
           <div className="loading"><div className="spinner"></div></div>
         ) : error ? (
           <div className="info-box info-box-accent" style={{ borderColor: 'var(--danger-color)' }}>
@@ -232,6 +246,14 @@ const AllMeals = () => {
             })}
           </div>
         )}
+        
+        {!loading && !error && (
+          <LoadMore
+            next={mealsNext}
+            loading={loadingMore}
+            onLoadMore={(next) => dispatch(fetchMeals({ next }))}
+          />
+        )}
       </div>
     </div>
   );
@@ -4,6 +4,7 @@ import { useDispatch, useSelector } from 'react-redux';
 import axios from 'axios';
 import { addToCart } from '../../store/slices/cartSlice';
 import ReviewList from '../../components/reviews/ReviewList';
+import { toPage } from '../../utils/pagination';
 import { toast } from 'react-toastify';
 
 const API_URL = 'http://localhost:8000/api';
@@ -178,12 +179,12 @@ const CustomMealDetail = () => {
         try {
           // Get the first restaurant from the API
           const token = localStorage.getItem('token');
-          const restaurantsResponse = await axios.get(`${API_URL}/restaurants/restaurants/`, {
+          const restaurantsResponse = await axios.get(`${API_URL}/restaurants/restaurants/?page_size=1`, {
             headers: token ? { Authorization: `Token ${token}` } : {}
           });
           
-          if (restaurantsResponse.data && restaurantsResponse.data.length > 0) {
-            const firstRestaurant = restaurantsResponse.data[0];
+          const [firstRestaurant] = toPage(restaurantsResponse.data).results;
+          if (firstRestaurant) {
             restaurantId = firstRestaurant.id;
             restaurantName = firstRestaurant.name;
             console.log('Using default restaurant:', restaurantName);
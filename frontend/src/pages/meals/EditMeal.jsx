@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react';
 import { useNavigate, useParams } from 'react-router-dom';
 import { useDispatch, useSelector } from 'react-redux';
 import axios from 'axios';
+import { PICK_LIST_PAGE_SIZE, fetchAllPages } from '../../utils/pagination';
 
 const API_URL = 'http://localhost:8000/api';
 
@@ -125,8 +126,8 @@ const EditMeal = () => {
         const token = localStorage.getItem('token');
         if (!token || !currentRestaurant) return;
         
-        const response = await axios.get(
-          `${API_URL}/restaurants/restaurants/${currentRestaurant.id}/ingredients/`,
+        const ingredients = await fetchAllPages(
+          `${API_URL}/restaurants/restaurants/${currentRestaurant.id}/ingredients/?page_size=${PICK_LIST_PAGE_SIZE}`,
           {
             headers: {
               Authorization: `Token ${token}`
@@ -134,7 +135,7 @@ const EditMeal = () => {
           }
         );
         
-        setIngredients(response.data);
+        setIngredients(ingredients);
       } catch (err) {
         console.error('Failed to fetch ingredients:', err);
       }
@@ -144,8 +145,7 @@ const EditMeal = () => {
     const fetchCategories = async () => {
       setCategoryLoading(true);
       try {
-        const response = await axios.get(`${API_URL}/meals/categories/`);
-        setCategories(response.data);
+        setCategories(await fetchAllPages(`${API_URL}/meals/categories/?page_size=${PICK_LIST_PAGE_SIZE}`));
       } catch (err) {
         console.error('Failed to fetch categories:', err);
         setError('Failed to load meal categories. Please try again.');
@@ -2,11 +2,12 @@ import { useEffect } from 'react';
 import { Link, useNavigate } from 'react-router-dom';
 import { useDispatch, useSelector } from 'react-redux';
 import { fetchUserOrders } from '../../store/slices/orderSlice';
+import LoadMore from '../../components/LoadMore';
 
 const OrderHistory = () => {
   const navigate = useNavigate();
   const dispatch = useDispatch();
-  const { orders, loading, error } = useSelector(state => state.orders);
+  const { orders, ordersNext, loading, loadingMore, error } = useSelector(state => state.orders);
   const { isAuthenticated } = useSelector(state => state.auth);
   
   useEffect(() => {
@@ -175,6 +176,12 @@ const OrderHistory = () => {
           </div>
         ))}
       </div>
+      
+      <LoadMore
+        next={ordersNext}
+        loading={loadingMore}
+        onLoadMore={(next) => dispatch(fetchUserOrders({ next }))}
+      />
     </div>
   );
 };
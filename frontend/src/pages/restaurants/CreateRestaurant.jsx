@@ -2,6 +2,7 @@ import { useState, useEffect } from 'react';
 import { useNavigate, useParams } from 'react-router-dom';
 import { useDispatch, useSelector } from 'react-redux';
 import axios from 'axios';
+import { fetchAllPages } from '../../utils/pagination';
 
 const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
 
@@ -58,35 +59,16 @@ const CreateRestaurant = ({ isEdit = false, isAdmin = false }) => {
           const token = localStorage.getItem('token');
           if (!token) return;
           
-          // Get all restaurant owners
-          const ownersResponse = await axios.get(`${API_URL}/users/users/?user_type=restaurant`, {
+          // Every restaurant owner, in pages of the largest size the API serves
+          const ownersData = await fetchAllPages(`${API_URL}/users/users/?user_type=restaurant&page_size=100`, {
             headers: { Authorization: `Token ${token}` }
           });
           
-          // Get all restaurants to check which owners already have restaurants
-          const restaurantsResponse = await axios.get(`${API_URL}/restaurants/restaurants/`, {
+          // Every restaurant, to check which of those owners already have one
+          const restaurantsData = await fetchAllPages(`${API_URL}/restaurants/restaurants/?page_size=100`, {
             headers: { Authorization: `Token ${token}` }
           });
           
-          // Process owners data
-          let ownersData = [];
-          if (Array.isArray(ownersResponse.data)) {
-            ownersData = ownersResponse.data;
-          } else if (ownersResponse.data && typeof ownersResponse.data === 'object' && Array.isArray(ownersResponse.data.results)) {
-            ownersData = ownersResponse.data.results;
-          } else {
-            console.error('Unexpected owners response format:', ownersResponse.data);
-            ownersData = [];
-          }
-          
-          // Process restaurants data
-          let restaurantsData = [];
-          if (Array.isArray(restaurantsResponse.data)) {
-            restaurantsData = restaurantsResponse.data;
-          } else if (restaurantsResponse.data && typeof restaurantsResponse.data === 'object' && Array.isArray(restaurantsResponse.data.results)) {
-            restaurantsData = restaurantsResponse.data.results;
-          }
-          
           // Extract owner IDs that already have restaurants
           // Convert all IDs to strings for consistent comparison
           const ownersWithRestaurantIds = restaurantsData
@@ -5,12 +5,13 @@ import { fetchRestaurantById, fetchRestaurantIngredients } from '../../store/sli
 import { fetchMeals } from '../../store/slices/mealSlice';
 import { addToCart } from '../../store/slices/cartSlice';
 import ReviewList from '../../components/reviews/ReviewList';
+import LoadMore from '../../components/LoadMore';
 
 const RestaurantDetail = () => {
   const { id } = useParams();
   const dispatch = useDispatch();
   const { currentRestaurant, ingredients, loading: restaurantLoading, error: restaurantError } = useSelector(state => state.restaurants);
-  const { meals, loading: mealsLoading, error: mealsError } = useSelector(state => state.meals);
+  const { meals, mealsNext, loading: mealsLoading, loadingMore: mealsLoadingMore, error: mealsError } = useSelector(state => state.meals);
   const [activeTab, setActiveTab] = useState('menu');
   
   useEffect(() => {
@@ -167,6 +168,11 @@ const RestaurantDetail = () => {
               </div>
             ))
           )}
+          <LoadMore
+            next={mealsNext}
+            loading={mealsLoadingMore}
+            onLoadMore={(next) => dispatch(fetchMeals({ next }))}
+          />
         </div>
       ) : activeTab === 'custom' ? (
         <div className="custom-meal-section">
@@ -2,10 +2,11 @@ import { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { useDispatch, useSelector } from 'react-redux';
 import { fetchRestaurants } from '../../store/slices/restaurantSlice';
+import LoadMore from '../../components/LoadMore';
 
 const RestaurantList = () => {
   const dispatch = useDispatch();
-  const { restaurants, loading, error } = useSelector((state) => state.restaurants);
+  const { restaurants, restaurantsNext, loading, loadingMore, error } = useSelector((state) => state.restaurants);
   const [searchTerm, setSearchTerm] = useState('');
   const [selectedAddress, setSelectedAddress] = useState('');
 
@@ -110,6 +111,11 @@ const RestaurantList = () => {
               ))}
             </div>
           )}
+          <LoadMore
+            next={restaurantsNext}
+            loading={loadingMore}
+            onLoadMore={(next) => dispatch(fetchRestaurants({ next }))}
+          />
         </>
       )}
     </div>
@@ -6,6 +6,8 @@ import { fetchUserOrders } from '../../store/slices/orderSlice';
 import { fetchCustomMeals } from '../../store/slices/mealSlice';
 import { addToCart } from '../../store/slices/cartSlice';
 import { validateField, validateForm, isFormValid } from '../../utils/validation';
+import { toPage } from '../../utils/pagination';
+import LoadMore from '../../components/LoadMore';
 import ReactDOM from 'react-dom';
 
 const API_URL = 'http://localhost:8000/api';
@@ -14,8 +16,8 @@ const Profile = () => {
   const navigate = useNavigate();
   const dispatch = useDispatch();
   const { user, isAuthenticated, loading: authLoading } = useSelector(state => state.auth);
-  const { orders, loading: ordersLoading } = useSelector(state => state.orders);
-  const { customMeals, loading: mealsLoading } = useSelector(state => state.meals);
+  const { orders, ordersNext, loading: ordersLoading, loadingMore: ordersLoadingMore } = useSelector(state => state.orders);
+  const { customMeals, customMealsNext, loading: mealsLoading, loadingMore: mealsLoadingMore } = useSelector(state => state.meals);
   
   const [activeTab, setActiveTab] = useState('profile');
   const [loadingMealId, setLoadingMealId] = useState(null);
@@ -80,12 +82,12 @@ const Profile = () => {
       if (!restaurantId) {
         try {
           // Get the first restaurant from the API
-          const restaurantsResponse = await axios.get(`${API_URL}/restaurants/restaurants/`, {
+          const restaurantsResponse = await axios.get(`${API_URL}/restaurants/restaurants/?page_size=1`, {
             headers: token ? { Authorization: `Token ${token}` } : {}
           });
           
-          if (restaurantsResponse.data && restaurantsResponse.data.length > 0) {
-            const firstRestaurant = restaurantsResponse.data[0];
+          const [firstRestaurant] = toPage(restaurantsResponse.data).results;
+          if (firstRestaurant) {
             restaurantId = firstRestaurant.id;
             restaurantName = firstRestaurant.name;
             console.log('Using default restaurant:', restaurantName);
@@ -522,6 +524,11 @@ const Profile = () => {
                 ))}
               </div>
             )}
+            <LoadMore
+              next={ordersNext}
+              loading={ordersLoadingMore}
+              onLoadMore={(next) => dispatch(fetchUserOrders({ next }))}
+            />
           </div>
         )}
         
@@ -582,6 +589,11 @@ const Profile = () => {
                 ))}
               </div>
             )}
+            <LoadMore
+              next={customMealsNext}
+              loading={mealsLoadingMore}
+              onLoadMore={(next) => dispatch(fetchCustomMeals({ next }))}
+            />
           </div>
         )}
       </div>
@@ -1,5 +1,6 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit';
 import axios from 'axios';
+import { mergePage, toPage } from '../../utils/pagination';
 
 const API_URL = 'http://localhost:8000/api';
 
@@ -60,20 +61,21 @@ export const getCurrentUser = createAsyncThunk(
 
 export const fetchAllUsers = createAsyncThunk(
   'auth/fetchAllUsers',
-  async (_, { rejectWithValue }) => {
+  async (params, { rejectWithValue }) => {
     try {
       const token = localStorage.getItem('token');
       if (!token) {
         return rejectWithValue('Authentication required');
       }
       
-      const response = await axios.get(`${API_URL}/users/`, {
+      // `next` loads the page after the ones already shown
+      const response = await axios.get(params?.next || `${API_URL}/users/`, {
         headers: {
           Authorization: `Token ${token}`
         }
       });
       
-      return response.data;
+      return toPage(response.data);
     } catch (error) {
       return rejectWithValue(error.response.data);
     }
@@ -165,8 +167,10 @@ export const deleteUser = createAsyncThunk(
 const initialState = {
   user: null,
   users: [],
+  usersNext: null,
   isAuthenticated: false,
   loading: false,
+  loadingMore: false,
   error: null,
 };
 
@@ -232,16 +236,23 @@ const authSlice = createSlice({
       })
       
       // Fetch all users
-      .addCase(fetchAllUsers.pending, (state) => {
-        state.loading = true;
+      .addCase(fetchAllUsers.pending, (state, action) => {
+        if (action.meta.arg?.next) {
+          state.loadingMore = true;
+        } else {
+          state.loading = true;
+        }
         state.error = null;
       })
       .addCase(fetchAllUsers.fulfilled, (state, action) => {
         state.loading = false;
-        state.users = action.payload;
+        state.loadingMore = false;
+        state.users = mergePage(state.users, action.payload, action.meta.arg?.next);
+        state.usersNext = action.payload.next;
       })
       .addCase(fetchAllUsers.rejected, (state, action) => {
         state.loading = false;
+        state.loadingMore = false;
         state.error = action.payload || 'Failed to fetch users';
       })
       
@@ -1,5 +1,6 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit';
 import axios from 'axios';
+import { PICK_LIST_PAGE_SIZE, fetchAllPages, mergePage, toPage } from '../../utils/pagination';
 
 const API_URL = 'http://localhost:8000/api';
 
@@ -16,8 +17,9 @@ export const fetchMeals = createAsyncThunk(
         url += params.restaurantId ? `&category=${params.categoryId}` : `?category=${params.categoryId}`;
       }
       
-      const response = await axios.get(url);
-      return response.data;
+      // `next` loads the page after the ones already shown, with the same filters
+      const response = await axios.get(params?.next || url);
+      return toPage(response.data);
     } catch (error) {
       return rejectWithValue(error.response.data);
     }
@@ -40,8 +42,7 @@ export const fetchMealCategories = createAsyncThunk(
   'meals/fetchMealCategories',
   async (_, { rejectWithValue }) => {
     try {
-      const response = await axios.get(`${API_URL}/meals/categories/`);
-      return response.data;
+      return await fetchAllPages(`${API_URL}/meals/categories/?page_size=${PICK_LIST_PAGE_SIZE}`);
     } catch (error) {
       return rejectWithValue(error.response.data);
     }
@@ -61,11 +62,11 @@ export const fetchCustomMeals = createAsyncThunk(
       }
       
       const token = localStorage.getItem('token');
-      const response = await axios.get(url, {
+      const response = await axios.get(params?.next || url, {
         headers: token ? { Authorization: `Token ${token}` } : {}
       });
       
-      return response.data;
+      return toPage(response.data);
     } catch (error) {
       return rejectWithValue(error.response.data);
     }
@@ -108,10 +109,13 @@ export const createCustomMeal = createAsyncThunk(
 
 const initialState = {
   meals: [],
+  mealsNext: null,
   currentMeal: null,
   categories: [],
   customMeals: [],
+  customMealsNext: null,
   loading: false,
+  loadingMore: false,
   error: null,
 };
 
@@ -129,16 +133,23 @@ const mealSlice = createSlice({
   extraReducers: (builder) => {
     builder
       // Fetch all meals
-      .addCase(fetchMeals.pending, (state) => {
-        state.loading = true;
+      .addCase(fetchMeals.pending, (state, action) => {
+        if (action.meta.arg?.next) {
+          state.loadingMore = true;
+        } else {
+          state.loading = true;
+        }
         state.error = null;
       })
       .addCase(fetchMeals.fulfilled, (state, action) => {
         state.loading = false;
-        state.meals = action.payload;
+        state.loadingMore = false;
+        state.meals = mergePage(state.meals, action.payload, action.meta.arg?.next);
+        state.mealsNext = action.payload.next;
       })
       .addCase(fetchMeals.rejected, (state, action) => {
         state.loading = false;
+        state.loadingMore = false;
         state.error = action.payload || 'Failed to fetch meals';
       })
       
@@ -171,16 +182,23 @@ const mealSlice = createSlice({
       })
       
       // Fetch custom meals
-      .addCase(fetchCustomMeals.pending, (state) => {
-        state.loading = true;
+      .addCase(fetchCustomMeals.pending, (state, action) => {
+        if (action.meta.arg?.next) {
+          state.loadingMore = true;
+        } else {
+          state.loading = true;
+        }
         state.error = null;
       })
       .addCase(fetchCustomMeals.fulfilled, (state, action) => {
         state.loading = false;
-        state.customMeals = action.payload;
+        state.loadingMore = false;
+        state.customMeals = mergePage(state.customMeals, action.payload, action.meta.arg?.next);
+        state.customMealsNext = action.payload.next;
       })
       .addCase(fetchCustomMeals.rejected, (state, action) => {
         state.loading = false;
+        state.loadingMore = false;
         state.error = action.payload || 'Failed to fetch custom meals';
       })
       
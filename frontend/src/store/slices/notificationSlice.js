@@ -1,25 +1,30 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit';
 import axios from 'axios';
+import { mergePage, toPage } from '../../utils/pagination';
 
-const API_URL = 'http://localhost:8000/api';
+const API_URL = import.meta.env.VITE_API_URL || 'http://localhost:8000/api';
+
+// Server-Sent Events stream of new notifications (served when the backend runs under ASGI)
+export const NOTIFICATION_STREAM_URL = `${API_URL}/notifications/stream/`;
 
 // Async thunks
 export const fetchNotifications = createAsyncThunk(
   'notifications/fetchNotifications',
-  async (_, { rejectWithValue }) => {
+  async (params, { rejectWithValue }) => {
     try {
       const token = localStorage.getItem('token');
       if (!token) {
         return rejectWithValue('Authentication required');
       }
       
-      const response = await axios.get(`${API_URL}/notifications/notifications/`, {
+      // `next` loads the page after the ones already shown
+      const response = await axios.get(params?.next || `${API_URL}/notifications/notifications/`, {
         headers: {
           Authorization: `Token ${token}`
         }
       });
       
-      return response.data;
+      return toPage(response.data);
     } catch (error) {
       return rejectWithValue(error.response.data);
     }
@@ -35,13 +40,14 @@ export const fetchUnreadNotifications = createAsyncThunk(
         return rejectWithValue('Authentication required');
       }
       
+      // The newest unread page is enough for the bell and its dropdown
       const response = await axios.get(`${API_URL}/notifications/notifications/unread/`, {
         headers: {
           Authorization: `Token ${token}`
         }
       });
       
-      return response.data;
+      return toPage(response.data).results;
     } catch (error) {
       return rejectWithValue(error.response.data);
     }
@@ -102,8 +108,10 @@ export const markAllNotificationsAsRead = createAsyncThunk(
 
 const initialState = {
   notifications: [],
+  notificationsNext: null,
   unreadNotifications: [],
   loading: false,
+  loadingMore: false,
   error: null,
 };
 
@@ -115,23 +123,36 @@ const notificationSlice = createSlice({
       state.error = null;
     },
     addNotification: (state, action) => {
-      state.notifications.unshift(action.payload);
-      state.unreadNotifications.unshift(action.payload);
+      // A pushed notification may already be in a list fetched at the same time
+      const isNew = (list) => !list.some(n => n.id === action.payload.id);
+      if (isNew(state.notifications)) {
+        state.notifications.unshift(action.payload);
+      }
+      if (!action.payload.is_read && isNew(state.unreadNotifications)) {
+        state.unreadNotifications.unshift(action.payload);
+      }
     }
   },
   extraReducers: (builder) => {
     builder
       // Fetch all notifications
-      .addCase(fetchNotifications.pending, (state) => {
-        state.loading = true;
+      .addCase(fetchNotifications.pending, (state, action) => {
+        if (action.meta.arg?.next) {
+          state.loadingMore = true;
+        } else {
+          state.loading = true;
+        }
         state.error = null;
       })
       .addCase(fetchNotifications.fulfilled, (state, action) => {
         state.loading = false;
-        state.notifications = action.payload;
+        state.loadingMore = false;
+        state.notifications = mergePage(state.notifications, action.payload, action.meta.arg?.next);
+        state.notificationsNext = action.payload.next;
       })
       .addCase(fetchNotifications.rejected, (state, action) => {
         state.loading = false;
+        state.loadingMore = false;
         state.error = action.payload || 'Failed to fetch notifications';
       })
       
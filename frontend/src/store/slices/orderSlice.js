@@ -1,5 +1,6 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit';
 import axios from 'axios';
+import { mergePage, toPage } from '../../utils/pagination';
 import { clearCart } from './cartSlice';
 
 const API_URL = 'http://localhost:8000/api';
@@ -7,20 +8,21 @@ const API_URL = 'http://localhost:8000/api';
 // Async thunks
 export const fetchUserOrders = createAsyncThunk(
   'orders/fetchUserOrders',
-  async (_, { rejectWithValue }) => {
+  async (params, { rejectWithValue }) => {
     try {
       const token = localStorage.getItem('token');
       if (!token) {
         return rejectWithValue('Authentication required');
       }
       
-      const response = await axios.get(`${API_URL}/orders/orders/`, {
+      // `next` loads the page after the ones already shown
+      const response = await axios.get(params?.next || `${API_URL}/orders/orders/`, {
         headers: {
           Authorization: `Token ${token}`
         }
       });
       
-      return response.data;
+      return toPage(response.data);
     } catch (error) {
       return rejectWithValue(error.response.data);
     }
@@ -51,7 +53,7 @@ export const fetchOrderById = createAsyncThunk(
 
 export const createOrder = createAsyncThunk(
   'orders/createOrder',
-  async ({ orderData, cartItems, restaurantId }, { dispatch, rejectWithValue, getState }) => {
+  async ({ orderData, cartItems, restaurantId, idempotencyKey, keepCart }, { dispatch, rejectWithValue, getState }) => {
     try {
       const token = localStorage.getItem('token');
       if (!token) {
@@ -114,13 +116,17 @@ export const createOrder = createAsyncThunk(
         {
           headers: {
             Authorization: `Token ${token}`,
-            'Content-Type': 'application/json'
+            'Content-Type': 'application/json',
+            // Lets the backend recognise a retried submission instead of creating a second order
+            ...(idempotencyKey && { 'Idempotency-Key': idempotencyKey })
           }
         }
       );
       
-      // Clear the cart after successful order
-      dispatch(clearCart());
+      // Clear the cart after successful order (card checkouts clear it once the payment succeeds)
+      if (!keepCart) {
+        dispatch(clearCart());
+      }
       
       return response.data;
     } catch (error) {
@@ -164,8 +170,10 @@ export const updateOrderStatus = createAsyncThunk(
 
 const initialState = {
   orders: [],
+  ordersNext: null,
   currentOrder: null,
   loading: false,
+  loadingMore: false,
   error: null,
 };
 
@@ -183,16 +191,23 @@ const orderSlice = createSlice({
   extraReducers: (builder) => {
     builder
       // Fetch user orders
-      .addCase(fetchUserOrders.pending, (state) => {
-        state.loading = true;
+      .addCase(fetchUserOrders.pending, (state, action) => {
+        if (action.meta.arg?.next) {
+          state.loadingMore = true;
+        } else {
+          state.loading = true;
+        }
         state.error = null;
       })
       .addCase(fetchUserOrders.fulfilled, (state, action) => {
         state.loading = false;
-        state.orders = action.payload;
+        state.loadingMore = false;
+        state.orders = mergePage(state.orders, action.payload, action.meta.arg?.next);
+        state.ordersNext = action.payload.next;
       })
       .addCase(fetchUserOrders.rejected, (state, action) => {
         state.loading = false;
+        state.loadingMore = false;
         state.error = action.payload || 'Failed to fetch orders';
       })
       
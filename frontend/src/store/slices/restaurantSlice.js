@@ -1,15 +1,17 @@
 import { createSlice, createAsyncThunk } from '@reduxjs/toolkit';
 import axios from 'axios';
+import { PICK_LIST_PAGE_SIZE, fetchAllPages, mergePage, toPage } from '../../utils/pagination';
 
 const API_URL = 'http://localhost:8000/api';
 
 // Async thunks
 export const fetchRestaurants = createAsyncThunk(
   'restaurants/fetchRestaurants',
-  async (_, { rejectWithValue }) => {
+  async (params, { rejectWithValue }) => {
     try {
-      const response = await axios.get(`${API_URL}/restaurants/restaurants/`);
-      return response.data;
+      // `next` loads the page after the ones already shown
+      const response = await axios.get(params?.next || `${API_URL}/restaurants/restaurants/`);
+      return toPage(response.data);
     } catch (error) {
       return rejectWithValue(error.response.data);
     }
@@ -32,8 +34,9 @@ export const fetchRestaurantIngredients = createAsyncThunk(
   'restaurants/fetchRestaurantIngredients',
   async (restaurantId, { rejectWithValue }) => {
     try {
-      const response = await axios.get(`${API_URL}/restaurants/restaurants/${restaurantId}/ingredients/`);
-      return response.data;
+      return await fetchAllPages(
+        `${API_URL}/restaurants/restaurants/${restaurantId}/ingredients/?page_size=${PICK_LIST_PAGE_SIZE}`
+      );
     } catch (error) {
       return rejectWithValue(error.response.data);
     }
@@ -115,9 +118,11 @@ export const updateRestaurantStatus = createAsyncThunk(
 
 const initialState = {
   restaurants: [],
+  restaurantsNext: null,
   currentRestaurant: null,
   ingredients: [],
   loading: false,
+  loadingMore: false,
   error: null,
 };
 
@@ -135,16 +140,23 @@ const restaurantSlice = createSlice({
   extraReducers: (builder) => {
     builder
       // Fetch all restaurants
-      .addCase(fetchRestaurants.pending, (state) => {
-        state.loading = true;
+      .addCase(fetchRestaurants.pending, (state, action) => {
+        if (action.meta.arg?.next) {
+          state.loadingMore = true;
+        } else {
+          state.loading = true;
+        }
         state.error = null;
       })
       .addCase(fetchRestaurants.fulfilled, (state, action) => {
         state.loading = false;
-        state.restaurants = action.payload;
+        state.loadingMore = false;
+        state.restaurants = mergePage(state.restaurants, action.payload, action.meta.arg?.next);
+        state.restaurantsNext = action.payload.next;
       })
       .addCase(fetchRestaurants.rejected, (state, action) => {
         state.loading = false;
+        state.loadingMore = false;
         state.error = action.payload || 'Failed to fetch restaurants';
       })
       
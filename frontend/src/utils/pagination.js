@@ -0,0 +1,31 @@
+import axios from 'axios';
+
+// List endpoints return cursor pages: { next, previous, results }.
+// Screens show the first page and fetch `next` when the user asks for more.
+
+// Pick lists (categories, a restaurant's ingredients) need every row: they
+// are requested in pages of the largest size those endpoints serve, and
+// fetchAllPages follows `next` until the list is exhausted
+export const PICK_LIST_PAGE_SIZE = 200;
+
+// `{ results, next }` of a list response
+export const toPage = (data) =>
+  Array.isArray(data)
+    ? { results: data, next: null }
+    : { results: data?.results ?? [], next: data?.next ?? null };
+
+// Every row of a list endpoint, following `next` links from `url`
+export const fetchAllPages = async (url, config) => {
+  const rows = [];
+  while (url) {
+    const page = toPage((await axios.get(url, config)).data);
+    rows.push(...page.results);
+    url = page.next;
+  }
+  return rows;
+};
+
+// A page loaded from a `next` link goes after the rows already shown,
+// a first page replaces them
+export const mergePage = (rows, page, append) =>
+  append ? [...rows, ...page.results] : page.results;